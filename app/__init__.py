@@ -17,6 +17,18 @@ def create_app(config_name=None):
     # Initialize extensions
     db.init_app(app)
     
+    # Request, database and upstream API timing
+    from app.utils.metrics import init_metrics
+    from app.utils.query_profiler import init_query_profiler
+    from app.utils.http_cache import init_http_cache
+    from app.utils.assets import init_assets
+    from app.utils.serialization import init_serialization
+    init_metrics(app)
+    init_query_profiler(app)
+    init_http_cache(app)
+    init_assets(app)
+    init_serialization(app)
+    
     # Configure CORS for security
     CORS(app, origins=app.config['ALLOWED_ORIGINS'], 
          supports_credentials=True,
@@ -33,8 +45,8 @@ def create_app(config_name=None):
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(admin_settings_bp, url_prefix='/admin')
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Schema changes run once per deploy (flask init-db), not in every worker
+    from app.cli import register_commands
+    register_commands(app)
     
     return app
\ No newline at end of file
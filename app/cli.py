@@ -0,0 +1,251 @@
+"""One-shot deploy commands, run once per deploy instead of in every worker.
+
+    flask --app wsgi migrate-db [--dry-run]   # create missing tables, columns and indexes
+    flask --app wsgi init-db                  # migrate, then add sample data to an empty database
+    flask --app wsgi build-assets [--vendor]  # minified, fingerprinted static files
+"""
+
+import os
+
+import click
+from sqlalchemy import inspect, text
+
+from app import db
+
+SAMPLE_FAQS = [
+    {
+        'category': 'general',
+        'question': 'What are your clinic hours?',
+        'answer': 'Our clinic is open Monday through Friday from 9:00 AM to 5:00 PM, and Saturday from 9:00 AM to 1:00 PM. We are closed on Sundays.',
+        'language': 'en'
+    },
+    {
+        'category': 'appointments',
+        'question': 'How do I schedule an appointment?',
+        'answer': 'You can schedule an appointment by using our AI assistant, calling us at (555) 123-4567, or using our patient portal online.',
+        'language': 'en'
+    },
+    {
+        'category': 'insurance',
+        'question': 'What insurance do you accept?',
+        'answer': 'We accept most major insurance plans including Blue Cross Blue Shield, Aetna, Cigna, UnitedHealthcare, and Medicare. Please contact us to verify your specific plan.',
+        'language': 'en'
+    },
+    {
+        'category': 'services',
+        'question': 'What services do you offer?',
+        'answer': 'We offer comprehensive primary care services including general consultations, physical exams, vaccinations, minor procedures, and preventive care.',
+        'language': 'en'
+    },
+    {
+        'category': 'general',
+        'question': '¿Cuáles son los horarios de la clínica?',
+        'answer': 'Nuestra clínica está abierta de lunes a viernes de 9:00 AM a 5:00 PM, y los sábados de 9:00 AM a 1:00 PM. Estamos cerrados los domingos.',
+        'language': 'es'
+    }
+]
+
+SAMPLE_AFTERCARE = [
+    {
+        'title': 'General Consultation Follow-up',
+        'treatment_type': 'consultation',
+        'instructions': 'Follow all prescribed medications as directed. Monitor your symptoms and contact us if they worsen.',
+        'precautions': 'Avoid strenuous activities if advised. Take medications with food if specified.',
+        'follow_up_timeline': '1-2 weeks',
+        'emergency_signs': 'Severe pain, difficulty breathing, high fever (over 101°F), or any concerning symptoms.',
+        'language': 'en'
+    },
+    {
+        'title': 'Vaccination Aftercare',
+        'treatment_type': 'vaccination',
+        'instructions': 'Keep the injection site clean and dry. Apply ice if there is swelling or pain.',
+        'precautions': 'Avoid rubbing the injection site. Stay hydrated and rest if feeling tired.',
+        'follow_up_timeline': '24-48 hours for any reactions',
+        'emergency_signs': 'Severe allergic reaction, difficulty breathing, widespread rash, or severe swelling.',
+        'language': 'en'
+    }
+]
+
+
+def migrate_database(dry_run=False):
+    """Bring the schema up to the models; returns a description of each change.
+
+    Creates missing tables and indexes and adds missing columns (as
+    nullable, filled with the column's default). Columns the models now
+    allow to be empty lose their NOT NULL constraint; SQLite cannot alter
+    a column, so those tables are rebuilt with their rows copied over.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    changes = []
+
+    missing_tables = [table for table in db.metadata.sorted_tables if table.name not in existing_tables]
+    changes.extend(f'create table {table.name}' for table in missing_tables)
+    if missing_tables and not dry_run:
+        db.metadata.create_all(db.engine, tables=missing_tables)
+
+    sqlite = db.engine.dialect.name == 'sqlite'
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {column['name']: column for column in inspector.get_columns(table.name)}
+            relaxed = [column for column in table.columns if column.name in columns and column.nullable
+                       and not column.primary_key and not columns[column.name]['nullable']]
+
+            if relaxed and sqlite:
+                changes.append(f'rebuild table {table.name} (drop NOT NULL on '
+                               f'{", ".join(column.name for column in relaxed)})')
+                if not dry_run:
+                    _rebuild_sqlite_table(connection, inspector, table, columns)
+                continue
+
+            for column in table.columns:
+                if column.name not in columns:
+                    changes.append(f'add column {table.name}.{column.name}')
+                    if not dry_run:
+                        _add_column(connection, table, column)
+            for column in relaxed:
+                changes.append(f'drop NOT NULL on {table.name}.{column.name}')
+                if not dry_run:
+                    connection.execute(text(f'ALTER TABLE {_quote(table.name)} ALTER COLUMN '
+                                            f'{_quote(column.name)} DROP NOT NULL'))
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    changes.append(f'create index {index.name}')
+                    if not dry_run:
+                        index.create(connection)
+    return changes
+
+
+def _quote(name):
+    return db.engine.dialect.identifier_preparer.quote(name)
+
+
+def _column_default(column):
+    if column.default is not None and column.default.is_scalar:
+        return column.default.arg
+    return None
+
+
+def _add_column(connection, table, column):
+    column_type = column.type.compile(dialect=db.engine.dialect)
+    connection.execute(text(f'ALTER TABLE {_quote(table.name)} ADD COLUMN {_quote(column.name)} {column_type}'))
+    default = _column_default(column)
+    if default is not None:
+        connection.execute(table.update().values({column.name: default}))
+
+
+def _rebuild_sqlite_table(connection, inspector, table, existing_columns):
+    """Recreate a SQLite table from the model and copy its rows over."""
+    old_name = f'_old_{table.name}'
+    for index in inspector.get_indexes(table.name):
+        connection.execute(text(f'DROP INDEX {_quote(index["name"])}'))
+    # Legacy mode keeps other tables' foreign keys pointing at the original name
+    connection.execute(text('PRAGMA legacy_alter_table = ON'))
+    connection.execute(text(f'ALTER TABLE {_quote(table.name)} RENAME TO {_quote(old_name)}'))
+    connection.execute(text('PRAGMA legacy_alter_table = OFF'))
+    table.create(connection)
+
+    copied = [column.name for column in table.columns if column.name in existing_columns]
+    column_list = ', '.join(_quote(name) for name in copied)
+    connection.execute(text(f'INSERT INTO {_quote(table.name)} ({column_list}) '
+                            f'SELECT {column_list} FROM {_quote(old_name)}'))
+    connection.execute(text(f'DROP TABLE {_quote(old_name)}'))
+    for column in table.columns:
+        default = _column_default(column)
+        if column.name not in existing_columns and default is not None:
+            connection.execute(table.update().values({column.name: default}))
+
+
+def seed_sample_data():
+    """Add the admin user and sample content to an empty database; returns True if it did."""
+    from app.models import User, Patient, FAQ, AftercareInstruction
+
+    if User.query.count():
+        return False
+
+    admin = User(
+        username='admin',
+        email='admin@clinic.com',
+        role='admin'
+    )
+    admin.set_password('admin123')  # Change this in production!
+    db.session.add(admin)
+
+    db.session.add_all(FAQ(**faq_data) for faq_data in SAMPLE_FAQS)
+    db.session.add_all(AftercareInstruction(**aftercare_data) for aftercare_data in SAMPLE_AFTERCARE)
+
+    db.session.add(Patient(
+        first_name='John',
+        last_name='Doe',
+        email='john.doe@example.com',
+        phone='(555) 123-4567',
+        preferred_language='en'
+    ))
+
+    db.session.commit()
+    return True
+
+
+def init_database(app):
+    """Migrate the schema, add sample data if empty and backfill dashboard rollups."""
+    from app.models import DailyStat
+    from app.services.stats_service import stats_service
+
+    with app.app_context():
+        for change in migrate_database():
+            print(f"Schema: {change}")
+
+        if seed_sample_data():
+            print("Sample data created successfully!")
+            print("Admin login: admin / admin123")
+
+        # Backfill dashboard rollups once for databases created before them
+        if DailyStat.query.count() == 0:
+            stats_service.rebuild_daily_rollups()
+
+
+@click.command('migrate-db')
+@click.option('--dry-run', is_flag=True, help='List the changes without making them.')
+def migrate_db_command(dry_run):
+    """Create missing tables, columns and indexes."""
+    changes = migrate_database(dry_run=dry_run)
+    for change in changes:
+        click.echo(('Would ' if dry_run else '') + change)
+    if not changes:
+        click.echo('Schema is up to date.')
+
+
+@click.command('init-db')
+def init_db_command():
+    """Migrate the schema and add sample data to an empty database."""
+    from flask import current_app
+
+    init_database(current_app._get_current_object())
+
+
+@click.command('build-assets')
+@click.option('--vendor', is_flag=True, help='Self-host subset copies of Bootstrap and Font Awesome.')
+@click.option('--vendor-dir', type=click.Path(exists=True, file_okay=False),
+              help='Read the vendor files from this directory instead of their CDNs.')
+def build_assets_command(vendor, vendor_dir):
+    """Minify, fingerprint and precompress the static assets."""
+    from flask import current_app
+    from app.utils.asset_build import build_assets
+
+    template_folder = os.path.join(current_app.root_path, current_app.template_folder)
+    report = build_assets(current_app.static_folder, template_folder,
+                          vendor=vendor or bool(vendor_dir), vendor_dir=vendor_dir)
+    for name, sizes in report.items():
+        compressed = ', '.join(f'{encoding} {sizes[encoding]:,}' for encoding in ('gzip', 'br') if encoding in sizes)
+        click.echo(f'{name}: {sizes["source_bytes"]:,} -> {sizes["bytes"]:,} bytes'
+                   + (f' ({compressed})' if compressed else ''))
+
+
+def register_commands(app):
+    app.cli.add_command(migrate_db_command)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(build_assets_command)
@@ -39,7 +39,7 @@ class Patient(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True)  # empty for chat bookings whose email is already on file
     phone = db.Column(db.String(20), nullable=False)
     date_of_birth = db.Column(db.Date)
     gender = db.Column(db.String(10))
@@ -56,8 +56,8 @@ class Patient(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    appointments = db.relationship('Appointment', backref='patient', lazy=True)
-    intake_forms = db.relationship('IntakeForm', backref='patient', lazy=True)
+    appointments = db.relationship('Appointment', backref=db.backref('patient', lazy='raise_on_sql'), lazy=True)
+    intake_forms = db.relationship('IntakeForm', backref=db.backref('patient', lazy='raise_on_sql'), lazy=True)
     
     def to_dict(self):
         return {
@@ -113,28 +113,33 @@ class IntakeForm(db.Model):
     __tablename__ = 'intake_forms'
     
     id = db.Column(db.Integer, primary_key=True)
-    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'))  # unset for anonymous chat drafts
+    chat_session_id = db.Column(db.Integer, db.ForeignKey('chat_sessions.id'), index=True)
     appointment_id = db.Column(db.Integer, db.ForeignKey('appointments.id'))
-    chief_complaint = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='completed')  # draft, paused, completed
+    chief_complaint = db.Column(db.Text)  # required once completed
     symptoms = db.Column(db.Text)
     symptom_duration = db.Column(db.String(50))
-    pain_level = db.Column(db.Integer)  # 1-10 scale
+    pain_level = db.Column(db.Integer)  # 0-10 scale
     previous_treatments = db.Column(db.Text)
     additional_notes = db.Column(db.Text)
-    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)  # None while a draft
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
             'id': self.id,
             'patient_id': self.patient_id,
+            'chat_session_id': self.chat_session_id,
             'appointment_id': self.appointment_id,
+            'status': self.status,
             'chief_complaint': self.chief_complaint,
             'symptoms': self.symptoms,
             'symptom_duration': self.symptom_duration,
             'pain_level': self.pain_level,
             'previous_treatments': self.previous_treatments,
             'additional_notes': self.additional_notes,
-            'completed_at': self.completed_at.isoformat()
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
 
 class FAQ(db.Model):
@@ -197,11 +202,16 @@ class ChatSession(db.Model):
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'))
     language = db.Column(db.String(10), default='en')
     status = db.Column(db.String(20), default='active')  # active, completed, abandoned
+    summary = db.Column(db.Text)  # rolling summary of older turns
+    summary_message_id = db.Column(db.Integer)  # last ChatMessage.id folded into the summary
+    booking_state = db.Column(db.Text)  # JSON: in-progress chat booking (see BookingService)
+    flagged_reason = db.Column(db.String(200))  # set when staff should review, e.g. emergency symptoms
+    flagged_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    messages = db.relationship('ChatMessage', backref='session', lazy=True)
+    messages = db.relationship('ChatMessage', backref=db.backref('session', lazy='raise_on_sql'), lazy=True)
     
     def to_dict(self):
         return {
@@ -210,6 +220,8 @@ class ChatSession(db.Model):
             'patient_id': self.patient_id,
             'language': self.language,
             'status': self.status,
+            'flagged_reason': self.flagged_reason,
+            'flagged_at': self.flagged_at.isoformat() if self.flagged_at else None,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -325,7 +337,7 @@ class Doctor(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    appointments = db.relationship('Appointment', backref='doctor', lazy=True)
+    appointments = db.relationship('Appointment', backref=db.backref('doctor', lazy='raise_on_sql'), lazy=True)
     
     def to_dict(self):
         return {
@@ -407,4 +419,22 @@ class BookingSettings(db.Model):
             'working_hours': self.working_hours,
             'blocked_dates': self.blocked_dates,
             'updated_at': self.updated_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+class DailyStat(db.Model):
+    """Per-day rollup counters for dashboard time series."""
+    __tablename__ = 'daily_stats'
+    __table_args__ = (db.UniqueConstraint('day', 'metric', name='uq_daily_stats_day_metric'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    metric = db.Column(db.String(50), nullable=False)  # appointments, chat_messages
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'metric': self.metric,
+            'count': self.count
+        }
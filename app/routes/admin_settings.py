@@ -2,6 +2,10 @@ from flask import Blueprint, request, jsonify, render_template
 from app.models import ClinicSettings, Doctor, BookingSettings, FAQ
 from app import db
 from app.routes.auth import admin_required
+from config.database import get_pool_stats
+from app.services.llm_providers import provider_router
+from app.utils.http_cache import http_cached
+from app.utils.serialization import faq_serializer
 import json
 from datetime import datetime
 
@@ -10,6 +14,7 @@ admin_settings_bp = Blueprint('admin_settings', __name__)
 # Clinic Settings Routes
 @admin_settings_bp.route('/clinic-settings', methods=['GET'])
 @admin_required
+@http_cached(ClinicSettings)
 def get_clinic_settings():
     """Get clinic settings."""
     settings = ClinicSettings.query.first()
@@ -86,6 +91,7 @@ def update_clinic_settings():
 # Doctor Management Routes
 @admin_settings_bp.route('/doctors', methods=['GET'])
 @admin_required
+@http_cached(Doctor)
 def get_doctors():
     """Get all doctors."""
     doctors = Doctor.query.filter_by(is_active=True).all()
@@ -177,6 +183,7 @@ def delete_doctor(doctor_id):
 # Booking Settings Routes
 @admin_settings_bp.route('/booking-settings', methods=['GET'])
 @admin_required
+@http_cached(BookingSettings)
 def get_booking_settings():
     """Get booking settings."""
     settings = BookingSettings.query.first()
@@ -257,8 +264,7 @@ def update_booking_settings():
 @admin_required
 def get_faqs():
     """Get all FAQs."""
-    faqs = FAQ.query.filter_by(is_active=True).all()
-    return jsonify([faq.to_dict() for faq in faqs])
+    return faq_serializer.list_response(FAQ.is_active.is_(True))
 
 @admin_settings_bp.route('/faqs', methods=['POST'])
 @admin_required
@@ -316,6 +322,19 @@ def delete_faq(faq_id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# Metrics Routes
+@admin_settings_bp.route('/metrics/db-pool', methods=['GET'])
+@admin_required
+def get_db_pool_metrics():
+    """Get database connection pool statistics."""
+    return jsonify(get_pool_stats(db.engine))
+
+@admin_settings_bp.route('/metrics/llm', methods=['GET'])
+@admin_required
+def get_llm_metrics():
+    """Get LLM provider routing, circuit breaker state and recent latency percentiles."""
+    return jsonify(provider_router.snapshot())
+
 # Settings Dashboard Route
 @admin_settings_bp.route('/settings-dashboard')
 @admin_required
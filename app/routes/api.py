@@ -1,23 +1,34 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 from app.models import Patient, Appointment, FAQ, AftercareInstruction, ChatSession, ChatMessage, IntakeForm
 from app.services.chatbot_service import ChatbotService
 from app.services.calendar_service import CalendarService
-from app.routes.auth import login_required, admin_required
+from app.services.appointment_service import create_appointment
+from app.services.summary_service import ConversationSummaryService
+from app.services.fast_path_service import FastPathService
+from app.routes.auth import login_required
+from app.utils.deadline import Deadline
+from app.utils.http_cache import http_cached
+from app.utils.serialization import (aftercare_serializer, appointment_serializer, chat_session_serializer,
+                                     faq_serializer, patient_serializer)
 from app import db
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 import uuid
 
 api_bp = Blueprint('api', __name__)
 
 # Initialize services
-chatbot_service = ChatbotService()
 calendar_service = CalendarService()
+chatbot_service = ChatbotService(calendar_service)
+summary_service = ConversationSummaryService(chatbot_service.complete_text)
+# Shared with the chat page, which embeds the quick-action answers
+fast_path_service = FastPathService(chatbot_service)
 
 @api_bp.route('/chat', methods=['POST'])
 def chat():
     """Main chat endpoint for patient interactions."""
     try:
+        deadline = Deadline(current_app.config.get('CHAT_DEADLINE_SECONDS', 20))
         data = request.get_json()
         message = data.get('message', '').strip()
         session_id = data.get('session_id') or session.get('chat_session_id')
@@ -38,7 +49,8 @@ def chat():
                 language=language
             )
             db.session.add(chat_session)
-            db.session.commit()
+            # Committed with the first message below
+            db.session.flush()
         
         # Save user message
         user_message = ChatMessage(
@@ -48,9 +60,19 @@ def chat():
             message_type='text'
         )
         db.session.add(user_message)
+        # Commit before the LLM call so no transaction (and on SQLite the
+        # database write lock) stays open while other requests wait on it
+        db.session.commit()
         
-        # Get AI response
-        response = chatbot_service.process_message(message, session_id, language)
+        # Get AI response, from the precomputed answers when possible; a
+        # booking or intake form in progress needs every message, so it skips them
+        response = None
+        active_flow = chatbot_service.active_flow(chat_session)
+        if active_flow is None:
+            response = fast_path_service.lookup(message, language)
+        if response is None:
+            response = chatbot_service.process_message(message, session_id, language, chat_session, deadline,
+                                                       active_flow=active_flow)
         
         # Save assistant response
         assistant_message = ChatMessage(
@@ -61,30 +83,48 @@ def chat():
             message_metadata=json.dumps(response.get('metadata', {}))
         )
         db.session.add(assistant_message)
+        # Read what the reply needs from the session before the commit expires it
+        chat_session_id = chat_session.id
+        next_flow = chatbot_service.flow_after(response, chat_session, active_flow)
         db.session.commit()
         
+        # Fold older turns into the rolling summary after responding
+        summary_service.schedule_refresh(chat_session_id)
+        
         return jsonify({
             'message': response['message'],
             'type': response.get('type', 'text'),
             'metadata': response.get('metadata', {}),
-            'session_id': session_id
+            'mode': response.get('metadata', {}).get('mode', 'local'),
+            'session_id': session_id,
+            # The page skips its precomputed answers while a flow needs every message
+            'active_flow': next_flow
         })
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to process message'}), 500
 
+@api_bp.route('/chat-sessions/flagged', methods=['GET'])
+@login_required
+def flagged_chat_sessions():
+    """List chat sessions flagged for staff review, newest first."""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    return chat_session_serializer.list_response(ChatSession.flagged_at.isnot(None),
+                                                 order_by=ChatSession.flagged_at.desc(), limit=limit)
+
 @api_bp.route('/patients', methods=['GET', 'POST'])
 @login_required
 def patients():
     """Manage patients."""
     if request.method == 'GET':
-        patients = Patient.query.all()
-        return jsonify([patient.to_dict() for patient in patients])
+        return patient_serializer.list_response()
     
     elif request.method == 'POST':
         try:
             data = request.get_json()
+            if not data.get('email'):
+                return jsonify({'error': 'Email is required'}), 400
             
             # Check if patient already exists
             existing_patient = Patient.query.filter_by(email=data.get('email')).first()
@@ -165,35 +205,12 @@ def patient_detail(patient_id):
 def appointments():
     """Manage appointments."""
     if request.method == 'GET':
-        appointments = Appointment.query.all()
-        return jsonify([appointment.to_dict() for appointment in appointments])
+        return appointment_serializer.list_response()
     
     elif request.method == 'POST':
         try:
             data = request.get_json()
-            
-            appointment = Appointment(
-                patient_id=data.get('patient_id'),
-                appointment_date=datetime.fromisoformat(data.get('appointment_date')),
-                appointment_type=data.get('appointment_type'),
-                reason_for_visit=data.get('reason_for_visit'),
-                symptoms=data.get('symptoms'),
-                notes=data.get('notes')
-            )
-            
-            db.session.add(appointment)
-            db.session.commit()
-            
-            # Try to create Google Calendar event
-            try:
-                patient = Patient.query.get(appointment.patient_id)
-                event_id = calendar_service.create_appointment(appointment, patient)
-                if event_id:
-                    appointment.google_event_id = event_id
-                    db.session.commit()
-            except Exception as e:
-                # Log error but don't fail the appointment creation
-                print(f"Failed to create calendar event: {e}")
+            appointment = create_appointment(data, calendar_service)
             
             return jsonify(appointment.to_dict()), 201
             
@@ -256,18 +273,18 @@ def appointment_detail(appointment_id):
             return jsonify({'error': 'Failed to delete appointment'}), 500
 
 @api_bp.route('/faqs', methods=['GET', 'POST'])
+@http_cached(FAQ, public=True)
 def faqs():
     """Manage FAQs."""
     if request.method == 'GET':
         category = request.args.get('category')
         language = request.args.get('language', 'en')
         
-        query = FAQ.query.filter_by(is_active=True, language=language)
+        criteria = [FAQ.is_active.is_(True), FAQ.language == language]
         if category:
-            query = query.filter_by(category=category)
+            criteria.append(FAQ.category == category)
         
-        faqs = query.all()
-        return jsonify([faq.to_dict() for faq in faqs])
+        return faq_serializer.list_response(*criteria)
     
     elif request.method == 'POST':
         # Require authentication for creating FAQs
@@ -294,17 +311,42 @@ def faqs():
             return jsonify({'error': 'Failed to create FAQ'}), 500
 
 @api_bp.route('/aftercare', methods=['GET'])
+@http_cached(AftercareInstruction, public=True, uncached_args=('q',))
 def aftercare():
-    """Get aftercare instructions."""
+    """Get aftercare instructions; ``q`` does a fuzzy search by treatment."""
     treatment_type = request.args.get('treatment_type')
     language = request.args.get('language', 'en')
+    search = request.args.get('q', '').strip()
     
-    query = AftercareInstruction.query.filter_by(is_active=True, language=language)
+    if search:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        results = chatbot_service.aftercare_index.search(search, language, limit=limit)
+        return jsonify([
+            dict(instruction, score=score) for score, instruction in results
+            if not treatment_type or instruction['treatment_type'] == treatment_type
+        ])
+    
+    criteria = [AftercareInstruction.is_active.is_(True), AftercareInstruction.language == language]
     if treatment_type:
-        query = query.filter_by(treatment_type=treatment_type)
+        criteria.append(AftercareInstruction.treatment_type == treatment_type)
     
-    instructions = query.all()
-    return jsonify([instruction.to_dict() for instruction in instructions])
+    return aftercare_serializer.list_response(*criteria)
+
+def _resumable_intake_form(patient):
+    """The draft this request may continue: its own chat's, or any of the patient's for staff."""
+    if 'user_id' in session:
+        return IntakeForm.query.filter(
+            IntakeForm.patient_id == patient.id,
+            IntakeForm.status.in_(('draft', 'paused'))
+        ).order_by(IntakeForm.id.desc()).first()
+    chat_session_id = session.get('chat_session_id')
+    if not chat_session_id:
+        return None
+    chat_session = ChatSession.query.filter_by(session_id=chat_session_id).first()
+    draft = chatbot_service.intake_service.get_draft(chat_session)
+    if draft is None or draft.patient_id not in (None, patient.id):
+        return None
+    return draft
 
 @api_bp.route('/intake-form', methods=['POST'])
 def submit_intake_form():
@@ -314,26 +356,39 @@ def submit_intake_form():
         
         # Find or create patient
         patient_email = data.get('patient_email')
-        patient = Patient.query.filter_by(email=patient_email).first()
+        patient = Patient.query.filter_by(email=patient_email).first() if patient_email else None
         
         if not patient:
             return jsonify({'error': 'Patient not found'}), 404
         
-        intake_form = IntakeForm(
-            patient_id=patient.id,
-            appointment_id=data.get('appointment_id'),
-            chief_complaint=data.get('chief_complaint'),
-            symptoms=data.get('symptoms'),
-            symptom_duration=data.get('symptom_duration'),
-            pain_level=data.get('pain_level'),
-            previous_treatments=data.get('previous_treatments'),
-            additional_notes=data.get('additional_notes')
-        )
+        # Continue an unfinished form only for its owner: the chat session
+        # that started it, or logged-in staff. Knowing an email is not enough.
+        intake_form = _resumable_intake_form(patient)
+        created = intake_form is None
+        if created:
+            intake_form = IntakeForm(patient_id=patient.id)
+            db.session.add(intake_form)
+        else:
+            intake_form.patient_id = patient.id
+        
+        for field in ('appointment_id', 'chief_complaint', 'symptoms', 'symptom_duration',
+                      'pain_level', 'previous_treatments', 'additional_notes'):
+            if data.get(field) not in (None, ''):
+                setattr(intake_form, field, data.get(field))
         
-        db.session.add(intake_form)
+        # "draft": true saves a partial form to finish later
+        if data.get('draft'):
+            intake_form.status = 'draft'
+            intake_form.completed_at = None
+        elif not intake_form.chief_complaint:
+            db.session.rollback()
+            return jsonify({'error': 'Chief complaint is required'}), 400
+        else:
+            intake_form.status = 'completed'
+            intake_form.completed_at = datetime.utcnow()
         db.session.commit()
         
-        return jsonify(intake_form.to_dict()), 201
+        return jsonify(intake_form.to_dict()), 201 if created else 200
         
     except Exception as e:
         db.session.rollback()
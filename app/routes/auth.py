@@ -1,16 +1,57 @@
-from flask import Blueprint, request, jsonify, session, redirect, url_for, render_template, flash
+from flask import Blueprint, request, jsonify, session, redirect, url_for, render_template, flash, g, current_app
 from app.models import User
 from app import db
 from werkzeug.security import check_password_hash
 import functools
+import time
 
 auth_bp = Blueprint('auth', __name__)
 
+_NOT_LOADED = object()
+
+def load_current_user():
+    """Load the logged-in user, at most once per request."""
+    user = g.get('_current_user', _NOT_LOADED)
+    if user is _NOT_LOADED:
+        user_id = session.get('user_id')
+        user = db.session.get(User, user_id) if user_id is not None else None
+        g._current_user = user
+    return user
+
+def _store_session_claims(user):
+    """Store the signed role claim and its validation time in the session."""
+    session['user_id'] = user.id
+    session['user_role'] = user.role
+    session['username'] = user.username
+    session['auth_validated_at'] = int(time.time())
+
+def _session_role():
+    """Get the user's role, trusting the session claim while it is fresh.
+    
+    The claim is revalidated against the database once it is older than
+    AUTH_REVALIDATE_SECONDS, so deactivated users and role changes take
+    effect within that window. Returns None if the user is no longer valid.
+    """
+    max_age = current_app.config.get('AUTH_REVALIDATE_SECONDS', 0)
+    validated_at = session.get('auth_validated_at')
+    role = session.get('user_role')
+    
+    if max_age and role and validated_at and time.time() - validated_at < max_age:
+        return role
+    
+    user = load_current_user()
+    if not user or not user.is_active:
+        session.clear()
+        return None
+    
+    _store_session_claims(user)
+    return user.role
+
 def login_required(f):
     """Decorator to require login for protected routes."""
     @functools.wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if 'user_id' not in session or _session_role() is None:
             return jsonify({'error': 'Authentication required'}), 401
         return f(*args, **kwargs)
     return decorated_function
@@ -19,15 +60,15 @@ def admin_required(f):
     """Decorator to require admin role for protected routes."""
     @functools.wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        role = _session_role() if 'user_id' in session else None
+        if role is None:
             if request.is_json:
                 return jsonify({'error': 'Authentication required'}), 401
             else:
                 flash('Please log in to access the admin panel', 'warning')
                 return redirect(url_for('auth.login'))
         
-        user = User.query.get(session['user_id'])
-        if not user or user.role != 'admin':
+        if role != 'admin':
             if request.is_json:
                 return jsonify({'error': 'Admin access required'}), 403
             else:
@@ -63,9 +104,7 @@ def login():
         user = User.query.filter_by(username=username, is_active=True).first()
         
         if user and user.check_password(password):
-            session['user_id'] = user.id
-            session['user_role'] = user.role
-            session['username'] = user.username
+            _store_session_claims(user)
             
             if request.is_json:
                 return jsonify({
@@ -103,7 +142,7 @@ def logout():
 @login_required
 def get_current_user():
     """Get current user information."""
-    user = User.query.get(session['user_id'])
+    user = load_current_user()
     if user:
         return jsonify(user.to_dict())
     return jsonify({'error': 'User not found'}), 404
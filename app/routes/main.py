@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request, jsonify, session
-from app.models import Patient, Appointment, FAQ, AftercareInstruction
-from app import db
+from flask import Blueprint, render_template, request, jsonify, session, current_app, Response
 from app.routes.auth import admin_required
+from app.services.stats_service import stats_service
+from app.routes.api import fast_path_service
+from app.utils.metrics import registry as metrics_registry
 import uuid
 
 main_bp = Blueprint('main', __name__)
@@ -14,6 +15,15 @@ def health_check():
         'message': 'Clinic AI Assistant is running'
     })
 
+@main_bp.route('/metrics')
+def metrics():
+    """Prometheus metrics endpoint."""
+    token = current_app.config.get('METRICS_AUTH_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
 @main_bp.route('/')
 def index():
     """Main chatbot interface."""
@@ -21,22 +31,32 @@ def index():
     if 'chat_session_id' not in session:
         session['chat_session_id'] = str(uuid.uuid4())
     
-    return render_template('index.html', session_id=session['chat_session_id'])
+    return render_template(
+        'index.html',
+        session_id=session['chat_session_id'],
+        fast_path_answers=fast_path_service.get_quick_action_answers()
+    )
 
 @main_bp.route('/admin')
 @admin_required
 def admin_dashboard():
     """Admin dashboard for managing the system."""
     # Get basic statistics
-    stats = {
-        'total_patients': Patient.query.count(),
-        'total_appointments': Appointment.query.count(),
-        'pending_appointments': Appointment.query.filter_by(status='scheduled').count(),
-        'total_faqs': FAQ.query.filter_by(is_active=True).count()
-    }
+    stats = stats_service.get_dashboard_stats()
     
     return render_template('admin.html', stats=stats)
 
+@main_bp.route('/admin/stats')
+@admin_required
+def admin_stats():
+    """Dashboard counters and per-day activity time series."""
+    days = min(max(request.args.get('days', 14, type=int), 1), 90)
+    
+    return jsonify({
+        'stats': stats_service.get_dashboard_stats(),
+        'time_series': stats_service.get_time_series(days)
+    })
+
 @main_bp.route('/patient-portal')
 def patient_portal():
     """Patient portal for managing appointments and information."""
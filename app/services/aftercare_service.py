@@ -0,0 +1,191 @@
+from app.models import AftercareInstruction
+from app.services.retrieval_service import TOKEN_PATTERN, knowledge_version, tokenize
+from app.utils.versioned_cache import VersionedCache
+
+# Words that say "aftercare" rather than which treatment
+GENERIC_WORDS = {
+    'aftercare', 'after', 'care', 'instruction', 'instructions', 'recovery', 'recover', 'post', 'treatment',
+    'need', 'want', 'had', 'have', 'got', 'get', 'about', 'please', 'some', 'any', 'info', 'information',
+    'guide', 'guidance', 'tip', 'tips', 'should', 'this', 'that', 'just', 'yesterday', 'today', 'recent',
+}
+
+# Lay terms patients use -> words that appear in treatment types (added, not replaced)
+SYNONYMS = {
+    'shot': 'vaccination', 'jab': 'vaccination', 'vaccine': 'vaccination', 'immunization': 'vaccination',
+    'injection': 'vaccination', 'flu': 'vaccination',
+    'pulled': 'extraction', 'removed': 'extraction', 'wisdom': 'extraction',
+    'stitches': 'suture', 'stitch': 'suture', 'sutures': 'suture',
+    'cavity': 'filling',
+    'operation': 'surgery', 'surgical': 'surgery',
+    'physio': 'physical therapy', 'physiotherapy': 'physical therapy', 'rehab': 'physical therapy',
+    'checkup': 'consultation', 'visit': 'consultation', 'appointment': 'consultation',
+    'blood': 'blood test', 'lab': 'blood test', 'labs': 'blood test',
+    'cleaning': 'dental cleaning', 'scaling': 'dental cleaning',
+    'broken': 'fracture', 'cast': 'fracture',
+}
+
+# Field weights: the treatment type is what patients name, the title helps
+TREATMENT_WEIGHT = 1.0
+TITLE_WEIGHT = 0.6
+
+
+def max_edit_distance(word):
+    """Typos tolerated for a word of this length."""
+    return 0 if len(word) <= 3 else 1 if len(word) <= 6 else 2
+
+
+def normalize_terms(text):
+    """Stemmed content words of a treatment type, title or query, plus their synonyms."""
+    words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in GENERIC_WORDS]
+    return tokenize(' '.join(f'{word} {SYNONYMS[word]}' if word in SYNONYMS else word for word in words))
+
+
+class TermTrie:
+    """Prefix tree over catalog terms with prefix and bounded edit-distance lookups."""
+
+    def __init__(self, words=()):
+        self.root = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        node['$'] = word
+
+    def with_prefix(self, prefix):
+        """All words starting with ``prefix``."""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        words = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key == '$':
+                    words.append(child)
+                else:
+                    stack.append(child)
+        return words
+
+    def within_distance(self, word, max_distance):
+        """``[(distance, word), ...]`` for words within ``max_distance`` edits.
+
+        Walks the trie computing one Levenshtein row per node and prunes
+        branches whose best cell already exceeds the limit, so only a small
+        part of the vocabulary is visited.
+        """
+        results = []
+        first_row = list(range(len(word) + 1))
+        stack = [(child, char, first_row) for char, child in self.root.items() if char != '$']
+        while stack:
+            node, char, previous_row = stack.pop()
+            row = [previous_row[0] + 1]
+            for column in range(1, len(word) + 1):
+                row.append(min(
+                    row[column - 1] + 1,
+                    previous_row[column] + 1,
+                    previous_row[column - 1] + (word[column - 1] != char),
+                ))
+            if '$' in node and row[-1] <= max_distance:
+                results.append((row[-1], node['$']))
+            if min(row) <= max_distance:
+                stack.extend((child, key, row) for key, child in node.items() if key != '$')
+        return results
+
+
+class AftercareCatalog:
+    """Aftercare instructions of one language indexed by treatment type and title."""
+
+    def __init__(self, instructions):
+        self.entries = instructions  # to_dict() snapshots
+        self.postings = {}  # term -> {entry index: field weight}
+        for index, entry in enumerate(instructions):
+            for text, weight in ((entry['title'], TITLE_WEIGHT), (entry['treatment_type'], TREATMENT_WEIGHT)):
+                for term in normalize_terms(text):
+                    postings = self.postings.setdefault(term, {})
+                    postings[index] = max(weight, postings.get(index, 0))
+        self.treatment_term_counts = [len(set(normalize_terms(entry['treatment_type']))) or 1 for entry in instructions]
+        self.trie = TermTrie(self.postings)
+
+    def _expand(self, term):
+        """Catalog terms matching a query term, with a match weight."""
+        if term in self.postings:
+            return {term: 1.0}
+        matches = {}
+        if len(term) >= 3:
+            for word in self.trie.with_prefix(term):
+                matches[word] = 0.8
+        for distance, word in self.trie.within_distance(term, max_edit_distance(term)):
+            matches[word] = max(matches.get(word, 0), 0.9 - 0.2 * distance)
+        return matches
+
+    def search(self, query, limit=5, min_score=0.3):
+        """Return ``[(score, entry), ...]``, best first."""
+        terms = list(dict.fromkeys(normalize_terms(query)))
+        if not terms or not self.entries:
+            return []
+
+        scores = {}
+        hits = {}  # entry index -> number of query terms that matched it
+        for term in terms:
+            best = {}
+            for word, match_weight in self._expand(term).items():
+                for index, field_weight in self.postings[word].items():
+                    best[index] = max(best.get(index, 0), match_weight * field_weight)
+            for index, score in best.items():
+                scores[index] = scores.get(index, 0) + score
+                hits[index] = hits.get(index, 0) + 1
+
+        # Extra words in a chat message should barely count against a match,
+        # so the score mostly asks how well the entry's words are matched and
+        # breaks ties on how much of the treatment type and query is covered
+        results = []
+        for index, matched in scores.items():
+            entry_terms = self.treatment_term_counts[index]
+            precision = min(1.0, matched / min(len(terms), entry_terms))
+            coverage = min(matched, entry_terms) / entry_terms
+            score = 0.6 * precision + 0.25 * coverage + 0.15 * hits[index] / len(terms)
+            if score >= min_score:
+                results.append((round(score, 3), self.entries[index]))
+        results.sort(key=lambda result: (-result[0], result[1]['id']))
+        return results[:limit]
+
+    def treatment_types(self):
+        return sorted({entry['treatment_type'] for entry in self.entries})
+
+
+class AftercareIndex:
+    """Per-language aftercare catalogs, rebuilt when the knowledge base changes."""
+
+    def __init__(self):
+        self._catalogs = VersionedCache(knowledge_version.get)  # language -> AftercareCatalog
+
+    def invalidate(self):
+        """Force the catalogs to be rebuilt on next use."""
+        self._catalogs.invalidate()
+
+    def get_catalog(self, language):
+        return self._catalogs.get(language, lambda: self._load_catalog(language))
+
+    @staticmethod
+    def _load_catalog(language):
+        instructions = AftercareInstruction.query.filter_by(is_active=True, language=language).all()
+        return AftercareCatalog([instruction.to_dict() for instruction in instructions])
+
+    def search(self, query, language='en', limit=5, min_score=0.3):
+        return self.get_catalog(language).search(query, limit, min_score)
+
+    def best_match(self, query, language='en', min_score=0.5):
+        """The instruction the query most likely refers to, or None."""
+        results = self.search(query, language, limit=2, min_score=min_score)
+        if not results:
+            return None
+        # Ambiguous between two treatments: let the patient choose
+        if len(results) > 1 and results[1][0] >= results[0][0] - 0.05:
+            return None
+        return results[0][1]
@@ -0,0 +1,58 @@
+from app import db
+from app.models import Appointment, Patient
+from datetime import datetime
+
+
+def create_appointment(data, calendar_service=None):
+    """Create an appointment and, when possible, its Google Calendar event.
+
+    ``data`` uses the same keys as ``POST /api/appointments``;
+    ``appointment_date`` may be an ISO string or a datetime. Calendar errors
+    are logged and never fail the booking.
+    """
+    appointment_date = data.get('appointment_date')
+    if isinstance(appointment_date, str):
+        appointment_date = datetime.fromisoformat(appointment_date)
+
+    appointment = Appointment(
+        patient_id=data.get('patient_id'),
+        doctor_id=data.get('doctor_id'),
+        appointment_date=appointment_date,
+        appointment_type=data.get('appointment_type'),
+        reason_for_visit=data.get('reason_for_visit'),
+        symptoms=data.get('symptoms'),
+        notes=data.get('notes')
+    )
+
+    db.session.add(appointment)
+    db.session.commit()
+
+    # Try to create Google Calendar event
+    if calendar_service is not None:
+        try:
+            patient = db.session.get(Patient, appointment.patient_id)
+            event_id = calendar_service.create_appointment(appointment, patient)
+            if event_id:
+                appointment.google_event_id = event_id
+                db.session.commit()
+        except Exception as e:
+            # Log error but don't fail the appointment creation
+            print(f"Failed to create calendar event: {e}")
+
+    return appointment
+
+
+def create_unverified_patient(first_name, last_name, email, phone):
+    """Create a patient for someone who has not signed in (not committed).
+
+    Nobody has proven they own ``email``, so an existing patient is never
+    matched on it: when the email is already on file the new record is left
+    without one, for staff to merge.
+    """
+    if Patient.query.filter_by(email=email).first() is not None:
+        email = None
+
+    patient = Patient(first_name=first_name, last_name=last_name, email=email, phone=phone)
+    db.session.add(patient)
+    db.session.flush()
+    return patient
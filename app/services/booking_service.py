@@ -0,0 +1,544 @@
+from sqlalchemy import func, select
+from app import db
+from app.models import Appointment, BookingSettings, Doctor
+from app.services.appointment_service import create_appointment, create_unverified_patient
+from app.utils.versioned_cache import VersionedCache, VersionStamp
+from datetime import date, datetime, timedelta
+import json
+import re
+
+# Slots collected before a booking can be confirmed, in the order they are asked
+BOOKING_SLOTS = ('appointment_type', 'doctor', 'date', 'time', 'name', 'phone', 'email')
+
+SLOT_PROMPTS = {
+    'appointment_type': "What type of appointment do you need? (consultation, follow-up, check-up, vaccination, ...)",
+    'doctor': "Which doctor would you like to see? You can also say \"any doctor\".",
+    'date': "What date would you like? (for example \"tomorrow\", \"next Tuesday\" or \"2024-06-14\")",
+    'time': "What time works for you? (for example \"10:30\" or \"3pm\")",
+    'name': "May I have your full name?",
+    'phone': "What phone number can we reach you at?",
+    'email': "What is your email address?",
+}
+
+APPOINTMENT_TYPES = {
+    'physical therapy': ('physical therapy', 'physiotherapy', 'physio', 'rehab'),
+    'follow-up': ('follow up', 'follow-up', 'followup', 'check in on'),
+    'check-up': ('check up', 'check-up', 'checkup', 'physical', 'annual exam', 'routine'),
+    'vaccination': ('vaccine', 'vaccination', 'shot', 'immunization', 'flu jab'),
+    'consultation': ('consultation', 'consult', 'new problem', 'see a doctor', 'first visit'),
+    'dental': ('dental', 'dentist', 'teeth', 'tooth', 'cleaning'),
+}
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MONTHS = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+          'september', 'october', 'november', 'december']
+
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+(\.[\w-]+)+')
+PHONE_PATTERN = re.compile(r'(\+?\d[\d\s().-]{7,}\d)')
+NAME_PATTERN = re.compile(r"\b(?:my name is|this is|name:)\s+([a-z][a-z'-]+(?:\s+[a-z][a-z'-]+){0,2})", re.IGNORECASE)
+# Only trusted right after asking for the name ("I'm looking for..." is not a name)
+WEAK_NAME_PATTERN = re.compile(r"^\s*(?:i am|i'm|it's)\s+([a-z][a-z'-]+(?:\s+[a-z][a-z'-]+){0,2})\s*[.!]?\s*$", re.IGNORECASE)
+BARE_NAME_PATTERN = re.compile(r"^\s*([a-z][a-z'-]+(?:\s+[a-z][a-z'-]+){1,2})\s*[.!]?\s*$", re.IGNORECASE)
+ISO_DATE_PATTERN = re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b')
+SLASH_DATE_PATTERN = re.compile(r'\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b')
+_MONTH_NAMES = '|'.join(f'{m[:3]}(?:{m[3:]})?' for m in MONTHS)
+MONTH_DAY_PATTERN = re.compile(r'\b(' + _MONTH_NAMES + r')\.?\s+(\d{1,2})(?:st|nd|rd|th)?\b')
+DAY_MONTH_PATTERN = re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(' + _MONTH_NAMES + r')\b')
+DOCTOR_MENTION_PATTERN = re.compile(r'\b(dr|doctor|with)\b')
+TIME_PATTERN = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)\b|\b(\d{1,2}):(\d{2})\b|\bat\s+(\d{1,2})\b')
+YES_PATTERN = re.compile(r'^\s*(yes|yeah|yep|sure|confirm|correct|ok|okay|please do|book it|sounds good)\b')
+NO_PATTERN = re.compile(r'^\s*(no|nope|not really|wrong|change)\b')
+CANCEL_PATTERN = re.compile(r'\b(cancel|stop|never ?mind|forget it)\b')
+START_PATTERN = re.compile(r'\b(book|schedule|make an appointment|need an appointment|appointment for|see (a|the) doctor)\b')
+ANY_DOCTOR_PATTERN = re.compile(r'\b(any|no preference|whoever|anyone|first available)\b')
+
+
+def parse_date(text, today=None):
+    """Parse a date from free text; returns a date or None."""
+    today = today or date.today()
+    text = text.lower()
+
+    if 'day after tomorrow' in text:
+        return today + timedelta(days=2)
+    if 'tomorrow' in text:
+        return today + timedelta(days=1)
+    if re.search(r'\btoday\b', text):
+        return today
+
+    match = ISO_DATE_PATTERN.search(text)
+    if match:
+        try:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return None
+
+    month = day = None
+    match = MONTH_DAY_PATTERN.search(text)
+    if match:
+        month, day = [m[:3] for m in MONTHS].index(match.group(1)[:3]) + 1, int(match.group(2))
+    else:
+        match = DAY_MONTH_PATTERN.search(text)
+        if match:
+            day, month = int(match.group(1)), [m[:3] for m in MONTHS].index(match.group(2)[:3]) + 1
+        else:
+            match = SLASH_DATE_PATTERN.search(text)
+            if match:
+                month, day = int(match.group(1)), int(match.group(2))
+    if month and day:
+        try:
+            parsed = date(today.year, month, day)
+        except ValueError:
+            return None
+        # "March 3" in December means next year
+        return parsed if parsed >= today else parsed.replace(year=today.year + 1)
+
+    for index, weekday in enumerate(WEEKDAYS):
+        if re.search(r'\b' + weekday + r'\b', text):
+            days_ahead = (index - today.weekday()) % 7
+            if days_ahead == 0 or re.search(r'\bnext\s+' + weekday, text):
+                days_ahead = days_ahead or 7
+            return today + timedelta(days=days_ahead)
+
+    return None
+
+
+def parse_time(text):
+    """Parse a time of day from free text; returns "HH:MM" or None."""
+    text = text.lower()
+    if re.search(r'\bnoon\b', text):
+        return '12:00'
+
+    match = TIME_PATTERN.search(text)
+    if not match:
+        return None
+
+    if match.group(1):
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if match.group(3).startswith('p') and hour < 12:
+            hour += 12
+        elif match.group(3).startswith('a') and hour == 12:
+            hour = 0
+    elif match.group(4):
+        hour, minute = int(match.group(4)), int(match.group(5))
+    else:
+        hour, minute = int(match.group(6)), 0
+        # "at 3" during clinic hours means the afternoon
+        if 1 <= hour <= 6:
+            hour += 12
+
+    if hour > 23 or minute > 59:
+        return None
+    return f'{hour:02d}:{minute:02d}'
+
+
+def parse_appointment_type(text):
+    text = text.lower()
+    for appointment_type, keywords in APPOINTMENT_TYPES.items():
+        if any(keyword in text for keyword in keywords):
+            return appointment_type
+    return None
+
+
+def parse_phone(text):
+    # Dates like 2024-06-14 look like phone numbers
+    match = PHONE_PATTERN.search(ISO_DATE_PATTERN.sub(' ', text))
+    if not match:
+        return None
+    digits = re.sub(r'\D', '', match.group(1))
+    return match.group(1).strip() if 7 <= len(digits) <= 15 else None
+
+
+def parse_email(text):
+    match = EMAIL_PATTERN.search(text)
+    return match.group(0) if match else None
+
+
+def parse_name(text, expecting_name=False):
+    match = NAME_PATTERN.search(text)
+    if not match and expecting_name:
+        match = WEAK_NAME_PATTERN.search(text) or BARE_NAME_PATTERN.search(text)
+    if not match:
+        return None
+    return ' '.join(part.capitalize() for part in match.group(1).split())
+
+
+def get_scheduling_version():
+    """Version stamp for doctors and booking settings."""
+    query = select(
+        select(func.count(Doctor.id)).scalar_subquery(),
+        select(func.max(Doctor.updated_at)).scalar_subquery(),
+        select(func.max(BookingSettings.updated_at)).scalar_subquery(),
+    )
+    return tuple(str(value) for value in db.session.execute(query).one())
+
+
+# Shared by the doctor index and the fast-path answers
+scheduling_version = VersionStamp(get_scheduling_version)
+
+
+class DoctorIndex:
+    """Cached lookup of active doctors by name and specialization."""
+
+    def __init__(self):
+        # {'doctors': id -> {'name', 'specialization', 'availability'},
+        #  'terms': lowercase name or specialization word -> set of doctor ids}
+        self._cache = VersionedCache(scheduling_version.get)
+
+    def _index(self):
+        return self._cache.get('doctors', self._load)
+
+    def _load(self):
+        doctors = {}
+        terms = {}
+        for doctor in Doctor.query.filter_by(is_active=True).all():
+            try:
+                availability = json.loads(doctor.availability) if doctor.availability else None
+            except (json.JSONDecodeError, TypeError):
+                availability = None
+            doctors[doctor.id] = {
+                'name': f'Dr. {doctor.first_name} {doctor.last_name}',
+                'specialization': doctor.specialization,
+                'availability': availability,
+            }
+            for word in [doctor.first_name, doctor.last_name]:
+                terms.setdefault(word.lower(), set()).add(doctor.id)
+            for word in re.findall(r"[a-z]+", (doctor.specialization or '').lower()):
+                if len(word) >= 4:
+                    terms.setdefault(self._stem(word), set()).add(doctor.id)
+        return {'doctors': doctors, 'terms': terms}
+
+    @staticmethod
+    def _stem(word):
+        # dermatology / dermatologist, pediatrics / pediatrician share a stem
+        return word[:7]
+
+    def get(self, doctor_id):
+        return self._index()['doctors'].get(doctor_id)
+
+    def all(self):
+        return dict(self._index()['doctors'])
+
+    def match(self, text):
+        """Return the id of the one doctor the text names, or None."""
+        terms = self._index()['terms']
+        words = re.findall(r"[a-z']+", text.lower())
+        candidates = None
+        for word in words:
+            ids = terms.get(word) or (len(word) >= 4 and terms.get(self._stem(word)))
+            if ids:
+                candidates = ids if candidates is None else (candidates & ids) or candidates
+        if candidates and len(candidates) == 1:
+            return next(iter(candidates))
+        return None
+
+
+class BookingService:
+    """Slot-filling state machine for booking appointments in the chat.
+
+    The state is a small JSON document on ``ChatSession.booking_state``::
+
+        {"status": "collecting" | "confirming",
+         "slots": {"appointment_type": ..., "doctor": id or 0 (any), "date": "YYYY-MM-DD",
+                   "time": "HH:MM", "name": ..., "phone": ..., "email": ...}}
+
+    Messages are parsed deterministically; ``llm_extract`` (when given) is
+    only asked about the missing fields of a booking in progress when the
+    parsers found nothing, and its answers go through the same parsers.
+    """
+
+    def __init__(self, calendar_service=None, llm_extract=None):
+        self.calendar_service = calendar_service
+        self.llm_extract = llm_extract  # llm_extract(message, missing_slots, deadline) -> dict or None
+        self.doctor_index = DoctorIndex()
+
+    @staticmethod
+    def load_state(chat_session):
+        if not chat_session or not chat_session.booking_state:
+            return None
+        try:
+            return json.loads(chat_session.booking_state)
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+    @staticmethod
+    def save_state(chat_session, state):
+        chat_session.booking_state = json.dumps(state, separators=(',', ':')) if state else None
+
+    def is_active(self, chat_session):
+        """True when the session is in the middle of a booking."""
+        state = self.load_state(chat_session)
+        return bool(state and state.get('status') in ('collecting', 'confirming'))
+
+    def wants(self, message, intent, chat_session):
+        """True when the booking flow should answer this message."""
+        state = self.load_state(chat_session)
+        if state and state.get('status') in ('collecting', 'confirming'):
+            if state['status'] == 'confirming' or intent in ('appointment_scheduling', 'general'):
+                return True
+            # "Any doctor" is an FAQ by keywords but answers the booking question
+            return bool(self.extract(message, dict(state['slots'])))
+
+        if intent != 'appointment_scheduling' or CANCEL_PATTERN.search(message.lower()) \
+                or 'reschedule' in message.lower():
+            return False
+        # "What time do you open?" mentions time but is not a booking request
+        return bool(START_PATTERN.search(message.lower()) or parse_date(message) or parse_time(message))
+
+    def next_slot(self, slots):
+        for slot in BOOKING_SLOTS:
+            if slots.get(slot) is None:
+                return slot
+        return None
+
+    def extract(self, message, slots):
+        """Fill the slots the message states; returns the names that changed."""
+        pending = self.next_slot(slots)
+        message_lower = message.lower()
+        found = {
+            'appointment_type': parse_appointment_type(message),
+            'date': parse_date(message),
+            'time': parse_time(message),
+            'phone': parse_phone(message),
+            'email': parse_email(message),
+        }
+        if found['date']:
+            found['date'] = found['date'].isoformat()
+
+        # Doctor names are only looked for when asked or mentioned, so a
+        # patient called "John" does not pick Dr. John Smith
+        if pending == 'doctor' or DOCTOR_MENTION_PATTERN.search(message_lower):
+            found['doctor'] = self.doctor_index.match(message)
+            if found['doctor'] is None and pending == 'doctor' and ANY_DOCTOR_PATTERN.search(message_lower):
+                found['doctor'] = 0
+
+        expecting_name = pending == 'name' and not any(found.values()) \
+            and not (YES_PATTERN.search(message_lower) or NO_PATTERN.search(message_lower))
+        found['name'] = parse_name(message, expecting_name)
+
+        changed = []
+        for slot, value in found.items():
+            if value is not None and slots.get(slot) != value:
+                slots[slot] = value
+                changed.append(slot)
+        return changed
+
+    def _extract_with_llm(self, message, slots, deadline=None):
+        """Ask the LLM about missing fields, validating its answers with the same parsers."""
+        missing = [slot for slot in BOOKING_SLOTS if slots.get(slot) is None]
+        if not self.llm_extract or not missing:
+            return []
+        try:
+            extracted = self.llm_extract(message, missing, deadline) or {}
+        except Exception as e:
+            print(f"Error extracting booking details with LLM: {e}")
+            return []
+
+        parsers = {
+            'appointment_type': lambda value: parse_appointment_type(value) or value.lower()[:50],
+            'doctor': self.doctor_index.match,
+            'date': lambda value: parse_date(value) and parse_date(value).isoformat(),
+            'time': lambda value: parse_time(value) or parse_time(f'at {value}'),
+            'name': lambda value: parse_name(value, expecting_name=True),
+            'phone': parse_phone,
+            'email': parse_email,
+        }
+        changed = []
+        for slot in missing:
+            value = extracted.get(slot)
+            if value in (None, ''):
+                continue
+            value = parsers[slot](str(value))
+            if value is not None:
+                slots[slot] = value
+                changed.append(slot)
+        return changed
+
+    def check_availability(self, slots):
+        """Check the requested date and time.
+
+        Returns ``(problem, slot, alternatives)``: ``problem`` is None when
+        the time can be booked, otherwise a message plus the slot (``date``
+        or ``time``) to ask for again and nearby free times.
+        """
+        requested_date = date.fromisoformat(slots['date'])
+        requested = datetime.combine(requested_date, datetime.strptime(slots['time'], '%H:%M').time())
+        weekday = WEEKDAYS[requested_date.weekday()]
+        settings = BookingSettings.query.first()
+        now = datetime.now()
+
+        if requested < now:
+            return "That time has already passed.", 'date', []
+        if settings:
+            if requested < now + timedelta(hours=settings.min_booking_notice_hours or 0):
+                return f"Appointments need at least {settings.min_booking_notice_hours} hours' notice.", 'date', []
+            if requested_date > now.date() + timedelta(days=settings.advance_booking_days or 30):
+                return f"Appointments can be booked up to {settings.advance_booking_days} days in advance.", 'date', []
+            try:
+                blocked = json.loads(settings.blocked_dates) if settings.blocked_dates else []
+                working_hours = json.loads(settings.working_hours) if settings.working_hours else {}
+            except (json.JSONDecodeError, TypeError):
+                blocked, working_hours = [], {}
+            if slots['date'] in blocked:
+                return "The clinic is closed on that date.", 'date', []
+            hours = working_hours.get(weekday)
+            if hours and not hours.get('enabled', True):
+                return f"The clinic is closed on {weekday.capitalize()}s.", 'date', []
+            if hours and not hours.get('start', '00:00') <= slots['time'] < hours.get('end', '24:00'):
+                return (f"On {weekday.capitalize()}s we are open {hours.get('start')} - {hours.get('end')}.",
+                        'time', [])
+
+        doctor = self.doctor_index.get(slots['doctor']) if slots.get('doctor') else None
+        if doctor and doctor['availability']:
+            blocks = doctor['availability'].get(weekday) or []
+            if not blocks:
+                return f"{doctor['name']} does not see patients on {weekday.capitalize()}s.", 'date', []
+            if not any(block.get('start', '00:00') <= slots['time'] < block.get('end', '24:00') for block in blocks):
+                hours = ', '.join(f"{block.get('start')} - {block.get('end')}" for block in blocks)
+                return f"{doctor['name']} sees patients {hours} on {weekday.capitalize()}s.", 'time', []
+
+        available = self.calendar_service.get_available_slots(requested_date) if self.calendar_service else []
+        if slots.get('doctor'):
+            day_start = datetime.combine(requested_date, datetime.min.time())
+            taken = {
+                appointment_date.strftime('%H:%M')
+                for (appointment_date,) in db.session.query(Appointment.appointment_date).filter(
+                    Appointment.doctor_id == slots['doctor'],
+                    Appointment.status != 'cancelled',
+                    Appointment.appointment_date >= day_start,
+                    Appointment.appointment_date < day_start + timedelta(days=1)
+                )
+            }
+            if slots['time'] in taken:
+                available = [slot for slot in available if slot not in taken]
+                if not available:
+                    return f"{doctor['name'] if doctor else 'That doctor'} is fully booked that day.", 'date', []
+            else:
+                available = [slot for slot in available if slot not in taken] or [slots['time']]
+
+        if available and slots['time'] not in available:
+            minutes = requested.hour * 60 + requested.minute
+            nearest = sorted(available, key=lambda slot: abs(int(slot[:2]) * 60 + int(slot[3:]) - minutes))[:4]
+            return "That time is not available.", 'time', sorted(nearest)
+        return None, None, []
+
+    def describe(self, slots):
+        """One-line summary of the booking details known so far."""
+        parts = [(slots.get('appointment_type') or 'appointment').capitalize()]
+        if slots.get('doctor'):
+            doctor = self.doctor_index.get(slots['doctor'])
+            parts.append(f"with {doctor['name']}" if doctor else 'with the selected doctor')
+        elif slots.get('doctor') == 0:
+            parts.append('with the first available doctor')
+        if slots.get('date'):
+            parts.append('on ' + date.fromisoformat(slots['date']).strftime('%A, %B %d'))
+        if slots.get('time'):
+            parts.append('at ' + slots['time'])
+        return ' '.join(parts)
+
+    def handle(self, message, chat_session, deadline=None):
+        """Advance the booking with a message; returns the chat response."""
+        state = self.load_state(chat_session)
+        in_progress = state is not None
+        state = state or {'status': 'collecting', 'slots': {}}
+        slots = state['slots']
+        message_lower = message.lower()
+
+        if CANCEL_PATTERN.search(message_lower):
+            self.save_state(chat_session, None)
+            return self._response("No problem, I've cancelled this booking. Let me know if you need anything else.",
+                                  'cancelled', slots)
+
+        if state['status'] == 'confirming':
+            if YES_PATTERN.search(message_lower):
+                return self._book(chat_session, slots)
+            state['status'] = 'collecting'
+            changed = self.extract(message, slots)
+            if not changed:
+                self.save_state(chat_session, state)
+                return self._response("What would you like to change? (type, doctor, date, time or contact details)",
+                                      'change', slots)
+        else:
+            changed = self.extract(message, slots)
+            if not changed and in_progress:
+                changed = self._extract_with_llm(message, slots, deadline)
+
+        text = ""
+        if not in_progress:
+            text = "I'd be happy to help you book an appointment.\n\n"
+        elif changed:
+            text = f"Got it: {self.describe(slots)}.\n\n"
+
+        # Check the time as soon as it is known so patients are not asked
+        # for contact details for a slot that cannot be booked
+        alternatives = []
+        if slots.get('date') and slots.get('time') and ('date' in changed or 'time' in changed or
+                                                        'doctor' in changed):
+            problem, slot, alternatives = self.check_availability(slots)
+            if problem:
+                slots[slot] = None
+                text = problem
+                if alternatives:
+                    text += " Available times that day: " + ", ".join(alternatives) + "."
+                text += "\n\n"
+
+        missing = self.next_slot(slots)
+        if missing:
+            self.save_state(chat_session, state)
+            return self._response(text + self._prompt_for(missing), missing, slots, alternatives=alternatives)
+
+        state['status'] = 'confirming'
+        self.save_state(chat_session, state)
+        return self._response(
+            f"Please confirm: {self.describe(slots)} for {slots['name']} ({slots['phone']}, {slots['email']}). "
+            "Shall I book it? (yes/no)",
+            'confirm', slots)
+
+    def _prompt_for(self, slot):
+        if slot == 'doctor':
+            doctors = self.doctor_index.all()
+            if doctors:
+                names = "\n".join(
+                    f"- {doctor['name']}" + (f" ({doctor['specialization']})" if doctor['specialization'] else "")
+                    for doctor in doctors.values())
+                return SLOT_PROMPTS['doctor'] + "\n\n" + names
+        return SLOT_PROMPTS[slot]
+
+    def _book(self, chat_session, slots):
+        """Create the patient and appointment for a confirmed booking."""
+        # Someone may have taken the slot while the patient was confirming
+        problem, slot, alternatives = self.check_availability(slots)
+        if problem:
+            slots[slot] = None
+            self.save_state(chat_session, {'status': 'collecting', 'slots': slots})
+            if alternatives:
+                problem += " Available times that day: " + ", ".join(alternatives) + "."
+            return self._response(problem + "\n\n" + self._prompt_for(slot), slot, slots, alternatives=alternatives)
+
+        first_name, _, last_name = slots['name'].partition(' ')
+        patient = create_unverified_patient(first_name, last_name or '-', slots['email'], slots['phone'])
+        chat_session.patient_id = patient.id
+        self.save_state(chat_session, None)
+
+        notes = 'Booked through the chat assistant'
+        if patient.email is None:
+            notes += f"; gave the email {slots['email']}, which is already on file for another patient record"
+
+        appointment = create_appointment({
+            'patient_id': patient.id,
+            'doctor_id': slots.get('doctor') or None,
+            'appointment_date': datetime.combine(date.fromisoformat(slots['date']),
+                                                 datetime.strptime(slots['time'], '%H:%M').time()),
+            'appointment_type': slots.get('appointment_type') or 'consultation',
+            'notes': notes
+        }, self.calendar_service)
+
+        return {
+            'message': f"You're booked! {self.describe(slots)}. We'll contact you at {slots['phone']} "
+                       "if anything changes.",
+            'type': 'appointment_booked',
+            'metadata': {'step': 'booked', 'appointment': appointment.to_dict(), 'mode': 'local'}
+        }
+
+    def _response(self, message, step, slots, **metadata):
+        metadata.update({'step': step, 'booking': dict(slots), 'mode': 'local'})
+        return {'message': message, 'type': 'appointment_scheduling', 'metadata': metadata}
@@ -1,25 +1,36 @@
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from flask import current_app, session, url_for
-from datetime import datetime, timedelta
+from app.utils.metrics import observe_calendar_call
+from datetime import datetime, timedelta, timezone
 import json
 import os
+import threading
+import time
 
 class CalendarService:
-    """Service for Google Calendar integration."""
+    """Service for Google Calendar integration.
+    
+    The Google client libraries take a few hundred milliseconds to import,
+    so they are imported on first use rather than when workers boot.
+    """
     
     def __init__(self):
         self.service = None
+        self.credentials = None
         self.scopes = ['https://www.googleapis.com/auth/calendar']
+        self._local = threading.local()
     
     def _get_credentials(self):
         """Get Google Calendar API credentials."""
         try:
             # Check if we have stored credentials
             if 'google_credentials' in session:
+                from google.oauth2.credentials import Credentials
+                from google.auth.transport.requests import Request
+                
                 creds_data = session['google_credentials']
+                if isinstance(creds_data, str):
+                    # Stored with Credentials.to_json()
+                    creds_data = json.loads(creds_data)
                 creds = Credentials.from_authorized_user_info(creds_data, self.scopes)
                 
                 # Refresh if expired
@@ -40,9 +51,34 @@ class CalendarService:
         if not self.service:
             creds = self._get_credentials()
             if creds:
-                self.service = build('calendar', 'v3', credentials=creds)
+                from googleapiclient.discovery import build
+                
+                self.credentials = creds
+                # A custom endpoint points the client at a Calendar-compatible server (e.g. a load-test fake)
+                api_endpoint = current_app.config.get('GOOGLE_CALENDAR_API_ENDPOINT')
+                client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+                self.service = build('calendar', 'v3', credentials=creds, client_options=client_options)
         return self.service
     
+    def _execute(self, api_request, operation):
+        """Execute a Calendar API request and record its latency."""
+        # httplib2 connections are not thread-safe, so each thread sends
+        # through its own instead of the one shared by the service object
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            
+            http = self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        started = time.perf_counter()
+        try:
+            result = api_request.execute(http=http)
+        except Exception:
+            observe_calendar_call(operation, time.perf_counter() - started, outcome='error')
+            raise
+        observe_calendar_call(operation, time.perf_counter() - started)
+        return result
+    
     def get_auth_url(self):
         """Get Google OAuth authorization URL."""
         try:
@@ -56,6 +92,8 @@ class CalendarService:
                 }
             }
             
+            from google_auth_oauthlib.flow import Flow
+            
             flow = Flow.from_client_config(
                 client_config,
                 scopes=self.scopes,
@@ -82,6 +120,8 @@ class CalendarService:
                 }
             }
             
+            from google_auth_oauthlib.flow import Flow
+            
             flow = Flow.from_client_config(
                 client_config,
                 scopes=self.scopes,
@@ -120,7 +160,7 @@ class CalendarService:
                 },
                 'attendees': [
                     {'email': patient.email},
-                ],
+                ] if patient.email else [],
                 'reminders': {
                     'useDefault': False,
                     'overrides': [
@@ -131,7 +171,7 @@ class CalendarService:
             }
             
             # Insert event
-            event = service.events().insert(calendarId='primary', body=event).execute()
+            event = self._execute(service.events().insert(calendarId='primary', body=event), 'insert')
             return event.get('id')
             
         except Exception as e:
@@ -146,7 +186,7 @@ class CalendarService:
                 return False
             
             # Get existing event
-            event = service.events().get(calendarId='primary', eventId=appointment.google_event_id).execute()
+            event = self._execute(service.events().get(calendarId='primary', eventId=appointment.google_event_id), 'get')
             
             # Update event details
             event['summary'] = f'Appointment - {patient.first_name} {patient.last_name}'
@@ -155,7 +195,7 @@ class CalendarService:
             event['end']['dateTime'] = (appointment.appointment_date + timedelta(hours=1)).isoformat()
             
             # Update event
-            service.events().update(calendarId='primary', eventId=appointment.google_event_id, body=event).execute()
+            self._execute(service.events().update(calendarId='primary', eventId=appointment.google_event_id, body=event), 'update')
             return True
             
         except Exception as e:
@@ -169,7 +209,7 @@ class CalendarService:
             if not service:
                 return False
             
-            service.events().delete(calendarId='primary', eventId=event_id).execute()
+            self._execute(service.events().delete(calendarId='primary', eventId=event_id), 'delete')
             return True
             
         except Exception as e:
@@ -189,13 +229,13 @@ class CalendarService:
             end_time = datetime.combine(date, datetime.min.time().replace(hour=17))
             
             # Get existing events for the day
-            events_result = service.events().list(
+            events_result = self._execute(service.events().list(
                 calendarId='primary',
                 timeMin=start_time.isoformat() + 'Z',
                 timeMax=end_time.isoformat() + 'Z',
                 singleEvents=True,
                 orderBy='startTime'
-            ).execute()
+            ), 'list')
             
             events = events_result.get('items', [])
             
@@ -209,8 +249,8 @@ class CalendarService:
                 # Check if this slot conflicts with any existing event
                 is_available = True
                 for event in events:
-                    event_start = datetime.fromisoformat(event['start'].get('dateTime', event['start'].get('date')).replace('Z', '+00:00'))
-                    event_end = datetime.fromisoformat(event['end'].get('dateTime', event['end'].get('date')).replace('Z', '+00:00'))
+                    event_start = self._naive_utc(event['start'].get('dateTime', event['start'].get('date')))
+                    event_end = self._naive_utc(event['end'].get('dateTime', event['end'].get('date')))
                     
                     if (current_time < event_end and slot_end > event_start):
                         is_available = False
@@ -227,6 +267,13 @@ class CalendarService:
             print(f"Error getting available slots: {e}")
             return self._get_default_slots(date)
     
+    def _naive_utc(self, value):
+        """Parse an event time as naive UTC, matching the business hours above."""
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    
     def _get_default_slots(self, date):
         """Get default available slots when calendar is not accessible."""
         # Return standard business hour slots
@@ -1,34 +1,105 @@
-import openai
-from flask import current_app
-from app.models import FAQ, Patient, Appointment, AftercareInstruction, ChatSession, ClinicSettings, Doctor, BookingSettings
+from flask import current_app, g
+from app.models import FAQ, Patient, Appointment, AftercareInstruction, ChatSession, ChatMessage, ClinicSettings, Doctor, BookingSettings
 from app.utils.language_utils import translate_text, detect_language
+from app.utils.metrics import set_chat_intent, get_chat_intent, observe_llm_call, llm_calls_coalesced_total, chat_responses_total, llm_hedges_total, chat_emergencies_total
+from app.utils.single_flight import SingleFlight, request_key
+from app.utils.deadline import DeadlineExceeded, hedged_call
+from app.services.retrieval_service import RetrievalService, knowledge_version
+from app.services.prompt_builder import PromptBuilder
+from app.services.llm_providers import provider_router
+from app.services.booking_service import BookingService
+from app.services.intake_service import IntakeService
+from app.services.aftercare_service import AftercareIndex
+from app.services.emergency_service import emergency_matcher
 import json
 import re
+import time
 from datetime import datetime, timedelta
 
+# Task instructions sent after the shared system prompt; keep them static so
+# the prompt prefix stays cacheable
+SCHEDULING_INSTRUCTIONS = """The user wants to schedule an appointment. Extract the following information if available:
+- Preferred date and time
+- Type of appointment (consultation, follow-up, etc.)
+- Reason for visit
+- Patient contact information
+
+Respond with a helpful message and indicate what additional information is needed."""
+
+GENERAL_INSTRUCTIONS = "Respond helpfully as a clinic AI assistant. Keep responses concise and professional."
+
+BOOKING_EXTRACTION_INSTRUCTIONS = """Extract appointment booking details from the patient's message.
+Reply with a single JSON object using only these keys when the message states them:
+appointment_type, doctor, date (YYYY-MM-DD), time (HH:MM, 24-hour), name, phone, email.
+Today is {today}. Only include the fields listed here: {fields}. Reply {{}} if none are stated."""
+
+
+class LLMUnavailable(Exception):
+    """Raised instead of calling the LLM while the circuit breaker sheds load."""
+    
+    def __init__(self, reason):
+        super().__init__(f'LLM unavailable: {reason}')
+        self.reason = reason
+
+# process_message() default for active_flow: look it up from the session
+FLOW_UNCHECKED = object()
+
+_NOT_LOADED = object()
+
 class ChatbotService:
-    """Service for handling chatbot interactions using OpenAI API."""
+    """Service for handling chatbot interactions using the configured LLM providers."""
     
-    def __init__(self):
-        self.client = None
-        self._system_prompt_cache = None
+    def __init__(self, calendar_service=None):
+        self.router = provider_router
+        self.retrieval_service = RetrievalService()
+        self.prompt_builder = PromptBuilder(knowledge_version.get)
+        self.single_flight = SingleFlight(on_coalesced=llm_calls_coalesced_total.inc)
+        self.booking_service = BookingService(calendar_service, self._extract_booking_fields)
+        self.intake_service = IntakeService()
+        self.aftercare_index = AftercareIndex()
+        self.emergency_matcher = emergency_matcher
     
     def _initialize_client(self):
-        """Initialize OpenAI client if not already done."""
-        if not self.client:
-            api_key = current_app.config.get('OPENAI_API_KEY')
-            if api_key:
-                openai.api_key = api_key
-                self.client = openai
+        """Configure the LLM providers and circuit breakers from the app config."""
+        self.router.configure(current_app.config)
+        for provider in self.router.providers:
+            provider.controller.configure(current_app.config)
+    
+    def active_flow(self, chat_session):
+        """``'intake'`` or ``'booking'`` when the session is in the middle of one, else None."""
+        if chat_session is None:
+            return None
+        if self.intake_service.is_active(chat_session):
+            return 'intake'
+        if self.booking_service.is_active(chat_session):
+            return 'booking'
+        return None
+    
+    def flow_after(self, response, chat_session, active_flow):
+        """The flow still active once ``response`` is sent, read from the response where possible."""
+        if response.get('type') == 'intake_form':
+            return 'intake' if response.get('metadata', {}).get('status') == 'draft' else None
+        if self.booking_service.is_active(chat_session):
+            return 'booking'
+        return 'intake' if active_flow == 'intake' else None
+    
+    def _get_clinic_settings(self):
+        """Get the clinic settings, loaded at most once per request."""
+        clinic_settings = g.get('_clinic_settings', _NOT_LOADED)
+        if clinic_settings is _NOT_LOADED:
+            clinic_settings = ClinicSettings.query.first()
+            g._clinic_settings = clinic_settings
+        return clinic_settings
+    
+    def llm_configured(self):
+        """True when an LLM provider is configured."""
+        self._initialize_client()
+        return self.router.is_configured()
     
     def _get_system_prompt(self):
         """Get the system prompt for the AI assistant with dynamic clinic information."""
-        # Use cached prompt if available
-        if self._system_prompt_cache:
-            return self._system_prompt_cache
-            
         # Get clinic settings
-        clinic_settings = ClinicSettings.query.first()
+        clinic_settings = self._get_clinic_settings()
         
         clinic_name = clinic_settings.clinic_name if clinic_settings else "Medical Clinic"
         clinic_info = ""
@@ -49,7 +120,29 @@ DEPARTMENTS/SERVICES:
 {self._format_departments(clinic_settings.departments)}
 """
         
-        prompt = f"""You are a helpful AI assistant for {clinic_name}. Your role is to:
+        return self._build_system_prompt(clinic_name, clinic_info)
+    
+    def _get_base_system_prompt(self):
+        """Get the system prompt without the clinic information sections."""
+        clinic_settings = self._get_clinic_settings()
+        clinic_name = clinic_settings.clinic_name if clinic_settings else "Medical Clinic"
+        
+        return self._build_system_prompt(clinic_name, "")
+    
+    def _get_static_prefix(self):
+        """Get the shared system prompt, byte-identical per settings version.
+        
+        With retrieval enabled the clinic details arrive as retrieved
+        knowledge, so the prefix is the base prompt; otherwise it carries
+        the full clinic information.
+        """
+        rag_enabled = current_app.config.get('RAG_ENABLED', True)
+        build = self._get_base_system_prompt if rag_enabled else self._get_system_prompt
+        return self.prompt_builder.get_static_prefix(rag_enabled, build)
+    
+    def _build_system_prompt(self, clinic_name, clinic_info):
+        """Build the system prompt text."""
+        return f"""You are a helpful AI assistant for {clinic_name}. Your role is to:
 
 1. Help patients with appointment scheduling
 2. Answer frequently asked questions about the clinic
@@ -67,7 +160,7 @@ Guidelines:
 - Be clear about what information you need and why
 - Respect patient privacy and confidentiality
 - If you cannot help with something, politely explain and suggest alternatives
-- Use the clinic information above to answer questions about hours, location, services, etc.
+- Use the clinic information provided to answer questions about hours, location, services, etc.
 
 Available actions you can perform:
 - SCHEDULE_APPOINTMENT: Help schedule appointments
@@ -77,10 +170,82 @@ Available actions you can perform:
 - GENERAL_HELP: Provide general assistance
 
 Always respond in a conversational, friendly manner while maintaining professionalism."""
+    
+    def _get_knowledge_for_message(self, message, language):
+        """Get the retrieved knowledge snippets relevant to a message."""
+        if not current_app.config.get('RAG_ENABLED', True):
+            return ""
         
-        # Cache the prompt
-        self._system_prompt_cache = prompt
-        return prompt
+        return self.retrieval_service.build_context(
+            message,
+            language,
+            self._get_knowledge_documents,
+            top_k=current_app.config.get('RAG_TOP_K', 4),
+            token_budget=current_app.config.get('RAG_TOKEN_BUDGET', 400)
+        )
+    
+    def _build_llm_messages(self, message, context, language, instructions):
+        """Build the role-structured message array for an LLM call."""
+        summary = None
+        history = []
+        for turn in context:
+            if turn.get('sender') == 'summary':
+                summary = turn.get('message')
+            else:
+                history.append(turn)
+        # The current message is already stored in the session history
+        if history and history[-1].get('sender') == 'user' and history[-1].get('message') == message:
+            history = history[:-1]
+        
+        return self.prompt_builder.build_messages(
+            self._get_static_prefix(),
+            instructions,
+            message,
+            knowledge=self._get_knowledge_for_message(message, language),
+            history=history,
+            summary=summary
+        )
+    
+    def _get_knowledge_documents(self, language):
+        """Build the retrievable knowledge snippets for a language."""
+        documents = []
+        
+        clinic_settings = self._get_clinic_settings()
+        if clinic_settings:
+            documents.append({
+                'source': 'clinic:contact',
+                'text': f"Clinic contact and location: {clinic_settings.clinic_name}. "
+                        f"Phone: {clinic_settings.phone or 'not available'}. "
+                        f"Email: {clinic_settings.email or 'not available'}. "
+                        f"Address: {self._format_address(clinic_settings)}. "
+                        f"Website: {clinic_settings.website or 'not available'}."
+            })
+            documents.append({
+                'source': 'clinic:hours',
+                'text': "Operating hours (when the clinic is open or closed):\n"
+                        f"{self._format_operating_hours(clinic_settings.operating_hours)}"
+            })
+            documents.append({
+                'source': 'clinic:departments',
+                'text': "Departments and services offered:\n"
+                        f"{self._format_departments(clinic_settings.departments)}"
+            })
+        
+        for faq in FAQ.query.filter_by(is_active=True, language=language).all():
+            documents.append({
+                'source': f'faq:{faq.id}',
+                'text': f"Q: {faq.question}\nA: {faq.answer}"
+            })
+        
+        for instruction in AftercareInstruction.query.filter_by(is_active=True, language=language).all():
+            text = f"Aftercare for {instruction.treatment_type} ({instruction.title}): {instruction.instructions}"
+            if instruction.precautions:
+                text += f" Precautions: {instruction.precautions}"
+            if instruction.emergency_signs:
+                text += f" Seek urgent care if: {instruction.emergency_signs}"
+            documents.append({'source': f'aftercare:{instruction.id}', 'text': text})
+        
+        return documents
 
     def _format_address(self, clinic_settings):
         """Format clinic address for display."""
@@ -143,28 +308,57 @@ Always respond in a conversational, friendly manner while maintaining profession
         except (json.JSONDecodeError, AttributeError):
             return "Services information not available"
 
-    def process_message(self, message, session_id, language='en'):
-        """Process a user message and return an appropriate response."""
+    def process_message(self, message, session_id, language='en', chat_session=None, deadline=None,
+                        active_flow=FLOW_UNCHECKED):
+        """Process a user message and return an appropriate response.
+        
+        Callers that already loaded the ChatSession can pass it in to avoid
+        looking it up again, and likewise its ``active_flow()``. ``deadline``
+        (a ``Deadline``) limits how long LLM calls may take; handlers fall
+        back to local answers when it runs out.
+        """
         try:
+            # Red-flag symptoms skip every other handler, including bookings in progress
+            response = self._handle_emergency(message, language, chat_session)
+            if response is not None:
+                chat_responses_total.inc(mode='emergency')
+                return response
+            
             self._initialize_client()
             
             # Detect intent from the message
             intent = self._detect_intent(message)
+            set_chat_intent(intent)
             
             # Get conversation context
-            context = self._get_conversation_context(session_id)
+            context = self._get_conversation_context(session_id, chat_session)
             
-            # Process based on intent
-            if intent == 'appointment_scheduling':
-                return self._handle_appointment_scheduling(message, context, language)
+            # Process based on intent; an intake form or booking in progress
+            # keeps the conversation
+            if active_flow is FLOW_UNCHECKED:
+                active_flow = self.active_flow(chat_session)
+            if active_flow == 'intake':
+                response = self.intake_service.handle(message, chat_session)
+            elif chat_session is not None and current_app.config.get('CHAT_BOOKING_ENABLED', True) \
+                    and self.booking_service.wants(message, intent, chat_session):
+                response = self.booking_service.handle(message, chat_session, deadline)
+            elif chat_session is not None and intent == 'intake_form':
+                response = self.intake_service.handle(message, chat_session)
+            elif intent == 'appointment_scheduling':
+                response = self._handle_appointment_scheduling(message, context, language, deadline)
             elif intent == 'faq':
-                return self._handle_faq(message, language)
+                response = self._handle_faq(message, language)
             elif intent == 'intake_form':
-                return self._handle_intake_form(message, context, language)
+                response = self._handle_intake_form(message, context, language)
             elif intent == 'aftercare':
-                return self._handle_aftercare(message, language)
+                response = self._handle_aftercare(message, language)
             else:
-                return self._handle_general_conversation(message, context, language)
+                response = self._handle_general_conversation(message, context, language, deadline)
+            
+            # Handlers that used the LLM (or gave up on it) set the mode already
+            mode = response.setdefault('metadata', {}).setdefault('mode', 'local')
+            chat_responses_total.inc(mode=mode)
+            return response
                 
         except Exception as e:
             return {
@@ -173,6 +367,52 @@ Always respond in a conversational, friendly manner while maintaining profession
                 'metadata': {'error': str(e)}
             }
     
+    def get_deterministic_response(self, message, language='en'):
+        """Get the response for a message when it needs no LLM call or history.
+        
+        Returns the response with its ``intent`` added, or None when the
+        answer would come from the LLM. Used to precompute fast-path answers.
+        """
+        if current_app.config.get('EMERGENCY_DETECTION_ENABLED', True) and self.emergency_matcher.match(message):
+            # Emergencies also flag the session, so they are never precomputed
+            return None
+        
+        intent = self._detect_intent(message)
+        llm_configured = self.llm_configured()
+        
+        if intent == 'faq':
+            response = self._handle_faq(message, language)
+        elif intent == 'aftercare':
+            response = self._handle_aftercare(message, language)
+        elif llm_configured or intent in ('appointment_scheduling', 'intake_form'):
+            # Scheduling and intake continue per-session state
+            return None
+        else:
+            response = self._handle_general_conversation_fallback(message, [], language)
+        
+        response['intent'] = intent
+        return response
+    
+    def _handle_emergency(self, message, language, chat_session=None):
+        """Return the urgent-care response if the message has red-flag symptoms, else None."""
+        if not current_app.config.get('EMERGENCY_DETECTION_ENABLED', True):
+            return None
+        
+        matches = self.emergency_matcher.match(message)
+        if not matches:
+            return None
+        
+        set_chat_intent('emergency')
+        response = self.emergency_matcher.response(matches, language, current_app.config.get('EMERGENCY_NUMBER', '911'))
+        for category in response['metadata']['categories']:
+            chat_emergencies_total.inc(category=category)
+        
+        # Flag the conversation for staff; saved with the chat messages
+        if chat_session is not None:
+            chat_session.flagged_reason = ('emergency: ' + ', '.join(response['metadata']['categories']))[:200]
+            chat_session.flagged_at = datetime.utcnow()
+        return response
+    
     def _detect_intent(self, message):
         """Detect the intent of the user message."""
         message_lower = message.lower()
@@ -188,7 +428,7 @@ Always respond in a conversational, friendly manner while maintaining profession
             return 'faq'
         
         # Intake form keywords
-        intake_keywords = ['symptoms', 'pain', 'medical history', 'allergies', 'medications', 'complaint']
+        intake_keywords = ['intake', 'symptoms', 'pain', 'medical history', 'allergies', 'medications', 'complaint']
         if any(keyword in message_lower for keyword in intake_keywords):
             return 'intake_form'
         
@@ -199,58 +439,207 @@ Always respond in a conversational, friendly manner while maintaining profession
         
         return 'general'
     
-    def _get_conversation_context(self, session_id):
-        """Get conversation context from the database."""
-        session = ChatSession.query.filter_by(session_id=session_id).first()
-        if session and session.messages:
-            # Get last few messages for context
-            recent_messages = session.messages[-5:]  # Last 5 messages
-            return [{'sender': msg.sender, 'message': msg.message} for msg in recent_messages]
-        return []
+    def _get_conversation_context(self, session_id, chat_session=None):
+        """Get conversation context from the database.
+        
+        Older turns are represented by the session's rolling summary (as a
+        leading ``summary`` entry), so only the last few raw messages after
+        it are loaded.
+        """
+        session = chat_session or ChatSession.query.filter_by(session_id=session_id).first()
+        if not session:
+            return []
+        
+        # Last few messages plus the current one, without loading the whole history
+        limit = current_app.config.get('CHAT_RECENT_MESSAGES', 4) + 1
+        query = ChatMessage.query.filter_by(session_id=session.id)
+        if session.summary_message_id:
+            query = query.filter(ChatMessage.id > session.summary_message_id)
+        recent_messages = query.order_by(ChatMessage.id.desc()).limit(limit).all()
+        
+        context = []
+        if session.summary:
+            context.append({'sender': 'summary', 'message': session.summary})
+        context.extend({'sender': msg.sender, 'message': msg.message} for msg in reversed(recent_messages))
+        return context
     
-    def _handle_appointment_scheduling(self, message, context, language):
-        """Handle appointment scheduling requests."""
-        # Check if we have OpenAI API key
-        if not current_app.config.get('OPENAI_API_KEY'):
-            return self._handle_appointment_scheduling_fallback(message, context, language)
+    def complete_text(self, messages, max_tokens):
+        """Run a plain completion for background tasks; None without a provider."""
+        if not self.llm_configured():
+            return None
+        
+        return self._complete('summary', messages, max_tokens=max_tokens, temperature=0.2).text
+    
+    def _extract_booking_fields(self, message, fields, deadline=None):
+        """Ask the LLM for booking details the parsers could not find; None without a provider."""
+        if not self.llm_configured():
+            return None
         
+        messages = [
+            {'role': 'system', 'content': BOOKING_EXTRACTION_INSTRUCTIONS.format(
+                today=datetime.now().strftime('%A %Y-%m-%d'), fields=', '.join(fields))},
+            {'role': 'user', 'content': message}
+        ]
+        result = self._complete('booking_extraction', messages, deadline=deadline, max_tokens=120, temperature=0)
+        match = re.search(r'\{.*\}', result.text or '', re.DOTALL)
+        if not match:
+            return None
         try:
-            # Use OpenAI to understand the appointment request
-            prompt = f"""
-            System: {self._get_system_prompt()}
-            
-            User message: {message}
-            Context: {json.dumps(context)}
+            extracted = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+        return extracted if isinstance(extracted, dict) else None
+    
+    def _complete(self, intent, messages, deadline=None, max_tokens=200, temperature=0.7):
+        """Get an LLMResult from the best available provider within the request deadline.
+        
+        The model tier comes from the intent (LLM_INTENT_TIERS). The call
+        gets the time left on ``deadline`` (minus a reserve for saving the
+        response), capped at LLM_TIMEOUT_SECONDS. Concurrent requests with
+        the same tier, messages and parameters (for example many patients
+        pressing the same quick-action button) wait on a single upstream call
+        and share its result.
+        """
+        if not self.router.is_configured():
+            raise RuntimeError('No LLM provider is configured')
+        
+        config = current_app.config
+        cap = config.get('LLM_TIMEOUT_SECONDS', 15)
+        if deadline is not None:
+            timeout = deadline.budget(
+                reserve=config.get('LLM_DEADLINE_RESERVE_MS', 300) / 1000.0,
+                cap=cap,
+                minimum=config.get('LLM_MIN_CALL_MS', 250) / 1000.0
+            )
+        else:
+            timeout = cap
+        
+        tier = self.router.tier_for(intent)
+        call = lambda: self._call_routed(tier, messages, timeout, max_tokens, temperature)
+        if not config.get('LLM_SINGLE_FLIGHT', True):
+            return call()
+        
+        result, _ = self.single_flight.do(
+            request_key(tier, messages=messages, max_tokens=max_tokens, temperature=temperature),
+            call,
+            timeout=timeout
+        )
+        return result
+    
+    def _call_routed(self, tier, messages, timeout, max_tokens, temperature):
+        """Try providers in router order until one answers or time runs out."""
+        started = time.monotonic()
+        minimum = current_app.config.get('LLM_MIN_CALL_MS', 250) / 1000.0
+        degrade_enabled = current_app.config.get('LLM_DEGRADE_ENABLED', True)
+        error = None
+        
+        for provider in self.router.candidates():
+            remaining = timeout - (time.monotonic() - started)
+            if remaining < minimum:
+                error = error or DeadlineExceeded('not enough time left for another provider')
+                break
             
-            The user wants to schedule an appointment. Extract the following information if available:
-            - Preferred date and time
-            - Type of appointment (consultation, follow-up, etc.)
-            - Reason for visit
-            - Patient contact information
+            model = provider.model_for(tier)
+            if not degrade_enabled:
+                try:
+                    return self._call_hedged(provider, model, messages, remaining, max_tokens, temperature)
+                except Exception as e:
+                    error = e
+                    continue
             
-            Respond with a helpful message and indicate what additional information is needed.
-            """
+            allowed, reason = provider.controller.allow()
+            if not allowed:
+                error = error or LLMUnavailable(reason)
+                continue
+            try:
+                with provider.controller.track():
+                    return self._call_hedged(provider, model, messages, remaining, max_tokens, temperature)
+            except Exception as e:
+                error = e
+        
+        raise error or LLMUnavailable('no_provider')
+    
+    def _hedge_delay(self, provider, timeout):
+        """Seconds to wait before hedging, or None when hedging is off."""
+        config = current_app.config
+        if not config.get('LLM_HEDGE_ENABLED', False) or provider.fallback_only:
+            return None
+        
+        p95 = provider.controller.latency_percentile(0.95, config.get('LLM_BREAKER_MIN_SAMPLES', 10))
+        if p95 is None:
+            return None
+        delay = max(p95, config.get('LLM_HEDGE_MIN_DELAY_MS', 200) / 1000.0)
+        return delay if delay < timeout else None
+    
+    def _call_hedged(self, provider, model, messages, timeout, max_tokens, temperature):
+        """Make the call, racing a second attempt if the first outlasts the p95 latency."""
+        hedge_delay = self._hedge_delay(provider, timeout)
+        if hedge_delay is None:
+            return self._call_provider(provider, model, messages, timeout, max_tokens, temperature)
+        
+        intent = get_chat_intent()
+        result, attempt = hedged_call(
+            lambda attempt: self._call_provider(provider, model, messages, timeout, max_tokens, temperature, intent),
+            hedge_delay,
+            timeout,
+            on_hedge=lambda: llm_hedges_total.inc(outcome='sent')
+        )
+        if attempt:
+            llm_hedges_total.inc(outcome='won')
+        return result
+    
+    def _call_provider(self, provider, model, messages, timeout, max_tokens, temperature, intent=None):
+        """Make one provider call and record latency and token usage."""
+        started = time.perf_counter()
+        try:
+            result = provider.complete(messages, model, max_tokens, temperature, timeout)
+        except Exception:
+            observe_llm_call(model, time.perf_counter() - started, outcome='error', intent=intent, provider=provider.name)
+            raise
+        observe_llm_call(model, time.perf_counter() - started, usage=result.usage, intent=intent, provider=provider.name)
+        return result
+    
+    def _llm_metadata(self, result, **metadata):
+        """Response metadata for an answer produced by an LLM provider."""
+        metadata['mode'] = 'local' if result.provider == 'local' else 'llm'
+        metadata['provider'] = result.provider
+        metadata['model'] = result.model
+        return metadata
+    
+    def _handle_appointment_scheduling(self, message, context, language, deadline=None):
+        """Handle appointment scheduling requests."""
+        if not self.llm_configured():
+            return self._handle_appointment_scheduling_fallback(message, context, language)
+        
+        try:
+            # Use the LLM to understand the appointment request
+            messages = self._build_llm_messages(message, context, language, SCHEDULING_INSTRUCTIONS)
             
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            result = self._complete(
+                'appointment_scheduling',
+                messages,
+                deadline=deadline,
                 max_tokens=300,
                 temperature=0.7
             )
             
-            ai_response = response.choices[0].message.content
-            
             return {
-                'message': ai_response,
+                'message': result.text,
                 'type': 'appointment_scheduling',
-                'metadata': {'needs_followup': True}
+                'metadata': self._llm_metadata(result, needs_followup=True)
             }
             
         except Exception as e:
-            return self._handle_appointment_scheduling_fallback(message, context, language)
+            return self._degraded(self._handle_appointment_scheduling_fallback(message, context, language), e)
+    
+    def _degraded(self, response, error):
+        """Tag a fallback response that replaced a failed or shed LLM call."""
+        response['metadata']['mode'] = 'degraded'
+        response['metadata']['degraded_reason'] = getattr(error, 'reason', 'llm_error')
+        return response
     
     def _handle_appointment_scheduling_fallback(self, message, context, language):
-        """Fallback appointment scheduling without OpenAI."""
+        """Fallback appointment scheduling without an LLM."""
         # Get available doctors and booking settings
         doctors = Doctor.query.filter_by(is_active=True).all()
         booking_settings = BookingSettings.query.first()
@@ -299,7 +688,7 @@ Always respond in a conversational, friendly manner while maintaining profession
             }
         else:
             # If no FAQ matches, provide general clinic information
-            clinic_settings = ClinicSettings.query.first()
+            clinic_settings = self._get_clinic_settings()
             clinic_info_msg = "I don't have specific information about that topic, but here's some general information about our clinic:\n\n"
             
             if clinic_settings:
@@ -336,15 +725,24 @@ Always respond in a conversational, friendly manner while maintaining profession
     
     def _handle_aftercare(self, message, language):
         """Handle aftercare instruction requests."""
-        # Search for relevant aftercare instructions
-        instructions = AftercareInstruction.query.filter_by(is_active=True, language=language).all()
+        # Answer with the instruction the patient named, if any
+        catalog = self.aftercare_index.get_catalog(language)
+        instruction = self.aftercare_index.best_match(message, language)
+        if instruction:
+            return {
+                'message': self._format_aftercare(instruction),
+                'type': 'aftercare',
+                'metadata': {'aftercare_id': instruction['id'], 'treatment_type': instruction['treatment_type']}
+            }
         
-        if instructions:
-            # Return general aftercare information
+        if catalog.entries:
+            # Ask which treatment, listing the ones we have instructions for
+            treatment_types = catalog.treatment_types()
+            examples = "\n".join(f"• {treatment_type}" for treatment_type in treatment_types[:8])
             return {
-                'message': "I can provide aftercare instructions for various treatments. What type of treatment or procedure did you have? For example:\n\n• General consultation\n• Minor procedure\n• Vaccination\n• Physical therapy\n\nPlease specify so I can provide the most relevant aftercare guidance.",
+                'message': f"I can provide aftercare instructions for various treatments. What type of treatment or procedure did you have? For example:\n\n{examples}\n\nPlease specify so I can provide the most relevant aftercare guidance.",
                 'type': 'aftercare',
-                'metadata': {'available_types': [inst.treatment_type for inst in instructions]}
+                'metadata': {'available_types': treatment_types}
             }
         else:
             return {
@@ -353,52 +751,51 @@ Always respond in a conversational, friendly manner while maintaining profession
                 'metadata': {}
             }
     
-    def _handle_general_conversation(self, message, context, language):
+    def _format_aftercare(self, instruction):
+        """Format an aftercare instruction (a to_dict() snapshot) for the chat."""
+        parts = [f"**{instruction['title']}**", instruction['instructions']]
+        if instruction.get('precautions'):
+            parts.append(f"**Precautions:** {instruction['precautions']}")
+        if instruction.get('follow_up_timeline'):
+            parts.append(f"**Follow-up:** {instruction['follow_up_timeline']}")
+        if instruction.get('emergency_signs'):
+            parts.append(f"**Seek urgent care if:** {instruction['emergency_signs']}")
+        return "\n\n".join(parts)
+    
+    def _handle_general_conversation(self, message, context, language, deadline=None):
         """Handle general conversation."""
-        # Check if we have OpenAI API key for more sophisticated responses
-        if not current_app.config.get('OPENAI_API_KEY'):
+        # Use an LLM provider for more sophisticated responses when configured
+        if not self.llm_configured():
             return self._handle_general_conversation_fallback(message, context, language)
         
         try:
-            # Use OpenAI for general conversation
-            context_str = "\n".join([f"{msg['sender']}: {msg['message']}" for msg in context[-3:]])
-            
-            prompt = f"""
-            System: {self._get_system_prompt()}
-            
-            Previous conversation:
-            {context_str}
+            # Use the LLM for general conversation
+            messages = self._build_llm_messages(message, context, language, GENERAL_INSTRUCTIONS)
             
-            User: {message}
-            
-            Respond helpfully as a clinic AI assistant. Keep responses concise and professional.
-            """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            result = self._complete(
+                'general',
+                messages,
+                deadline=deadline,
                 max_tokens=200,
                 temperature=0.7
             )
             
-            ai_response = response.choices[0].message.content
-            
             return {
-                'message': ai_response,
+                'message': result.text,
                 'type': 'general',
-                'metadata': {}
+                'metadata': self._llm_metadata(result)
             }
             
         except Exception as e:
-            return self._handle_general_conversation_fallback(message, context, language)
+            return self._degraded(self._handle_general_conversation_fallback(message, context, language), e)
     
     def _handle_general_conversation_fallback(self, message, context, language):
-        """Fallback general conversation without OpenAI."""
+        """Fallback general conversation without an LLM."""
         greetings = ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening']
         message_lower = message.lower()
         
         # Get clinic name for personalized greeting
-        clinic_settings = ClinicSettings.query.first()
+        clinic_settings = self._get_clinic_settings()
         clinic_name = clinic_settings.clinic_name if clinic_settings else "our clinic"
         
         if any(greeting in message_lower for greeting in greetings):
@@ -0,0 +1,236 @@
+"""Red-flag symptom detection that runs before any other chat handling.
+
+A curated phrase list (English, Spanish, French) is compiled once into an
+Aho-Corasick automaton, so checking a message is a single pass over its
+characters. A match is ignored when a negation modifies the phrase itself
+("no chest pain", "I don't have chest pain") or an informational cue sits
+directly before it ("signs of a stroke"). A negation elsewhere in the
+clause ("I do not know why I cannot breathe") or a question earlier in
+the message ("what is wrong with me, I have chest pain") does not count.
+"""
+
+import re
+import unicodedata
+
+from app.utils.aho_corasick import AhoCorasick
+
+# category -> phrases; written lowercase without accents (messages are normalized the same way)
+RED_FLAGS = {
+    'cardiac': [
+        'chest pain', 'pain in my chest', 'chest tightness', 'tight chest', 'crushing chest', 'chest pressure',
+        'heart attack', 'pain in my left arm',
+        'dolor en el pecho', 'dolor de pecho', 'ataque al corazon', 'infarto', 'opresion en el pecho',
+        'douleur thoracique', 'douleur a la poitrine', 'crise cardiaque', 'infarctus', 'oppression thoracique',
+    ],
+    'breathing': [
+        "can't breathe", 'cant breathe', 'cannot breathe', 'can not breathe', 'unable to breathe',
+        'difficulty breathing', 'trouble breathing', 'struggling to breathe', 'hard to breathe',
+        'short of breath', 'shortness of breath', 'not breathing', 'stopped breathing', 'choking', 'gasping for air',
+        'no puedo respirar', 'dificultad para respirar', 'falta de aire', 'me ahogo', 'no respira',
+        'je ne peux pas respirer', 'je n arrive pas a respirer', 'difficulte a respirer', 'essouffle',
+        "j'etouffe", 'ne respire plus',
+    ],
+    'bleeding': [
+        'severe bleeding', 'heavy bleeding', 'bleeding heavily', 'bleeding a lot', "won't stop bleeding",
+        "can't stop the bleeding", 'bleeding that will not stop', 'coughing up blood', 'vomiting blood',
+        'throwing up blood',
+        'sangrado abundante', 'sangra mucho', 'no para de sangrar', 'vomitando sangre', 'tosiendo sangre',
+        'saignement abondant', 'saigne beaucoup', 'vomit du sang', 'crache du sang',
+    ],
+    'neurological': [
+        'stroke', 'face drooping', 'face is drooping', 'slurred speech', 'numbness on one side',
+        'sudden weakness', 'worst headache', 'seizure', 'convulsion', 'convulsions',
+        'derrame cerebral', 'ictus', 'convulsion', 'convulsiones', 'no puedo hablar',
+        'avc', 'crise d epilepsie', "crise d'epilepsie", 'convulsions', 'paralysie',
+    ],
+    'consciousness': [
+        'unconscious', 'passed out', 'fainted', 'unresponsive', "won't wake up", 'not waking up',
+        'inconsciente', 'me desmaye', 'se desmayo', 'no despierta',
+        'inconscient', 'evanoui', 'evanouie', 'ne se reveille pas',
+    ],
+    'mental_health': [
+        'suicidal', 'suicide', 'kill myself', 'end my life', 'want to die', 'hurt myself', 'self harm',
+        'quiero morir', 'suicidarme', 'suicidio', 'quitarme la vida', 'hacerme dano',
+        'me suicider', 'envie de mourir', 'veux mourir', 'me faire du mal',
+    ],
+    'poisoning': [
+        'overdose', 'overdosed', 'took too many pills', 'poisoned', 'poisoning', 'swallowed bleach',
+        'sobredosis', 'envenenamiento', 'me envenene',
+        'surdose', 'empoisonnement', 'empoisonne',
+    ],
+    'allergy': [
+        'anaphylaxis', 'anaphylactic', 'throat is closing', 'throat closing', 'throat swelling',
+        'tongue swelling', 'lips swelling', 'severe allergic reaction',
+        'reaccion alergica grave', 'se me cierra la garganta', 'garganta hinchada',
+        'reaction allergique grave', 'gorge qui gonfle', 'choc anaphylactique',
+    ],
+    'trauma': [
+        'head injury', 'hit my head', 'bone sticking out', 'severe burn', 'badly burned', 'car accident',
+        'gunshot', 'stab wound', 'stabbed',
+        'golpe en la cabeza', 'quemadura grave', 'accidente de coche', 'herida de bala',
+        'traumatisme cranien', 'brulure grave', 'accident de voiture', 'blessure par balle',
+    ],
+}
+
+# Words that negate a following symptom within the same clause
+NEGATION_WORDS = {
+    'no', 'not', 'never', 'without', 'none', 'nor', 'denies', 'deny', 'denied',
+    "don't", 'dont', "doesn't", 'doesnt', "didn't", 'didnt', "isn't", 'isnt', "wasn't", 'wasnt',
+    "haven't", 'havent', "hasn't", 'hasnt', "aren't",
+    'sin', 'nunca', 'ni', 'tampoco', 'ningun', 'ninguna',
+    'pas', 'sans', 'jamais', 'aucun', 'aucune',
+}
+
+# Words that may stand between a negation and the phrase it negates
+# ("don't have any chest pain", "no tengo dolor", "pas de douleur")
+NEGATION_BRIDGES = {
+    'have', 'has', 'had', 'having', 'feel', 'feeling', 'felt', 'get', 'getting', 'experience',
+    'experiencing', 'notice', 'noticed', 'suffer', 'suffering', 'from', 'been', 'really', 'currently',
+    'any', 'a', 'an', 'the', 'my', 'his', 'her', 'their', 'some',
+    'tengo', 'tiene', 'tenia', 'siento', 'he', 'ha', 'tenido', 'un', 'una', 'el', 'la', 'de', 'del',
+    'ai', 'a', 'eu', 'ressens', 'plus', 'de', 'd', 'un', 'une', 'le', 'les', 'du',
+}
+
+# Joins a negated phrase to the next one: "no chest pain or shortness of breath"
+COORDINATORS = {'or', 'nor', 'and', 'o', 'ni', 'y', 'ou', 'et'}
+
+# Phrases that make a symptom a question or history rather than happening now,
+# when they come directly before it (articles aside)
+INFORMATIONAL_CUES = (
+    'signs of', 'symptoms of', 'risk of', 'history of', 'prevent', 'information about', 'what is',
+    'what are', 'learn about', 'tell me about',
+    'sintomas de', 'riesgo de', 'historial de',
+    'signes d', 'symptomes d', 'risque d', 'antecedents d', "qu'est-ce",
+)
+
+# Articles allowed between an informational cue and the phrase ("signs of a stroke")
+CUE_FILLERS = {'a', 'an', 'the', 'un', 'una', 'el', 'la', 'los', 'las', 'une', 'le', 'les', 'l', 'd', 'du',
+               'des', 'qu', 'que'}
+
+# Words that start a new clause, ending the reach of a negation
+CLAUSE_BREAKS = {'but', 'however', 'although', 'though', 'pero', 'aunque', 'mais', 'pourtant'}
+
+CLAUSE_PUNCTUATION = re.compile(r'[.,;:!?\n]')
+NEGATION_WINDOW = 4  # bridge words allowed between a negation and the phrase
+
+EMERGENCY_MESSAGES = {
+    'en': ("⚠️ This may be a medical emergency. Please call {number} or go to the nearest emergency room now. "
+           "Do not wait for a reply from this chat.\n\nOur staff have been notified of this conversation."),
+    'es': ("⚠️ Esto puede ser una emergencia médica. Llame al {number} o acuda a la sala de emergencias más "
+           "cercana ahora. No espere una respuesta de este chat.\n\nNuestro personal ha sido notificado."),
+    'fr': ("⚠️ Il peut s'agir d'une urgence médicale. Appelez le {number} ou rendez-vous immédiatement aux "
+           "urgences les plus proches. N'attendez pas de réponse de ce chat.\n\nNotre personnel a été prévenu."),
+}
+
+_APOSTROPHES = str.maketrans({'’': "'", '‘': "'", '`': "'"})
+
+
+def normalize_text(text):
+    """Lowercase, strip accents and unify apostrophes."""
+    text = text.lower().translate(_APOSTROPHES)
+    if text.isascii():
+        return text
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "'"
+
+
+def _cue_words(text):
+    """Words for cue matching, with elisions split off ("d'un" -> "d un")."""
+    return text.replace("'", ' ').split()
+
+
+_CUE_WORDS = [_cue_words(cue) for cue in INFORMATIONAL_CUES]
+
+
+class EmergencyMatcher:
+    """Compiled red-flag phrase matcher with negation handling."""
+
+    def __init__(self, red_flags=None):
+        phrases = []
+        for category, category_phrases in (red_flags or RED_FLAGS).items():
+            for phrase in set(category_phrases):
+                phrases.append((normalize_text(phrase), (category, phrase)))
+        self.automaton = AhoCorasick(phrases)
+
+    def match(self, message):
+        """Return ``[(category, phrase), ...]`` for red flags present and not negated."""
+        text = normalize_text(message)
+        matches = []
+        negated_end = None  # end of the last negated phrase, for "no X or Y"
+        for start, end, value in self.automaton.finditer(text):
+            # Whole words only: "stroke" must not match "strokes of luck" partially or "heartstroke"
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < len(text) and text[end].isalpha():
+                continue
+            if self._negated(text, start, negated_end):
+                negated_end = end
+                continue
+            if value not in matches:
+                matches.append(value)
+        return matches
+
+    def _negated(self, text, start, negated_end=None):
+        """True when the phrase at ``start`` is negated or only asked about."""
+        words = CLAUSE_PUNCTUATION.split(text[max(0, start - 80):start])[-1].split()
+        for index in range(len(words) - 1, -1, -1):
+            if words[index] in CLAUSE_BREAKS:
+                words = words[index + 1:]
+                break
+        return (self._informational(words) or self._negation_modifies(words)
+                or self._joined_to_negated(text, start, negated_end))
+
+    @staticmethod
+    def _informational(words):
+        """An informational cue directly before the phrase, articles aside."""
+        cue_words = _cue_words(' '.join(words))
+        while cue_words:
+            if any(cue_words[-len(cue):] == cue for cue in _CUE_WORDS if len(cue) <= len(cue_words)):
+                return True
+            if cue_words[-1] not in CUE_FILLERS:
+                return False
+            cue_words.pop()
+        return False
+
+    @staticmethod
+    def _negation_modifies(words):
+        """A negation followed only by bridge words ("don't have any") up to the phrase."""
+        for word in reversed(words[-(NEGATION_WINDOW + 1):]):
+            if word in NEGATION_WORDS:
+                return True
+            if word not in NEGATION_BRIDGES:
+                return False
+        return False
+
+    @staticmethod
+    def _joined_to_negated(text, start, negated_end):
+        """Coordinated with a phrase just negated: "no chest pain or shortness of breath"."""
+        if negated_end is None or negated_end > start:
+            return False
+        between = text[negated_end:start]
+        if CLAUSE_PUNCTUATION.search(between):
+            return False
+        words = between.split()
+        return bool(words) and words[0] in COORDINATORS and all(
+            word in COORDINATORS or word in NEGATION_BRIDGES for word in words)
+
+    def response(self, matches, language='en', number='911'):
+        """The fixed urgent-care reply for a message with red flags."""
+        template = EMERGENCY_MESSAGES.get(language, EMERGENCY_MESSAGES['en'])
+        return {
+            'message': template.format(number=number),
+            'type': 'emergency',
+            'metadata': {
+                'categories': sorted({category for category, _ in matches}),
+                'matched': [phrase for _, phrase in matches],
+                'mode': 'emergency',
+            }
+        }
+
+
+# Shared matcher; compiled once per process
+emergency_matcher = EmergencyMatcher()
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models import ChatMessage, ChatSession
+from app.services.booking_service import scheduling_version
+from app.services.retrieval_service import knowledge_version
+from app.utils.metrics import set_chat_intent, fast_path_requests_total, chat_responses_total
+from app.utils.versioned_cache import VersionedCache, VersionStamp
+import copy
+import re
+
+# Fixed messages sent by the quick-action buttons in templates/index.html
+QUICK_ACTION_MESSAGES = [
+    'I want to schedule an appointment',
+    'What are your clinic hours?',
+    'What insurance do you accept?',
+    'I need aftercare instructions',
+]
+
+# Languages offered by the chat page language selector
+PAGE_LANGUAGES = ('en', 'es', 'fr')
+
+NON_WORD_PATTERN = re.compile(r'[^\w\s]', re.UNICODE)
+
+
+def normalize_message(message):
+    """Normalize a chat message for lookup: lowercase, no punctuation, single spaces."""
+    return ' '.join(NON_WORD_PATTERN.sub(' ', message.lower()).split())
+
+
+class FastPathService:
+    """In-memory answers for the quick-action buttons and the most frequent messages.
+
+    Only messages whose answer comes from a deterministic handler (no LLM
+    call, no dependence on conversation history) are precomputed, so a hit
+    returns exactly what the chatbot would have answered. Tables are built
+    per language and rebuilt when clinic settings, FAQs, aftercare, doctors
+    or booking settings change.
+    """
+
+    def __init__(self, chatbot_service):
+        self.chatbot_service = chatbot_service
+        # Answers differ with and without an LLM (e.g. the scheduling handler)
+        self._llm_configured = VersionStamp(self.chatbot_service.llm_configured)
+        self._tables = VersionedCache(self._version)  # language -> {normalized message: response}
+
+    def _version(self):
+        return knowledge_version.get(), scheduling_version.get(), self._llm_configured.get()
+
+    def invalidate(self):
+        """Force the tables to be rebuilt on next use."""
+        self._tables.invalidate()
+
+    def get_table(self, language):
+        """Get the answer table for a language, building it if needed."""
+        return self._tables.get(language, lambda: self._build_table(language))
+
+    def _top_messages(self, language, limit, window_days):
+        """Most frequent recent user messages in a language."""
+        since = datetime.utcnow() - timedelta(days=window_days)
+        text = func.lower(func.trim(ChatMessage.message))
+        rows = db.session.query(text, func.count(ChatMessage.id)) \
+            .join(ChatSession, ChatMessage.session_id == ChatSession.id) \
+            .filter(ChatMessage.sender == 'user',
+                    ChatSession.language == language,
+                    ChatMessage.timestamp >= since,
+                    func.length(ChatMessage.message) <= 200) \
+            .group_by(text) \
+            .order_by(func.count(ChatMessage.id).desc()) \
+            .limit(limit * 2).all()
+
+        # Merge variants that only differ in punctuation or spacing
+        counts = {}
+        originals = {}
+        for message, count in rows:
+            key = normalize_message(message)
+            if key:
+                counts[key] = counts.get(key, 0) + count
+                originals.setdefault(key, message)
+        ranked = sorted(counts, key=lambda key: -counts[key])[:limit]
+        return [originals[key] for key in ranked]
+
+    def _build_table(self, language):
+        """Precompute answers for the quick actions and top messages in a language."""
+        top_n = current_app.config.get('FAST_PATH_TOP_N', 20)
+        window_days = current_app.config.get('FAST_PATH_WINDOW_DAYS', 30)
+
+        candidates = list(QUICK_ACTION_MESSAGES)
+        if top_n:
+            candidates += self._top_messages(language, top_n, window_days)
+
+        table = {}
+        for message in candidates:
+            key = normalize_message(message)
+            if not key or key in table:
+                continue
+            try:
+                response = self.chatbot_service.get_deterministic_response(message, language)
+            except Exception as e:
+                print(f"Error precomputing fast-path answer: {e}")
+                continue
+            if response is not None:
+                table[key] = response
+        return table
+
+    def lookup(self, message, language='en'):
+        """Get the precomputed response for a message, or None."""
+        if not current_app.config.get('FAST_PATH_ENABLED', True):
+            return None
+
+        response = self.get_table(language).get(normalize_message(message))
+        if response is None:
+            fast_path_requests_total.inc(outcome='miss')
+            return None
+
+        fast_path_requests_total.inc(outcome='hit')
+        set_chat_intent(response['intent'])
+        response = copy.deepcopy(response)
+        response.pop('intent', None)
+        response['metadata']['fast_path'] = True
+        response['metadata']['mode'] = 'fast_path'
+        chat_responses_total.inc(mode='fast_path')
+        return response
+
+    def get_quick_action_answers(self, languages=PAGE_LANGUAGES):
+        """Quick-action answers per language, for embedding in the chat page."""
+        if not current_app.config.get('FAST_PATH_ENABLED', True):
+            return {}
+
+        answers = {}
+        for language in languages:
+            table = self.get_table(language)
+            answers[language] = {
+                key: {'message': table[key]['message'], 'type': table[key]['type'], 'metadata': table[key]['metadata']}
+                for key in (normalize_message(message) for message in QUICK_ACTION_MESSAGES)
+                if key in table
+            }
+        return answers
@@ -0,0 +1,173 @@
+from app import db
+from app.models import IntakeForm
+from datetime import datetime
+import re
+
+# IntakeForm fields collected in the chat, in the order they are asked
+INTAKE_FIELDS = ('chief_complaint', 'symptoms', 'symptom_duration', 'pain_level', 'previous_treatments')
+
+FIELD_PROMPTS = {
+    'chief_complaint': "What is the main reason for your visit?",
+    'symptoms': "What symptoms are you having? (say \"none\" if there are none)",
+    'symptom_duration': "How long have you had these symptoms? (for example \"3 days\" or \"2 weeks\")",
+    'pain_level': "On a scale of 0 to 10, how much pain are you in? (0 means no pain)",
+    'previous_treatments': "Have you tried any treatments or medications for this? (say \"none\" if not)",
+}
+
+# Free-text fields a patient may skip
+OPTIONAL_FIELDS = ('symptoms', 'previous_treatments')
+
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'zero': 0, 'couple': 2, 'few': 3, 'several': 4,
+}
+
+DURATION_PATTERN = re.compile(
+    r'\b(\d+|' + '|'.join(NUMBER_WORDS) + r')\s+(?:of\s+)?(hour|day|week|month|year)s?\b')
+SINCE_PATTERN = re.compile(r'\b(since .+|yesterday|today|this morning|last night|last week|last month)')
+PAIN_WORDS = ('zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten')
+PAIN_PATTERN = re.compile(r'\b(10|[0-9]|' + '|'.join(PAIN_WORDS) + r')\b')
+NO_PAIN_PATTERN = re.compile(r'\b(no pain|none|not at all|nothing)\b')
+NONE_PATTERN = re.compile(r'^\s*(no|none|nope|nothing|n/?a|not really|no treatments?)\s*[.!]?\s*$')
+SKIP_PATTERN = re.compile(r'^\s*(skip|pass|rather not say|prefer not to say)\b')
+PAUSE_PATTERN = re.compile(r'\b(stop|pause|cancel|later|never ?mind)\b')
+
+
+def parse_duration(text):
+    """Normalize how long symptoms have lasted, e.g. "a couple of weeks" -> "2 weeks"."""
+    text = text.lower()
+    match = DURATION_PATTERN.search(text)
+    if match:
+        count = match.group(1)
+        count = int(count) if count.isdigit() else NUMBER_WORDS[count]
+        unit = match.group(2) + ('s' if count != 1 else '')
+        return f'{count} {unit}'
+    match = SINCE_PATTERN.search(text)
+    if match:
+        return match.group(1).strip(' .!')[:50]
+    return None
+
+
+def parse_pain_level(text):
+    """Return a 0-10 pain score, or None."""
+    text = text.lower()
+    match = PAIN_PATTERN.search(text)
+    if match:
+        value = match.group(1)
+        return int(value) if value.isdigit() else NUMBER_WORDS[value]
+    if NO_PAIN_PATTERN.search(text):
+        return 0
+    return None
+
+
+def parse_free_text(text, max_length=1000):
+    text = text.strip()
+    if NONE_PATTERN.search(text.lower()):
+        return 'None'
+    return text[:max_length] or None
+
+
+class IntakeService:
+    """Walks a patient through the intake form in the chat.
+
+    Each answer is parsed locally and saved straight to a draft
+    ``IntakeForm`` row linked to the chat session (and the patient, once
+    known), so partial forms are kept and the next question is simply the
+    first empty field. A patient who pauses and comes back later in the
+    same chat resumes where they stopped; no conversation history is needed.
+    """
+
+    parsers = {
+        'chief_complaint': parse_free_text,
+        'symptoms': parse_free_text,
+        'symptom_duration': parse_duration,
+        'pain_level': parse_pain_level,
+        'previous_treatments': parse_free_text,
+    }
+
+    def get_draft(self, chat_session, include_paused=True):
+        """The unfinished form started in this chat session, if any.
+
+        Drafts are never matched on the session's patient: a chat is not
+        signed in, and its patient may come from an email anyone can type.
+        """
+        if chat_session is None or chat_session.id is None:
+            return None
+        statuses = ('draft', 'paused') if include_paused else ('draft',)
+        return IntakeForm.query.filter(IntakeForm.status.in_(statuses),
+                                       IntakeForm.chat_session_id == chat_session.id) \
+            .order_by(IntakeForm.id.desc()).first()
+
+    def is_active(self, chat_session):
+        """True when the chat is in the middle of the intake questions."""
+        return self.get_draft(chat_session, include_paused=False) is not None
+
+    def next_field(self, form):
+        for field in INTAKE_FIELDS:
+            if getattr(form, field) is None:
+                return field
+        return None
+
+    def handle(self, message, chat_session):
+        """Store the answer to the pending question and ask the next one."""
+        form = self.get_draft(chat_session)
+        message_lower = message.lower()
+
+        if form is None or form.status == 'paused':
+            resumed = form is not None
+            if form is None:
+                form = IntakeForm(chat_session_id=chat_session.id, patient_id=chat_session.patient_id,
+                                  status='draft')
+                db.session.add(form)
+            form.status = 'draft'
+            form.chat_session_id = chat_session.id
+            field = self.next_field(form)
+            if field is None:
+                return self._complete(form, chat_session)
+            intro = ("Welcome back! Let's continue your intake form where you left off." if resumed else
+                     "I'll help you complete your intake form. This information helps our medical team "
+                     "prepare for your visit. You can say \"stop\" at any time and continue later.")
+            return self._response(f"{intro}\n\n{FIELD_PROMPTS[field]}", field, form)
+
+        if PAUSE_PATTERN.search(message_lower) and len(message.split()) <= 4:
+            form.status = 'paused'
+            return self._response("No problem, I've saved your answers so far. Ask for the intake form any time "
+                                  "to continue where you left off.", 'paused', form)
+
+        field = self.next_field(form)
+        if field is None:
+            # Every answer is already in, e.g. a draft saved through the API
+            return self._complete(form, chat_session)
+        if SKIP_PATTERN.search(message_lower) and field in OPTIONAL_FIELDS:
+            value = 'Not provided'
+        else:
+            value = self.parsers[field](message)
+        if value is None:
+            return self._response(f"Sorry, I didn't catch that. {FIELD_PROMPTS[field]}", field, form)
+        setattr(form, field, value)
+
+        field = self.next_field(form)
+        if field:
+            return self._response(FIELD_PROMPTS[field], field, form)
+        return self._complete(form, chat_session)
+
+    def _complete(self, form, chat_session):
+        form.status = 'completed'
+        form.completed_at = datetime.utcnow()
+        form.patient_id = form.patient_id or chat_session.patient_id
+        return self._response(
+            "Thank you, your intake form is complete. Our medical team will review it before your visit.\n\n"
+            f"Reason for visit: {form.chief_complaint}\n"
+            f"Symptoms: {form.symptoms}\n"
+            f"Duration: {form.symptom_duration}\n"
+            f"Pain level: {form.pain_level}/10\n"
+            f"Previous treatments: {form.previous_treatments}",
+            'completed', form)
+
+    def _response(self, message, step, form):
+        db.session.flush()
+        return {
+            'message': message,
+            'type': 'intake_form',
+            'metadata': {'step': step, 'intake_form_id': form.id, 'status': form.status, 'mode': 'local'}
+        }
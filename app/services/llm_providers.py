@@ -0,0 +1,264 @@
+"""LLM providers and the router that picks one per request.
+
+Handlers ask for a completion at a model *tier* (``fast`` or ``strong``)
+chosen from the intent; each provider maps tiers to its own model names.
+Providers:
+
+* ``openai``: the OpenAI API (or any base URL the SDK accepts)
+* ``http``: any OpenAI-compatible server (vLLM, llama.cpp, Ollama, ...)
+  called over plain HTTP
+* ``local``: deterministic templates and rules, no network; used as the
+  last resort and for offline testing (``LLM_PROVIDERS=local``)
+
+The router orders providers by observed latency, error rate and cost and
+skips providers whose circuit breaker is open.
+"""
+
+import re
+import threading
+from abc import ABC, abstractmethod
+
+import requests
+
+from app.services.prompt_builder import extract_usage
+from app.services.retrieval_service import estimate_tokens
+from app.utils.circuit_breaker import AdaptiveController, llm_controller
+
+TIERS = ('fast', 'strong')
+
+KNOWLEDGE_HEADER = 'RELEVANT CLINIC INFORMATION:'
+
+
+def parse_mapping(value):
+    """Parse ``"a=b,c=d"`` into a dict."""
+    mapping = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            key, _, val = item.partition('=')
+            mapping[key.strip()] = val.strip()
+    return mapping
+
+
+class LLMResult:
+    """Completion text with the provider, model and token usage that produced it."""
+
+    def __init__(self, text, provider, model, usage=None):
+        self.text = text
+        self.provider = provider
+        self.model = model
+        self.usage = usage or {'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0}
+
+
+class LLMProvider(ABC):
+    """Base class for chat completion backends."""
+
+    name = 'base'
+    fallback_only = False  # only used when no other provider can answer
+
+    def __init__(self, models=None, cost_per_1k_tokens=0.0, prior_latency=1.0, controller=None):
+        self.models = models or {}
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.prior_latency = prior_latency  # assumed latency (seconds) before any calls are observed
+        self.controller = controller or AdaptiveController()
+
+    def model_for(self, tier):
+        return self.models.get(tier) or self.models.get('fast') or 'default'
+
+    @abstractmethod
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        """Return an LLMResult for the messages."""
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions through the official SDK."""
+
+    name = 'openai'
+
+    def __init__(self, api_key, base_url=None, max_retries=0, **kwargs):
+        super().__init__(**kwargs)
+        # Imported here: the SDK is slow to import and only needed once a provider is configured
+        from openai import OpenAI
+        
+        self.client = OpenAI(api_key=api_key, base_url=base_url or None, max_retries=max_retries)
+
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout
+        )
+        return LLMResult(response.choices[0].message.content, self.name, model, extract_usage(response))
+
+
+class HTTPProvider(LLMProvider):
+    """Any server exposing the OpenAI ``/chat/completions`` API over HTTP."""
+
+    name = 'http'
+
+    def __init__(self, base_url, api_key=None, **kwargs):
+        super().__init__(**kwargs)
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        response = self.session.post(self.url, json={
+            'model': model,
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+        }, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        usage = data.get('usage') or {}
+        details = usage.get('prompt_tokens_details') or {}
+        return LLMResult(
+            data['choices'][0]['message']['content'],
+            self.name,
+            model,
+            {
+                'prompt_tokens': usage.get('prompt_tokens') or 0,
+                'cached_tokens': details.get('cached_tokens') or 0,
+                'completion_tokens': usage.get('completion_tokens') or 0,
+            }
+        )
+
+
+class LocalRuleProvider(LLMProvider):
+    """Deterministic template answers built from the prompt itself.
+
+    Answers greetings and booking requests from templates and otherwise
+    returns the best retrieved clinic snippet included in the prompt.
+    """
+
+    name = 'local'
+    fallback_only = True
+
+    GREETING_PATTERN = re.compile(r'\b(hello|hi|hey|good (morning|afternoon|evening))\b')
+    BOOKING_PATTERN = re.compile(r'\b(appointment|book|schedule|reschedule|available)\b')
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('models', {'fast': 'rules', 'strong': 'rules'})
+        kwargs.setdefault('prior_latency', 0.001)
+        super().__init__(**kwargs)
+
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        user_message = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '')
+        knowledge = next((m['content'] for m in messages
+                          if m['role'] == 'system' and m['content'].startswith(KNOWLEDGE_HEADER)), '')
+        text = self._answer(user_message.lower(), knowledge[len(KNOWLEDGE_HEADER):].strip())
+
+        return LLMResult(text, self.name, model, {
+            'prompt_tokens': sum(estimate_tokens(m['content']) for m in messages),
+            'cached_tokens': 0,
+            'completion_tokens': estimate_tokens(text),
+        })
+
+    def _answer(self, message, knowledge):
+        if self.BOOKING_PATTERN.search(message):
+            return ("I can help you book an appointment. Please tell me the type of visit, your preferred "
+                    "date and time, and your name and phone number.")
+        if knowledge:
+            return "Here is what I found:\n\n" + knowledge.split('\n\n')[0]
+        if self.GREETING_PATTERN.search(message):
+            return ("Hello! I can help you schedule appointments, answer questions about the clinic and "
+                    "find aftercare instructions. How can I help you today?")
+        return ("I'm not sure about that. Please contact our staff directly, or ask me about appointments, "
+                "clinic hours, services or aftercare.")
+
+
+class ProviderRouter:
+    """Orders the configured providers for each request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self.providers = []
+        self.intent_tiers = {}
+        self.cost_weight = 0.0
+
+    def configure(self, config):
+        """Build the providers from the Flask config; cheap when nothing changed."""
+        signature = tuple(str(config.get(key)) for key in (
+            'LLM_PROVIDERS', 'OPENAI_API_KEY', 'OPENAI_BASE_URL', 'LLM_MAX_RETRIES',
+            'LLM_MODEL_FAST', 'LLM_MODEL_STRONG', 'LLM_HTTP_BASE_URL', 'LLM_HTTP_API_KEY',
+            'LLM_HTTP_MODEL_FAST', 'LLM_HTTP_MODEL_STRONG', 'LLM_COST_OPENAI_PER_1K',
+            'LLM_COST_HTTP_PER_1K', 'LLM_INTENT_TIERS', 'LLM_ROUTER_COST_WEIGHT'))
+        if signature == self._signature:
+            return
+
+        providers = []
+        for name in (config.get('LLM_PROVIDERS') or 'openai').split(','):
+            name = name.strip()
+            if name == 'openai' and config.get('OPENAI_API_KEY'):
+                providers.append(OpenAIProvider(
+                    config['OPENAI_API_KEY'],
+                    base_url=config.get('OPENAI_BASE_URL'),
+                    max_retries=config.get('LLM_MAX_RETRIES', 0),
+                    models={'fast': config.get('LLM_MODEL_FAST'), 'strong': config.get('LLM_MODEL_STRONG')},
+                    cost_per_1k_tokens=config.get('LLM_COST_OPENAI_PER_1K', 0.002),
+                    controller=llm_controller
+                ))
+            elif name == 'http' and config.get('LLM_HTTP_BASE_URL'):
+                providers.append(HTTPProvider(
+                    config['LLM_HTTP_BASE_URL'],
+                    api_key=config.get('LLM_HTTP_API_KEY'),
+                    models={'fast': config.get('LLM_HTTP_MODEL_FAST'), 'strong': config.get('LLM_HTTP_MODEL_STRONG')},
+                    cost_per_1k_tokens=config.get('LLM_COST_HTTP_PER_1K', 0.0),
+                    prior_latency=0.5
+                ))
+            elif name == 'local':
+                providers.append(LocalRuleProvider())
+
+        with self._lock:
+            self.providers = providers
+            self.intent_tiers = parse_mapping(config.get('LLM_INTENT_TIERS'))
+            self.cost_weight = config.get('LLM_ROUTER_COST_WEIGHT', 100.0)
+            self._signature = signature
+
+    def is_configured(self):
+        """True when at least one provider can answer."""
+        return bool(self.providers)
+
+    def tier_for(self, intent):
+        tier = self.intent_tiers.get(intent, 'fast')
+        return tier if tier in TIERS else 'fast'
+
+    def score(self, provider):
+        """Expected cost of using a provider: seconds of latency plus weighted price."""
+        latency = provider.controller.latency_percentile(0.5, 3)
+        if latency is None:
+            latency = provider.prior_latency
+        error_rate = provider.controller.snapshot()['error_rate']
+        # Failures cost a wasted attempt before the next provider is tried
+        expected_latency = latency / max(0.05, 1.0 - error_rate)
+        return expected_latency + self.cost_weight * provider.cost_per_1k_tokens
+
+    def candidates(self):
+        """Providers in the order they should be tried."""
+        with self._lock:
+            providers = list(self.providers)
+        primary = sorted((p for p in providers if not p.fallback_only), key=self.score)
+        return primary + [p for p in providers if p.fallback_only]
+
+    def snapshot(self):
+        """Router state for the admin metrics endpoint."""
+        return {
+            'intent_tiers': dict(self.intent_tiers),
+            'providers': [
+                dict(provider.controller.snapshot(),
+                     name=provider.name,
+                     models=provider.models,
+                     cost_per_1k_tokens=provider.cost_per_1k_tokens,
+                     score=round(self.score(provider), 4))
+                for provider in self.candidates()
+            ],
+        }
+
+
+# Shared router for this worker process
+provider_router = ProviderRouter()
@@ -0,0 +1,73 @@
+"""Role-structured prompt assembly for the LLM handlers.
+
+Messages are ordered from most to least stable so providers that cache
+prompt prefixes can reuse as much as possible between requests:
+
+1. the shared system prompt (byte-identical for a given clinic settings version)
+2. the handler's task instructions (fixed per handler)
+3. the session's rolling summary of older turns (changes every few turns)
+4. retrieved clinic knowledge for this message
+5. recent conversation turns as user/assistant messages
+6. the new user message
+"""
+
+from app.utils.versioned_cache import VersionedCache
+
+
+class PromptBuilder:
+    """Builds chat message arrays with a stable, cacheable prefix."""
+
+    def __init__(self, version):
+        # ``version()`` stamps what the shared system prompt is built from
+        self._prefixes = VersionedCache(version)
+
+    def get_static_prefix(self, key, build_prompt):
+        """Get the shared system prompt for ``key`` at the current version.
+
+        ``build_prompt()`` is only called when the version changes, so the
+        returned string is byte-identical for every request in between.
+        """
+        return self._prefixes.get(key, build_prompt)
+
+    def invalidate(self):
+        """Drop the cached prefix."""
+        self._prefixes.invalidate()
+
+    def build_messages(self, system_prefix, instructions, user_message, knowledge=None, history=None, summary=None):
+        """Assemble the message array for a chat completion call."""
+        messages = [
+            {'role': 'system', 'content': system_prefix},
+            {'role': 'system', 'content': instructions},
+        ]
+
+        if summary:
+            messages.append({'role': 'system', 'content': f"EARLIER IN THIS CONVERSATION:\n{summary}"})
+
+        if knowledge:
+            messages.append({'role': 'system', 'content': f"RELEVANT CLINIC INFORMATION:\n{knowledge}"})
+
+        for turn in history or []:
+            role = 'assistant' if turn.get('sender') == 'assistant' else 'user'
+            messages.append({'role': role, 'content': turn.get('message', '')})
+
+        messages.append({'role': 'user', 'content': user_message})
+        return messages
+
+
+def extract_usage(response):
+    """Get prompt, cached prompt and completion token counts from a response."""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0}
+
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = 0
+    if details is not None:
+        cached_tokens = (details.get('cached_tokens') if isinstance(details, dict)
+                         else getattr(details, 'cached_tokens', None)) or 0
+
+    return {
+        'prompt_tokens': getattr(usage, 'prompt_tokens', None) or 0,
+        'cached_tokens': cached_tokens,
+        'completion_tokens': getattr(usage, 'completion_tokens', None) or 0,
+    }
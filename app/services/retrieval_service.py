@@ -0,0 +1,147 @@
+from sqlalchemy import func, select
+from app import db
+from app.models import FAQ, AftercareInstruction, ClinicSettings
+from app.utils.versioned_cache import VersionedCache, VersionStamp
+import numpy as np
+import math
+import re
+import zlib
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Common words that carry no retrieval signal
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'can', 'do', 'does', 'for', 'from', 'how', 'i', 'in',
+    'is', 'it', 'me', 'my', 'of', 'on', 'or', 'our', 'the', 'to', 'we', 'what', 'when', 'where',
+    'which', 'who', 'will', 'with', 'you', 'your',
+    'el', 'la', 'los', 'las', 'de', 'del', 'y', 'en', 'que', 'un', 'una', 'es', 'son', 'por', 'para',
+    'le', 'les', 'des', 'et', 'est', 'du', 'au', 'pour',
+}
+
+
+def estimate_tokens(text):
+    """Rough token estimate (about four characters per token for English)."""
+    return int(math.ceil(len(text) / 4.0)) if text else 0
+
+
+def _stem(token):
+    """Strip common English suffixes so "parking" matches "park"."""
+    for suffix in ('ing', 'ed', 's'):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3 and not token.endswith('ss'):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """Lowercase, lightly stemmed word tokens with stop words removed."""
+    return [_stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class HashedTfidfIndex:
+    """In-memory TF-IDF index over hashed unigram and bigram features.
+
+    Documents are embedded into a dense, L2-normalized NumPy matrix so a
+    query is a single matrix-vector product followed by a top-k selection.
+    """
+
+    def __init__(self, documents, n_features=1024):
+        self.documents = documents
+        self.n_features = n_features
+
+        term_rows = [self._term_counts(doc['text']) for doc in documents]
+
+        document_frequency = np.zeros(n_features, dtype=np.float32)
+        for counts in term_rows:
+            for index in counts:
+                document_frequency[index] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)).astype(np.float32) + 1.0
+
+        self.matrix = np.zeros((len(documents), n_features), dtype=np.float32)
+        for row, counts in enumerate(term_rows):
+            for index, count in counts.items():
+                self.matrix[row, index] = count
+        self.matrix *= self.idf
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix /= norms
+
+    def _term_counts(self, text):
+        """Hashed term counts for unigrams and bigrams."""
+        tokens = tokenize(text)
+        terms = tokens + [f'{first} {second}' for first, second in zip(tokens, tokens[1:])]
+        counts = {}
+        for term in terms:
+            index = zlib.crc32(term.encode('utf-8')) % self.n_features
+            counts[index] = counts.get(index, 0) + 1
+        return counts
+
+    def embed(self, text):
+        """Embed a query into the index vector space."""
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        for index, count in self._term_counts(text).items():
+            vector[index] = count
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, query, top_k=4, min_score=0.1):
+        """Return ``[(score, document), ...]`` for the best matching documents."""
+        if not self.documents:
+            return []
+
+        scores = self.matrix @ self.embed(query)
+        top_k = min(top_k, len(self.documents))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = sorted(candidates, key=lambda index: -scores[index])
+        return [(float(scores[index]), self.documents[index]) for index in ranked if scores[index] >= min_score]
+
+
+def get_knowledge_version():
+    """Version stamp for the knowledge base (FAQs, aftercare, clinic settings)."""
+    query = select(
+        select(func.count(FAQ.id)).scalar_subquery(),
+        select(func.max(FAQ.updated_at)).scalar_subquery(),
+        select(func.count(AftercareInstruction.id)).scalar_subquery(),
+        select(func.max(AftercareInstruction.updated_at)).scalar_subquery(),
+        select(func.max(ClinicSettings.updated_at)).scalar_subquery(),
+    )
+    return tuple(str(value) for value in db.session.execute(query).one())
+
+
+# Shared by every cache built from the knowledge base
+knowledge_version = VersionStamp(get_knowledge_version)
+
+
+class RetrievalService:
+    """Selects the knowledge snippets relevant to a message for the LLM prompt."""
+
+    def __init__(self, n_features=1024):
+        self.n_features = n_features
+        self._indexes = VersionedCache(knowledge_version.get)  # language -> index
+
+    def current_version(self):
+        """The knowledge version (shared stamp, re-read at most every 30 seconds)."""
+        return knowledge_version.get()
+
+    def invalidate(self):
+        """Force the indexes to be rebuilt on next use."""
+        self._indexes.invalidate()
+
+    def get_index(self, language, loader):
+        """Get the index for a language, building it with ``loader(language)`` if needed."""
+        return self._indexes.get(language, lambda: HashedTfidfIndex(loader(language), self.n_features))
+
+    def build_context(self, query, language, loader, top_k=4, token_budget=400, min_score=0.1):
+        """Build a knowledge context string for the query within a token budget."""
+        index = self.get_index(language, loader)
+
+        snippets = []
+        used_tokens = 0
+        for score, document in index.search(query, top_k, min_score):
+            tokens = estimate_tokens(document['text'])
+            if used_tokens + tokens > token_budget:
+                continue
+            snippets.append(document['text'])
+            used_tokens += tokens
+
+        return "\n\n".join(snippets)
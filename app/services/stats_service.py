@@ -0,0 +1,261 @@
+from flask import current_app
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Patient, Appointment, FAQ, ChatMessage, DailyStat
+from datetime import datetime, timedelta
+import threading
+import time
+
+DEFAULT_CACHE_TTL = 30  # seconds
+
+# Metrics tracked in the daily_stats rollup table
+DAILY_METRICS = ('appointments', 'chat_messages')
+
+
+class StatsService:
+    """Service for admin dashboard counters and per-day activity rollups.
+
+    Dashboard counters are computed with a single aggregate query and cached
+    for a short TTL. Committed inserts, updates and deletes adjust the cached
+    counters in place so the cache stays accurate within this process; the
+    TTL bounds drift caused by writes from other workers.
+
+    Per-day appointment and chat volumes are kept in the ``daily_stats``
+    table, which is updated in the same transaction as the rows it counts,
+    so the time series never has to scan history.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = None
+        self._expires_at = 0
+
+    def _get_ttl(self):
+        """Get the counter cache TTL from config."""
+        return current_app.config.get('STATS_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+    def get_dashboard_stats(self):
+        """Get dashboard counters, using the cached rollup when fresh."""
+        with self._lock:
+            if self._counters is not None and time.monotonic() < self._expires_at:
+                return dict(self._counters)
+
+        counters = self._query_counters()
+        with self._lock:
+            self._counters = counters
+            self._expires_at = time.monotonic() + self._get_ttl()
+        return dict(counters)
+
+    def _query_counters(self):
+        """Compute all dashboard counters in one aggregate query."""
+        query = select(
+            select(func.count(Patient.id)).scalar_subquery().label('total_patients'),
+            select(func.count(Appointment.id)).scalar_subquery().label('total_appointments'),
+            select(func.count(Appointment.id))
+                .where(Appointment.status == 'scheduled')
+                .scalar_subquery().label('pending_appointments'),
+            select(func.count(FAQ.id))
+                .where(FAQ.is_active.is_(True))
+                .scalar_subquery().label('total_faqs'),
+        )
+        row = db.session.execute(query).one()
+        return dict(row._mapping)
+
+    def invalidate(self):
+        """Drop the cached counters so the next read re-queries."""
+        with self._lock:
+            self._counters = None
+            self._expires_at = 0
+
+    def apply_deltas(self, deltas):
+        """Apply committed counter deltas to the cached counters."""
+        with self._lock:
+            if self._counters is None:
+                return
+            for key, delta in deltas.items():
+                self._counters[key] = self._counters.get(key, 0) + delta
+
+    def get_time_series(self, days=14):
+        """Get per-day appointment and chat volumes for the last N days."""
+        end = datetime.utcnow().date()
+        start = end - timedelta(days=days - 1)
+
+        rows = DailyStat.query.filter(DailyStat.day >= start, DailyStat.day <= end).all()
+        counts = {(row.day, row.metric): row.count for row in rows}
+
+        series = {'days': []}
+        for metric in DAILY_METRICS:
+            series[metric] = []
+
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            series['days'].append(day.isoformat())
+            for metric in DAILY_METRICS:
+                series[metric].append(counts.get((day, metric), 0))
+
+        return series
+
+    def rebuild_daily_rollups(self):
+        """Rebuild daily_stats from the source tables.
+
+        This scans the full history and is meant for one-off backfills,
+        not for the request path.
+        """
+        sources = {
+            'appointments': Appointment.created_at,
+            'chat_messages': ChatMessage.timestamp,
+        }
+
+        DailyStat.query.delete()
+        for metric, column in sources.items():
+            day = func.date(column)
+            rows = db.session.query(day, func.count()).group_by(day).all()
+            for day_value, count in rows:
+                if isinstance(day_value, str):
+                    day_value = datetime.strptime(day_value, '%Y-%m-%d').date()
+                db.session.add(DailyStat(day=day_value, metric=metric, count=count))
+        db.session.commit()
+
+
+def _day_of(value):
+    """Get the rollup day for a datetime column value."""
+    return (value or datetime.utcnow()).date()
+
+
+def _collect_deltas(session):
+    """Compute counter and daily rollup deltas for a flush.
+
+    Returns ``(counters, daily, invalidate)``; ``invalidate`` is set when a
+    counter delta cannot be derived and the cache must be re-queried.
+    """
+    counters = {}
+    daily = {}
+    invalidate = False
+
+    def bump(key, delta):
+        counters[key] = counters.get(key, 0) + delta
+
+    def bump_day(day, metric, delta):
+        daily[(day, metric)] = daily.get((day, metric), 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, Patient):
+            bump('total_patients', 1)
+        elif isinstance(obj, Appointment):
+            bump('total_appointments', 1)
+            if obj.status == 'scheduled':
+                bump('pending_appointments', 1)
+            bump_day(_day_of(obj.created_at), 'appointments', 1)
+        elif isinstance(obj, FAQ):
+            if obj.is_active:
+                bump('total_faqs', 1)
+        elif isinstance(obj, ChatMessage):
+            bump_day(_day_of(obj.timestamp), 'chat_messages', 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Appointment):
+            history = inspect(obj).attrs.status.history
+            if history.has_changes():
+                if not history.deleted:
+                    # Previous value was never loaded; the delta is unknown
+                    invalidate = True
+                    continue
+                was_pending = history.deleted[0] == 'scheduled'
+                is_pending = obj.status == 'scheduled'
+                bump('pending_appointments', int(is_pending) - int(was_pending))
+        elif isinstance(obj, FAQ):
+            history = inspect(obj).attrs.is_active.history
+            if history.has_changes():
+                if not history.deleted:
+                    invalidate = True
+                    continue
+                was_active = bool(history.deleted[0])
+                bump('total_faqs', int(bool(obj.is_active)) - int(was_active))
+
+    for obj in session.deleted:
+        if isinstance(obj, Patient):
+            bump('total_patients', -1)
+        elif isinstance(obj, Appointment):
+            bump('total_appointments', -1)
+            if obj.status == 'scheduled':
+                bump('pending_appointments', -1)
+            bump_day(_day_of(obj.created_at), 'appointments', -1)
+        elif isinstance(obj, FAQ):
+            if obj.is_active:
+                bump('total_faqs', -1)
+        elif isinstance(obj, ChatMessage):
+            bump_day(_day_of(obj.timestamp), 'chat_messages', -1)
+
+    return counters, daily, invalidate
+
+
+def _upsert_daily(connection, day, metric, delta):
+    """Add a delta to a daily_stats row, creating it if needed.
+
+    A new row starts at the delta itself, even a negative one, so each row
+    stays the sum of its deltas whichever transaction creates it.
+    """
+    table = DailyStat.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(day=day, metric=metric, count=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day', 'metric'],
+            set_={'count': table.c.count + delta}
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(
+        update(table)
+        .where(table.c.day == day, table.c.metric == metric)
+        .values(count=table.c.count + delta)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(day=day, metric=metric, count=delta))
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_rollups_after_flush(session, flush_context):
+    """Update daily rollups in the flushing transaction and stage counter deltas."""
+    counters, daily, invalidate = _collect_deltas(session)
+
+    if daily:
+        connection = session.connection()
+        for (day, metric), delta in daily.items():
+            if delta:
+                _upsert_daily(connection, day, metric, delta)
+
+    if invalidate:
+        session.info['stats_invalidate'] = True
+
+    if counters:
+        pending = session.info.setdefault('stats_counter_deltas', {})
+        for key, delta in counters.items():
+            pending[key] = pending.get(key, 0) + delta
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_rollups_after_commit(session):
+    """Apply staged counter deltas once the transaction commits."""
+    pending = session.info.pop('stats_counter_deltas', None)
+    if session.info.pop('stats_invalidate', False):
+        stats_service.invalidate()
+    elif pending:
+        stats_service.apply_deltas(pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rollups_after_rollback(session):
+    """Discard staged counter deltas when the transaction rolls back."""
+    session.info.pop('stats_counter_deltas', None)
+    session.info.pop('stats_invalidate', None)
+
+
+stats_service = StatsService()
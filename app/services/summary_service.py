@@ -0,0 +1,121 @@
+from flask import current_app
+from app import db
+from app.models import ChatSession, ChatMessage
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+SUMMARY_INSTRUCTIONS = """Update the running summary of a clinic chat. Keep facts the assistant needs later:
+the patient's goal, requested dates/times, doctor or appointment type, symptoms mentioned,
+contact details given and anything already answered. Be brief; plain sentences, no greetings."""
+
+
+class ConversationSummaryService:
+    """Keeps a rolling summary per chat session so prompts stay a fixed size.
+
+    Once a session has more than ``CHAT_SUMMARY_AFTER_MESSAGES`` messages that
+    are not yet summarized, everything except the most recent
+    ``CHAT_RECENT_MESSAGES`` is folded into ``ChatSession.summary``. Only the
+    new turns are folded in, so each refresh costs the same no matter how
+    long the session is. Refreshes run on a background thread after the
+    response has been sent.
+    """
+
+    def __init__(self, llm_complete=None, max_summary_chars=1200):
+        # llm_complete(messages, max_tokens) -> str, or None for local summaries
+        self.llm_complete = llm_complete
+        self.max_summary_chars = max_summary_chars
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-summary')
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def schedule_refresh(self, chat_session_id):
+        """Queue a summary refresh for a session, off the request path."""
+        app = current_app._get_current_object()
+        if not app.config.get('CHAT_SUMMARY_ENABLED', True):
+            return
+
+        if not app.config.get('CHAT_SUMMARY_ASYNC', True):
+            self.refresh(chat_session_id)
+            return
+
+        with self._lock:
+            if chat_session_id in self._pending:
+                return
+            self._pending.add(chat_session_id)
+
+        self._executor.submit(self._refresh_in_context, app, chat_session_id)
+
+    def _refresh_in_context(self, app, chat_session_id):
+        try:
+            with app.app_context():
+                self.refresh(chat_session_id)
+        except Exception as e:
+            print(f"Error refreshing chat summary: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(chat_session_id)
+
+    def refresh(self, chat_session_id):
+        """Fold older unsummarized turns into the session summary if needed."""
+        summarize_after = current_app.config.get('CHAT_SUMMARY_AFTER_MESSAGES', 10)
+        keep_recent = current_app.config.get('CHAT_RECENT_MESSAGES', 4)
+
+        chat_session = db.session.get(ChatSession, chat_session_id)
+        if not chat_session:
+            return False
+
+        query = ChatMessage.query.filter_by(session_id=chat_session.id)
+        if chat_session.summary_message_id:
+            query = query.filter(ChatMessage.id > chat_session.summary_message_id)
+
+        unsummarized = query.count()
+        if unsummarized <= summarize_after:
+            return False
+
+        to_fold = query.order_by(ChatMessage.id).limit(unsummarized - keep_recent).all()
+        if not to_fold:
+            return False
+
+        turns = [{'sender': msg.sender, 'message': msg.message} for msg in to_fold]
+        chat_session.summary = self.summarize(chat_session.summary, turns)
+        chat_session.summary_message_id = to_fold[-1].id
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return True
+
+    def summarize(self, previous_summary, turns):
+        """Merge new turns into the previous summary."""
+        if self.llm_complete:
+            try:
+                transcript = "\n".join(f"{turn['sender']}: {turn['message']}" for turn in turns)
+                messages = [
+                    {'role': 'system', 'content': SUMMARY_INSTRUCTIONS},
+                    {'role': 'user', 'content': f"Current summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"}
+                ]
+                summary = (self.llm_complete(messages, 200) or '').strip()
+                if summary:
+                    return summary[:self.max_summary_chars]
+            except Exception as e:
+                print(f"Error summarizing with LLM, using local summary: {e}")
+
+        return self._local_summary(previous_summary, turns)
+
+    def _local_summary(self, previous_summary, turns):
+        """Extractive summary: what the patient said, newest kept when trimming."""
+        lines = previous_summary.splitlines() if previous_summary else []
+        for turn in turns:
+            if turn['sender'] != 'user':
+                continue
+            text = " ".join(turn['message'].split())
+            if len(text) > 160:
+                text = text[:157] + '...'
+            lines.append(f"- Patient said: {text}")
+
+        # Drop the oldest lines until the summary fits
+        while lines and len("\n".join(lines)) > self.max_summary_chars:
+            lines.pop(0)
+        return "\n".join(lines)
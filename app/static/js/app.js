@@ -4,6 +4,7 @@
 let currentSessionId = null;
 let currentLanguage = 'en';
 let isTyping = false;
+let activeFlow = null;  // 'booking' or 'intake' while the server needs every message
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
@@ -66,6 +67,15 @@ function sendMessage() {
     // Clear input
     chatInput.value = '';
     
+    // Precomputed answer: show it now and only record the exchange. A booking
+    // or intake form in progress answers every message itself, so skip it then.
+    const fastAnswer = activeFlow ? null : getFastPathAnswer(message);
+    if (fastAnswer) {
+        addMessageToChat('assistant', fastAnswer.message, fastAnswer.type, fastAnswer.metadata);
+        persistMessage(message, fastAnswer);
+        return;
+    }
+    
     // Show typing indicator
     showTypingIndicator();
     
@@ -94,6 +104,7 @@ function sendMessage() {
             if (data.session_id) {
                 currentSessionId = data.session_id;
             }
+            activeFlow = data.active_flow || null;
         }
     })
     .catch(error => {
@@ -103,6 +114,46 @@ function sendMessage() {
     });
 }
 
+function normalizeMessage(message) {
+    // Must match fast_path_service.normalize_message
+    return message.toLowerCase().replace(/[^\p{L}\p{N}_\s]/gu, ' ').trim().split(/\s+/).join(' ');
+}
+
+function getFastPathAnswer(message) {
+    if (typeof fastPathAnswers === 'undefined' || !fastPathAnswers[currentLanguage]) {
+        return null;
+    }
+    return fastPathAnswers[currentLanguage][normalizeMessage(message)] || null;
+}
+
+function persistMessage(message, shownAnswer) {
+    // Store the exchange in the chat session; the answer is already shown.
+    // If the server answered differently (a flow we did not know about,
+    // e.g. after a page reload), show its reply too.
+    fetch('/api/chat', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            message: message,
+            session_id: currentSessionId,
+            language: currentLanguage
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.session_id) {
+            currentSessionId = data.session_id;
+        }
+        activeFlow = data.active_flow || null;
+        if (data.message && data.message !== shownAnswer.message) {
+            addMessageToChat('assistant', data.message, data.type, data.metadata);
+        }
+    })
+    .catch(error => console.error('Error:', error));
+}
+
 function addMessageToChat(sender, message, type = 'text', metadata = {}) {
     const chatMessages = document.getElementById('chat-messages');
     const messageDiv = document.createElement('div');
@@ -177,14 +228,55 @@ function quickMessage(message) {
 // Admin Dashboard functionality
 function initializeAdmin() {
     loadPatients();
-    loadAppointments();
-    loadFaqs();
+    loadDashboardActivity();
+    
+    // Load the other tables only when their tab is first opened
+    lazyLoadTab('appointments-tab', loadAppointments);
+    lazyLoadTab('faqs-tab', loadFaqs);
+    
     checkApiStatus();
     updateLastUpdated();
 }
 
+function lazyLoadTab(tabId, loader) {
+    const tab = document.getElementById(tabId);
+    if (!tab) {
+        return;
+    }
+    tab.addEventListener('shown.bs.tab', loader, { once: true });
+}
+
+function loadDashboardActivity() {
+    fetch('/admin/stats?days=14', {
+        headers: { 'Content-Type': 'application/json' }
+    })
+    .then(response => response.json())
+    .then(data => {
+        const tbody = document.querySelector('#activityTable tbody');
+        if (!tbody || !data.time_series) {
+            return;
+        }
+        tbody.innerHTML = '';
+        
+        const series = data.time_series;
+        // Most recent day first
+        for (let i = series.days.length - 1; i >= 0; i--) {
+            const row = document.createElement('tr');
+            row.innerHTML = `
+                <td>${formatDate(series.days[i])}</td>
+                <td>${series.appointments[i]}</td>
+                <td>${series.chat_messages[i]}</td>
+            `;
+            tbody.appendChild(row);
+        }
+    })
+    .catch(error => {
+        console.error('Error loading dashboard activity:', error);
+    });
+}
+
 function loadPatients() {
-    fetch('/api/patients')
+    fetch('/api/patients?fields=id,first_name,last_name,email,phone')
     .then(response => response.json())
     .then(patients => {
         const tbody = document.querySelector('#patientsTable tbody');
@@ -194,7 +286,7 @@ function loadPatients() {
             const row = document.createElement('tr');
             row.innerHTML = `
                 <td>${patient.first_name} ${patient.last_name}</td>
-                <td>${patient.email}</td>
+                <td>${patient.email || '-'}</td>
                 <td>${patient.phone}</td>
                 <td>-</td>
                 <td>
@@ -215,7 +307,7 @@ function loadPatients() {
 }
 
 function loadAppointments() {
-    fetch('/api/appointments')
+    fetch('/api/appointments?fields=id,patient_id,appointment_date,appointment_type,status')
     .then(response => response.json())
     .then(appointments => {
         const tbody = document.querySelector('#appointmentsTable tbody');
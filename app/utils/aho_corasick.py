@@ -0,0 +1,59 @@
+"""Aho-Corasick automaton for matching many phrases in one pass over a text."""
+
+from collections import deque
+
+
+class AhoCorasick:
+    """Finds every occurrence of a fixed set of phrases in linear time.
+
+    Build once with all phrases; ``finditer`` then scans a text a single
+    time regardless of how many phrases there are. Each phrase carries a
+    value (for example its category) that is returned with the match.
+    """
+
+    def __init__(self, phrases):
+        # State 0 is the root; goto[state] maps a character to the next state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> [(phrase length, value), ...]
+        for phrase, value in phrases:
+            self._add(phrase, value)
+        self._build_failure_links()
+
+    def _add(self, phrase, value):
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(phrase), value))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Phrases ending at the fallback state also end here
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def finditer(self, text):
+        """Yield ``(start, end, value)`` for every phrase occurrence."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for length, value in output[state]:
+                    yield index + 1 - length, index + 1, value
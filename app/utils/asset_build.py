@@ -0,0 +1,362 @@
+"""Build step for static assets: minify, fingerprint, precompress.
+
+Run through ``flask --app wsgi build-assets [--vendor] [--vendor-dir DIR]``.
+Output goes to ``static/dist`` with a ``manifest.json`` that
+``app.utils.assets.asset_url`` reads.
+
+With ``--vendor`` Bootstrap and Font Awesome are self-hosted instead of
+loaded from their CDNs. Their CSS is subset to the rules whose class
+names appear in our templates, our JS or Bootstrap's JS (which adds
+classes such as ``show`` at runtime), the Font Awesome webfonts are
+copied alongside, and Bootstrap's JS drops the bundled Popper when no
+template uses dropdowns, tooltips or popovers. ``--vendor-dir`` reads the
+files from a local directory (same file names as on the CDN) for offline
+builds. Class names built by string concatenation in JS are not seen, so
+write them out in full.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import urllib.request
+from urllib.parse import urljoin
+
+from app.utils.assets import DIST_DIR, MANIFEST_NAME, VENDOR_ASSETS
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+SOURCE_ASSETS = ('css/style.css', 'js/app.js')
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ttf', '.json')
+MIN_COMPRESS_BYTES = 256
+BOOTSTRAP_JS_NO_POPPER = 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.min.js'
+POPPER_COMPONENTS = re.compile(r'data-bs-toggle=["\'](?:dropdown|tooltip|popover)|new bootstrap\.(?:Dropdown|Tooltip|Popover)')
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_STRING = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+CSS_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+CSS_PSEUDO_ARGUMENT = re.compile(r'\([^()]*\)')
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+WORD = re.compile(r'[\w-]+')
+# Class name prefixes completed at runtime: `alert-${type}` or 'alert-' + type
+DYNAMIC_PREFIX = re.compile(r'([\w-]+-)(?:\$\{|[\'"]\s*\+)')
+
+
+# CSS
+
+def minify_css(css):
+    """Drop comments and redundant whitespace, leaving strings alone."""
+    strings = []
+
+    def stash(match):
+        strings.append(match.group(0))
+        return f'\0{len(strings) - 1}\0'
+
+    css = CSS_STRING.sub(stash, CSS_COMMENT.sub('', css))
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return re.sub(r'\0(\d+)\0', lambda match: strings[int(match.group(1))], css).strip()
+
+
+def _css_blocks(css):
+    """Split CSS into top-level ``(prelude, body)`` pairs; ``body`` is None for ``@import;``."""
+    blocks = []
+    position = 0
+    length = len(css)
+    while position < length:
+        brace = css.find('{', position)
+        semicolon = css.find(';', position)
+        if brace == -1:
+            break
+        if semicolon != -1 and semicolon < brace and css[position:semicolon].strip().startswith('@'):
+            blocks.append((css[position:semicolon].strip(), None))
+            position = semicolon + 1
+            continue
+        depth = 0
+        index = brace
+        while index < length:
+            char = css[index]
+            if char in '"\'':
+                index = css.find(char, index + 1)
+                if index == -1:
+                    index = length
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            index += 1
+        blocks.append((css[position:brace].strip(), css[brace + 1:index]))
+        position = index + 1
+    return blocks
+
+
+def subset_css(css, used_words, used_prefixes=()):
+    """Keep the rules whose class names are all used.
+
+    A class is used when it is in ``used_words`` or starts with one of
+    ``used_prefixes``.
+    """
+    def used(name):
+        return name in used_words or name.startswith(used_prefixes)
+
+    output = []
+    for prelude, body in _css_blocks(minify_css(css)):
+        if body is None:
+            output.append(prelude + ';')
+        elif prelude.startswith(('@media', '@supports')):
+            inner = subset_css(body, used_words, used_prefixes)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            output.append(f'{prelude}{{{body}}}')  # @font-face, @keyframes, @page ...
+        else:
+            selectors = [selector for selector in prelude.split(',')
+                         if all(used(name) for name in CSS_CLASS.findall(CSS_PSEUDO_ARGUMENT.sub('', selector)))]
+            if selectors:
+                output.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(output)
+
+
+# JavaScript
+
+def minify_js(source):
+    """Strip comments and indentation; line breaks stay so ASI is unaffected.
+
+    Strings, template literals and regular expression literals are copied
+    unchanged.
+    """
+    output = []
+    literals = []
+    index = 0
+    length = len(source)
+
+    def regex_allowed():
+        stripped = ''.join(output).rstrip()
+        if not stripped:
+            return True
+        if stripped[-1] in '(,=:[!&|?{};+-*%<>~^':
+            return True
+        return re.search(r'\b(?:return|typeof|case|do|else|in|of|void|yield|await)$', stripped) is not None
+
+    def keep(end):
+        # Literals are set aside so the whitespace clean-up cannot touch them
+        literals.append(source[index:end])
+        output.append(f'\0{len(literals) - 1}\0')
+        return end
+
+    while index < length:
+        char = source[index]
+        following = source[index + 1] if index + 1 < length else ''
+        if char == '/' and following == '/':
+            end = source.find('\n', index)
+            index = length if end == -1 else end
+        elif char == '/' and following == '*':
+            end = source.find('*/', index + 2)
+            index = length if end == -1 else end + 2
+            output.append(' ')
+        elif char in '"\'`':
+            index = keep(_skip_string(source, index))
+        elif char == '/' and regex_allowed():
+            index = keep(_skip_regex(source, index))
+        else:
+            output.append(char)
+            index += 1
+
+    lines = (re.sub(r'[ \t]+', ' ', line.strip()) for line in ''.join(output).split('\n'))
+    minified = '\n'.join(line for line in lines if line)
+    return re.sub(r'\0(\d+)\0', lambda match: literals[int(match.group(1))], minified)
+
+
+def _skip_string(source, start):
+    """Index just past the string or template literal starting at ``start``."""
+    quote = source[start]
+    index = start + 1
+    while index < len(source):
+        char = source[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == quote:
+            return index + 1
+        if quote == '`' and char == '$' and source[index + 1:index + 2] == '{':
+            index = _skip_template_expression(source, index + 2)
+            continue
+        index += 1
+    return index
+
+
+def _skip_template_expression(source, start):
+    """Index just past the ``}`` closing a ``${`` expression."""
+    depth = 1
+    index = start
+    while index < len(source) and depth:
+        char = source[index]
+        if char in '"\'`':
+            index = _skip_string(source, index)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        index += 1
+    return index
+
+
+def _skip_regex(source, start):
+    """Index just past the regular expression literal (and flags) at ``start``."""
+    index = start + 1
+    in_class = False
+    while index < len(source):
+        char = source[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == '\n':
+            return index
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            index += 1
+            while index < len(source) and source[index].isalpha():
+                index += 1
+            return index
+        index += 1
+    return index
+
+
+# Output
+
+def _fingerprinted(name, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, extension = posixpath.splitext(name)
+    return f'{stem}.{digest}{extension}'
+
+
+def _write(dist, name, content):
+    """Write ``content`` under ``dist`` with its compressed variants; returns sizes."""
+    path = os.path.join(dist, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as output:
+        output.write(content)
+    sizes = {'bytes': len(content)}
+    if name.endswith(COMPRESSIBLE) and len(content) >= MIN_COMPRESS_BYTES:
+        variants = {'gzip': ('.gz', gzip.compress(content, compresslevel=9, mtime=0))}
+        if brotli is not None:
+            variants['br'] = ('.br', brotli.compress(content, quality=11))
+        for encoding, (suffix, compressed) in variants.items():
+            if len(compressed) < len(content):
+                with open(path + suffix, 'wb') as output:
+                    output.write(compressed)
+                sizes[encoding] = len(compressed)
+    return sizes
+
+
+def _fetch(url, vendor_dir):
+    if vendor_dir:
+        with open(os.path.join(vendor_dir, posixpath.basename(url)), 'rb') as local:
+            return local.read()
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+
+def _used_words(static_folder, template_folder, extra=()):
+    """Every word in our templates and scripts, and the dynamic class prefixes."""
+    words = set()
+    prefixes = set()
+    paths = [os.path.join(static_folder, name) for name in SOURCE_ASSETS]
+    for root, _, files in os.walk(template_folder):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith('.html'))
+    for path in paths:
+        with open(path, encoding='utf-8') as source:
+            text = source.read()
+        words.update(WORD.findall(text))
+        prefixes.update(DYNAMIC_PREFIX.findall(text))
+    for text in extra:
+        words.update(WORD.findall(text))
+    return words, tuple(sorted(prefixes))
+
+
+def _templates_use_popper(template_folder, static_folder):
+    for root, _, files in os.walk(template_folder):
+        for name in files:
+            with open(os.path.join(root, name), encoding='utf-8') as template:
+                if POPPER_COMPONENTS.search(template.read()):
+                    return True
+    with open(os.path.join(static_folder, 'js/app.js'), encoding='utf-8') as script:
+        return POPPER_COMPONENTS.search(script.read()) is not None
+
+
+def _build_vendor(dist, manifest, report, static_folder, template_folder, vendor_dir):
+    js_url = VENDOR_ASSETS['vendor/bootstrap.js']
+    if not _templates_use_popper(template_folder, static_folder):
+        js_url = BOOTSTRAP_JS_NO_POPPER
+    bootstrap_js = _fetch(js_url, vendor_dir)
+    used_words, used_prefixes = _used_words(static_folder, template_folder, [bootstrap_js.decode('utf-8')])
+
+    for name in ('vendor/bootstrap.css', 'vendor/fontawesome.css'):
+        url = VENDOR_ASSETS[name]
+        original = _fetch(url, vendor_dir).decode('utf-8')
+        css = subset_css(original, used_words, used_prefixes)
+
+        def copy_font(match):
+            target = match.group(2)
+            if target.startswith('data:'):
+                return match.group(0)
+            font_url = urljoin(url, target)
+            font_name = 'vendor/webfonts/' + posixpath.basename(font_url.split('?')[0].split('#')[0])
+            if font_name not in manifest:
+                font = _fetch(font_url, vendor_dir and os.path.join(vendor_dir, 'webfonts'))
+                manifest[font_name] = _fingerprinted(font_name, font)
+                _write(dist, manifest[font_name], font)
+            suffix = target[len(target.split('?')[0].split('#')[0]):]
+            return f'url({posixpath.relpath(manifest[font_name], posixpath.dirname(name))}{suffix})'
+
+        css = CSS_URL.sub(copy_font, css).encode('utf-8')
+        manifest[name] = _fingerprinted(name, css)
+        report[name] = dict(_write(dist, manifest[name], css), source_bytes=len(original.encode('utf-8')))
+
+    manifest['vendor/bootstrap.js'] = _fingerprinted('vendor/bootstrap.js', bootstrap_js)
+    report['vendor/bootstrap.js'] = dict(_write(dist, manifest['vendor/bootstrap.js'], bootstrap_js),
+                                         source_bytes=len(bootstrap_js))
+
+
+def build_assets(static_folder, template_folder, vendor=False, vendor_dir=None):
+    """Rebuild ``static/dist`` and its manifest; returns sizes per asset."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist)
+    manifest = {}
+    report = {}
+
+    for name in SOURCE_ASSETS:
+        with open(os.path.join(static_folder, name), encoding='utf-8') as source:
+            original = source.read()
+        minified = (minify_css(original) if name.endswith('.css') else minify_js(original)).encode('utf-8')
+        manifest[name] = _fingerprinted(name, minified)
+        report[name] = dict(_write(dist, manifest[name], minified), source_bytes=len(original.encode('utf-8')))
+
+    if vendor:
+        vendor_manifest = {}
+        try:
+            _build_vendor(dist, vendor_manifest, report, static_folder, template_folder, vendor_dir)
+        except OSError as e:  # includes URLError
+            print(f"Vendor assets not built, pages keep using the CDNs: {e}")
+        else:
+            manifest.update(vendor_manifest)
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        manifest_file.write('\n')
+    return report
@@ -0,0 +1,83 @@
+"""Fingerprinted static assets.
+
+``flask --app wsgi build-assets`` (see ``app.utils.asset_build``) writes
+minified, content-hashed copies of our CSS and JS to ``static/dist`` with
+``.gz``/``.br`` variants next to them, plus a ``manifest.json`` mapping
+each logical name to its hashed file. Templates call
+``asset_url('css/style.css')``:
+
+* with a manifest entry the URL is ``/assets/css/style.<hash>.css``,
+  served with a year-long ``immutable`` Cache-Control and the smallest
+  precompressed variant the browser accepts;
+* otherwise it falls back to the plain ``/static`` file, or for vendor
+  libraries to their CDN.
+
+The manifest is ignored in debug mode so edits show up without a rebuild.
+"""
+
+import json
+import mimetypes
+import os
+
+from flask import abort, current_app, request, send_from_directory, url_for
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Vendor libraries: logical name -> CDN URL used when not self-hosted
+VENDOR_ASSETS = {
+    'vendor/bootstrap.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'vendor/bootstrap.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+    'vendor/fontawesome.css': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css',
+}
+
+
+def load_manifest(static_folder):
+    """Read ``static/dist/manifest.json``; empty when assets were not built."""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(name):
+    """URL for a static asset, fingerprinted when it has been built."""
+    manifest = current_app.extensions.get('asset_manifest') or {}
+    built = manifest.get(name)
+    if built:
+        return url_for('serve_asset', filename=built)
+    if name in VENDOR_ASSETS:
+        return VENDOR_ASSETS[name]
+    return url_for('static', filename=name)
+
+
+def serve_asset(filename):
+    """Serve a hashed file from ``static/dist``, precompressed when possible."""
+    if filename == MANIFEST_NAME or filename.endswith(('.gz', '.br')):
+        abort(404)
+    directory = os.path.join(current_app.static_folder, DIST_DIR)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    encoding, suffix = None, ''
+    for candidate, candidate_suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[candidate] and os.path.isfile(os.path.join(directory, filename + candidate_suffix)):
+            encoding, suffix = candidate, candidate_suffix
+            break
+
+    response = send_from_directory(directory, filename + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """Load the asset manifest and register ``asset_url`` and ``/assets``."""
+    app.extensions['asset_manifest'] = {} if app.debug else load_manifest(app.static_folder)
+    app.add_url_rule('/assets/<path:filename>', 'serve_asset', serve_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
@@ -0,0 +1,173 @@
+"""Adaptive circuit breaker for the LLM provider.
+
+The controller watches recent LLM call latencies, errors and the number of
+calls in flight. When the provider slows down or fails, the breaker opens
+and chat handlers answer with their local fallbacks instead of queueing
+behind slow calls. After a cooldown a single probe call is let through
+(half-open); the breaker closes again if the probe is healthy.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class AdaptiveController:
+    """Decides per call whether the LLM may be used."""
+
+    def __init__(self, latency_threshold=4.0, error_rate_threshold=0.5, max_in_flight=8,
+                 cooldown=30.0, min_samples=10, window_seconds=60.0, clock=time.monotonic):
+        self.latency_threshold = latency_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.max_in_flight = max_in_flight
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.window_seconds = window_seconds
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=500)  # (time, latency, ok)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._in_flight = 0
+        self.last_reason = None
+
+    def configure(self, config):
+        """Apply thresholds from the Flask config."""
+        self.latency_threshold = config.get('LLM_LATENCY_THRESHOLD_MS', 4000) / 1000.0
+        self.error_rate_threshold = config.get('LLM_ERROR_RATE_THRESHOLD', 0.5)
+        self.max_in_flight = config.get('LLM_MAX_IN_FLIGHT', 8)
+        self.cooldown = config.get('LLM_BREAKER_COOLDOWN_SECONDS', 30)
+        self.min_samples = config.get('LLM_BREAKER_MIN_SAMPLES', 10)
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return self._in_flight
+
+    def allow(self):
+        """Return ``(allowed, reason)`` for a new LLM call.
+
+        ``reason`` is None when allowed, otherwise ``'circuit_open'`` or
+        ``'overloaded'``. When half-open only one probe is allowed at a time.
+        """
+        with self._lock:
+            if self._state == OPEN:
+                if self.clock() - self._opened_at < self.cooldown:
+                    return False, 'circuit_open'
+                self._state = HALF_OPEN
+
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    return False, 'circuit_open'
+                self._probe_in_flight = True
+                return True, None
+
+            if self.max_in_flight and self._in_flight >= self.max_in_flight:
+                return False, 'overloaded'
+            return True, None
+
+    @contextmanager
+    def track(self):
+        """Count a call as in flight and record its latency and outcome."""
+        with self._lock:
+            self._in_flight += 1
+        started = self.clock()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(self.clock() - started, ok)
+
+    def latency_percentile(self, fraction, min_samples=1):
+        """Recent successful-call latency percentile in seconds, or None without enough samples."""
+        with self._lock:
+            latencies = [sample[1] for sample in self._samples if sample[2]]
+        if len(latencies) < max(1, min_samples):
+            return None
+        return percentile(latencies, fraction)
+
+    def record(self, latency, ok):
+        """Record a finished call and update the breaker state."""
+        now = self.clock()
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+            if self._state == HALF_OPEN and self._probe_in_flight:
+                self._probe_in_flight = False
+                if ok and latency <= self.latency_threshold:
+                    self._state = CLOSED
+                    self._samples.clear()
+                    self.last_reason = None
+                else:
+                    self._open(now, 'probe_failed')
+                return
+
+            self._samples.append((now, latency, ok))
+            while self._samples and now - self._samples[0][0] > self.window_seconds:
+                self._samples.popleft()
+
+            if self._state != CLOSED or len(self._samples) < self.min_samples:
+                return
+
+            latencies = [sample[1] for sample in self._samples]
+            errors = sum(1 for sample in self._samples if not sample[2])
+            if errors / len(self._samples) >= self.error_rate_threshold:
+                self._open(now, 'error_rate')
+            elif percentile(latencies, 0.95) > self.latency_threshold:
+                self._open(now, 'latency')
+
+    def _open(self, now, reason):
+        self._state = OPEN
+        self._opened_at = now
+        self.last_reason = reason
+
+    def reset(self):
+        """Close the breaker and forget recent calls."""
+        with self._lock:
+            self._state = CLOSED
+            self._samples.clear()
+            self._probe_in_flight = False
+            self.last_reason = None
+
+    def snapshot(self):
+        """Current state and recent latency percentiles."""
+        with self._lock:
+            latencies = [sample[1] for sample in self._samples]
+            errors = sum(1 for sample in self._samples if not sample[2])
+            return {
+                'state': self._state,
+                'reason': self.last_reason,
+                'in_flight': self._in_flight,
+                'samples': len(latencies),
+                'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+                'error_rate': round(errors / len(latencies), 3) if latencies else 0.0,
+            }
+
+
+# Shared controller for this worker process
+llm_controller = AdaptiveController()
@@ -0,0 +1,102 @@
+"""Request deadlines and hedged calls.
+
+A ``Deadline`` is created when a request starts and passed down to the
+code that makes slow upstream calls, so each call only gets the time the
+request has left. ``hedged_call`` optionally races a second attempt
+against a slow first one.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class DeadlineExceeded(Exception):
+    """Raised when there is not enough time left to start or finish a call."""
+
+    reason = 'deadline'
+
+
+class Deadline:
+    """Absolute point in time by which a request must be answered."""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        """Seconds left (never negative)."""
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def budget(self, reserve=0.0, cap=None, minimum=0.0):
+        """Time available for one call.
+
+        Keeps ``reserve`` seconds for the work after the call, caps the
+        result at ``cap`` and raises DeadlineExceeded when less than
+        ``minimum`` would be left.
+        """
+        available = self.remaining() - reserve
+        if cap is not None:
+            available = min(available, cap)
+        if available <= minimum:
+            raise DeadlineExceeded('not enough time left for the call')
+        return available
+
+
+_hedge_executor = None
+_hedge_lock = threading.Lock()
+
+
+def _get_executor():
+    global _hedge_executor
+    with _hedge_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='hedge')
+        return _hedge_executor
+
+
+def hedged_call(fn, hedge_delay, timeout, on_hedge=None):
+    """Call ``fn(attempt)`` and start a second attempt if the first is slow.
+
+    The second attempt starts after ``hedge_delay`` seconds if the first has
+    not finished; the first successful result wins. Returns
+    ``(result, attempt)``. If both attempts fail the last error is raised;
+    if neither finishes within ``timeout`` seconds DeadlineExceeded is
+    raised. A losing attempt is not cancelled, it runs to completion (or its
+    own timeout) in the background.
+    """
+    executor = _get_executor()
+    started = time.monotonic()
+    attempts = {executor.submit(fn, 0): 0}
+    pending = set(attempts)
+    error = None
+    hedged = False
+
+    while pending:
+        remaining = timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+
+        wait_for = remaining if hedged else min(remaining, max(0.0, hedge_delay - (time.monotonic() - started)))
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result(), attempts[future]
+            except Exception as e:
+                error = e
+
+        # Hedge once: after the delay, or right away if the first attempt failed
+        if not hedged and time.monotonic() - started < timeout:
+            hedged = True
+            if on_hedge:
+                on_hedge()
+            future = executor.submit(fn, 1)
+            attempts[future] = 1
+            pending.add(future)
+
+    if pending or error is None:
+        raise DeadlineExceeded('no attempt finished before the deadline')
+    raise error
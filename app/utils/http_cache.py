@@ -0,0 +1,168 @@
+"""Conditional GETs and compression for read-mostly JSON endpoints.
+
+``http_cached(Model, ...)`` wraps a GET view whose output depends only on
+those tables and the query string. Before the view runs, one aggregate
+query reads each table's row count and latest ``updated_at``; the strong
+ETag is a hash of that version stamp, the path and the query string.
+
+* ``If-None-Match`` with the current ETag gets a 304 straight away.
+* Otherwise the body is served from a small per-process cache keyed by the
+  ETag, or the view runs and its JSON is cached.
+* Bodies over ``HTTP_COMPRESS_MIN_BYTES`` are sent gzip- or, when the
+  ``brotli`` package is installed, brotli-encoded. Each encoding has its
+  own ETag (``"<tag>-gzip"``) and is compressed once per version.
+
+The stamp comes from the database, so every worker sees another worker's
+writes on the next request. Writes must bump ``updated_at`` (the models'
+``onupdate`` does) or change the row count.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import func, select
+
+from app import db
+from app.utils.metrics import http_cache_responses_total
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+
+def get_table_versions(*models):
+    """``(max updated_at, version stamp)`` for the tables behind ``models``."""
+    columns = []
+    for model in models:
+        columns.append(select(func.count()).select_from(model.__table__).scalar_subquery())
+        columns.append(select(func.max(model.__table__.c.updated_at)).scalar_subquery())
+    row = db.session.execute(select(*columns)).one()
+    last_modified = max((value for value in row[1::2] if value is not None), default=None)
+    return last_modified, '|'.join(str(value) for value in row)
+
+
+class ResponseCache:
+    """Bounded LRU of JSON bodies and their compressed variants, by ETag."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tag):
+        with self._lock:
+            entry = self._entries.get(tag)
+            if entry is not None:
+                self._entries.move_to_end(tag)
+            return entry
+
+    def put(self, tag, body, mimetype):
+        entry = {'identity': body, 'mimetype': mimetype}
+        with self._lock:
+            self._entries[tag] = entry
+            self._entries.move_to_end(tag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+def _choose_encoding(size):
+    if size < current_app.config.get('HTTP_COMPRESS_MIN_BYTES', 500):
+        return 'identity'
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return 'identity'
+
+
+def _encoded_body(entry, encoding):
+    body = entry.get(encoding)
+    if body is None:
+        if encoding == 'br':
+            body = brotli.compress(entry['identity'], quality=5)
+        else:
+            body = gzip.compress(entry['identity'], compresslevel=6)
+        entry[encoding] = body  # the same bytes whichever thread wins
+    return body
+
+
+def _set_cache_headers(response, tag, last_modified, public):
+    response.set_etag(tag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.vary.add('Accept-Encoding')
+    if public:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 60)
+    else:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+
+def http_cached(*models, public=False, uncached_args=()):
+    """Serve a GET view with ETags, 304s, compression and a per-ETag body cache.
+
+    ``public`` responses may be stored by browsers and shared caches for
+    ``HTTP_CACHE_MAX_AGE`` seconds; others must be revalidated each time.
+    Requests with any of ``uncached_args`` in the query string (answers
+    that depend on more than the tables) go straight to the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if (request.method != 'GET' or not current_app.config.get('HTTP_CACHE_ENABLED', True)
+                    or any(name in request.args for name in uncached_args)):
+                return view(*args, **kwargs)
+
+            last_modified, version = get_table_versions(*models)
+            key = f'{request.path}?{sorted(request.args.items(multi=True))}|{version}'
+            tag = hashlib.sha1(key.encode()).hexdigest()
+            endpoint = request.endpoint
+
+            variants = {'identity': tag, 'gzip': f'{tag}-gzip', 'br': f'{tag}-br'}
+            matched = next((variant for variant in variants.values()
+                            if request.if_none_match.contains_weak(variant)), None)
+            if matched or request.if_none_match.star_tag:
+                response = current_app.response_class(status=304)
+                _set_cache_headers(response, matched or tag, last_modified, public)
+                http_cache_responses_total.inc(endpoint=endpoint, result='not_modified')
+                return response
+
+            entry = response_cache.get(tag)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry = response_cache.put(tag, response.get_data(), response.mimetype)
+                http_cache_responses_total.inc(endpoint=endpoint, result='miss')
+            else:
+                http_cache_responses_total.inc(endpoint=endpoint, result='hit')
+
+            encoding = _choose_encoding(len(entry['identity']))
+            body = entry['identity'] if encoding == 'identity' else _encoded_body(entry, encoding)
+            response = current_app.response_class(body, mimetype=entry['mimetype'])
+            if encoding != 'identity':
+                response.content_encoding = encoding
+            _set_cache_headers(response, variants[encoding], last_modified, public)
+            return response
+        return wrapper
+    return decorator
+
+
+def init_http_cache(app):
+    """Size the per-process response cache from the config."""
+    response_cache.max_entries = app.config.get('HTTP_CACHE_MAX_ENTRIES', 256)
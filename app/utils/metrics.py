@@ -0,0 +1,269 @@
+"""Request-level performance metrics with Prometheus text exposition.
+
+Metrics are kept in process memory; each gunicorn worker exposes its own
+values, so scrape every worker or aggregate them upstream.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(label_names, label_values, extra=None):
+    """Render a Prometheus label set."""
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    rendered = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + rendered + '}'
+
+
+def _format_value(value):
+    """Render a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name + _format_labels(self.label_names, key), value
+
+
+class Histogram:
+    """Cumulative histogram with optional labels."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, ([*entry[0]], entry[1], entry[2])) for key, entry in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ('le', _format_value(float(bound))))
+                yield self.name + '_bucket' + labels, cumulative
+            yield self.name + '_sum' + _format_labels(self.label_names, key), total
+            yield self.name + '_count' + _format_labels(self.label_names, key), count
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, label_names=()):
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for sample_name, value in metric.samples():
+                lines.append(f'{sample_name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    'http_requests_total', 'Total HTTP requests.', ('method', 'endpoint', 'status'))
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency.', ('method', 'endpoint'))
+db_queries_total = registry.counter(
+    'db_queries_total', 'Database queries executed, by endpoint.', ('endpoint',))
+db_query_duration_total = registry.counter(
+    'db_query_duration_seconds_total', 'Time spent in database queries, by endpoint.', ('endpoint',))
+db_queries_per_request = registry.histogram(
+    'db_queries_per_request', 'Database queries issued per request.', ('endpoint',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+chat_intent_duration = registry.histogram(
+    'chatbot_intent_duration_seconds', 'Chat request latency, by detected intent.', ('intent',))
+llm_request_duration = registry.histogram(
+    'llm_request_duration_seconds', 'LLM call latency.', ('provider', 'model', 'intent', 'outcome'))
+llm_tokens_total = registry.counter(
+    'llm_tokens_total', 'LLM tokens used.', ('model', 'kind'))
+calendar_request_duration = registry.histogram(
+    'calendar_api_duration_seconds', 'Google Calendar API call latency.', ('operation', 'outcome'))
+slow_requests_total = registry.counter(
+    'http_slow_requests_total', 'Requests slower than SLOW_REQUEST_THRESHOLD_MS.', ('endpoint',))
+llm_calls_coalesced_total = registry.counter(
+    'llm_calls_coalesced_total', 'LLM calls served by waiting on an identical in-flight call.')
+chat_responses_total = registry.counter(
+    'chat_responses_total', 'Chat responses by mode (llm, local, degraded, fast_path).', ('mode',))
+llm_hedges_total = registry.counter(
+    'llm_hedges_total', 'Hedged LLM attempts sent, and how many of them won.', ('outcome',))
+fast_path_requests_total = registry.counter(
+    'chat_fast_path_requests_total', 'Chat messages looked up in the precomputed answer table.', ('outcome',))
+chat_emergencies_total = registry.counter(
+    'chat_emergencies_total', 'Chat messages answered with the urgent-care response, by red-flag category.', ('category',))
+http_cache_responses_total = registry.counter(
+    'http_cache_responses_total', 'Conditional JSON endpoint responses (not_modified, hit, miss).', ('endpoint', 'result'))
+
+
+def _current_endpoint():
+    """Get the endpoint label for the current request."""
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'none'
+
+
+def set_chat_intent(intent):
+    """Record the detected chatbot intent for the current request."""
+    if has_request_context():
+        g.metrics_chat_intent = intent
+
+
+def get_chat_intent():
+    """Get the detected chatbot intent for the current request, if any."""
+    if has_request_context():
+        return g.get('metrics_chat_intent', 'none')
+    return 'none'
+
+
+def observe_llm_call(model, duration, outcome='ok', usage=None, intent=None, provider='openai'):
+    """Record latency and token usage for one LLM call.
+
+    ``usage`` is a dict with ``prompt_tokens``, ``cached_tokens`` and
+    ``completion_tokens`` (see ``prompt_builder.extract_usage``). ``intent``
+    defaults to the current request's intent; pass it explicitly from
+    worker threads.
+    """
+    llm_request_duration.observe(duration, provider=provider, model=model, intent=intent or get_chat_intent(), outcome=outcome)
+    if usage:
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        cached_tokens = usage.get('cached_tokens', 0)
+        llm_tokens_total.inc(prompt_tokens - cached_tokens, model=model, kind='prompt_uncached')
+        llm_tokens_total.inc(cached_tokens, model=model, kind='prompt_cached')
+        llm_tokens_total.inc(usage.get('completion_tokens', 0), model=model, kind='completion')
+
+
+def observe_calendar_call(operation, duration, outcome='ok'):
+    """Record latency for one Google Calendar API call."""
+    calendar_request_duration.observe(duration, operation=operation, outcome=outcome)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    endpoint = _current_endpoint()
+    db_queries_total.inc(endpoint=endpoint)
+    db_query_duration_total.inc(duration, endpoint=endpoint)
+    if has_request_context():
+        g.metrics_db_queries = g.get('metrics_db_queries', 0) + 1
+        g.metrics_db_time = g.get('metrics_db_time', 0.0) + duration
+
+
+def init_metrics(app):
+    """Install request timing hooks and database query listeners."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+
+        duration = time.perf_counter() - start
+        endpoint = _current_endpoint()
+        db_queries = g.get('metrics_db_queries', 0)
+        db_time = g.get('metrics_db_time', 0.0)
+
+        http_requests_total.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        http_request_duration.observe(duration, method=request.method, endpoint=endpoint)
+        db_queries_per_request.observe(db_queries, endpoint=endpoint)
+
+        intent = g.get('metrics_chat_intent')
+        if intent:
+            chat_intent_duration.observe(duration, intent=intent)
+
+        threshold_ms = app.config.get('SLOW_REQUEST_THRESHOLD_MS')
+        if threshold_ms and duration * 1000 >= threshold_ms:
+            slow_requests_total.inc(endpoint=endpoint)
+            app.logger.warning(
+                'Slow request: %s %s endpoint=%s status=%s duration_ms=%.1f db_queries=%d db_ms=%.1f intent=%s',
+                request.method, request.path, endpoint, response.status_code,
+                duration * 1000, db_queries, db_time * 1000, intent or '-'
+            )
+
+        return response
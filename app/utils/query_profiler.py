@@ -0,0 +1,232 @@
+"""Per-request SQL profiler and N+1 query detector.
+
+Enable it for development with ``SQL_PROFILER_ENABLED=true``. Each request
+then counts its queries, groups repeated statements and reports when the
+configured budgets are exceeded, either by logging or by raising
+``QueryBudgetExceeded``.
+
+The same profiler can pin query counts from a test or a script::
+
+    with assert_max_queries(4):
+        client.post('/api/chat', json={'message': 'hello'})
+
+    with profile_queries() as profile:
+        client.get('/admin/doctors')
+    print(profile.count, profile.repeated_statements())
+"""
+
+import os
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a profiled block issues more queries than allowed."""
+
+
+class QueryProfile:
+    """Queries recorded while a profile is active."""
+
+    def __init__(self, name='block'):
+        self.name = name
+        self.queries = []  # (statement, parameters, duration, stack)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(query[2] for query in self.queries)
+
+    def record(self, statement, parameters, duration, stack):
+        self.queries.append((statement, parameters, duration, stack))
+
+    def repeated_statements(self, min_count=2):
+        """Statements issued at least ``min_count`` times (N+1 candidates).
+
+        Returns ``{statement: count}`` keyed on the parameterized SQL, so the
+        same lookup run once per row of a parent query is grouped together.
+        """
+        counts = {}
+        for statement, _, _, _ in self.queries:
+            counts[statement] = counts.get(statement, 0) + 1
+        return {statement: count for statement, count in counts.items() if count >= min_count}
+
+    def duplicate_queries(self):
+        """Identical statements with identical parameters run more than once."""
+        counts = {}
+        for statement, parameters, _, _ in self.queries:
+            key = (statement, repr(parameters))
+            counts[key] = counts.get(key, 0) + 1
+        return {key: count for key, count in counts.items() if count > 1}
+
+    def folded_stacks(self):
+        """Render a flamegraph-compatible folded stack breakdown.
+
+        Each line is ``frame;frame;...;statement microseconds`` and can be fed
+        to flamegraph.pl or loaded in speedscope.
+        """
+        totals = {}
+        for statement, _, duration, stack in self.queries:
+            label = ' '.join(statement.split())[:80].replace(';', ',')
+            key = ';'.join(list(stack) + [label])
+            totals[key] = totals.get(key, 0) + duration
+        return '\n'.join(f'{key} {int(value * 1_000_000)}' for key, value in sorted(totals.items()))
+
+    def summary(self):
+        """Short dictionary summary for logging or JSON output."""
+        return {
+            'name': self.name,
+            'count': self.count,
+            'total_time_ms': round(self.total_time * 1000, 3),
+            'repeated': self.repeated_statements(),
+            'duplicates': len(self.duplicate_queries()),
+        }
+
+
+def _active_profiles():
+    profiles = getattr(_local, 'profiles', None)
+    if profiles is None:
+        profiles = _local.profiles = []
+    return profiles
+
+
+def _app_stack():
+    """Call stack limited to frames inside the app package."""
+    frames = []
+    for frame in traceback.extract_stack()[:-3]:
+        if frame.filename.startswith(_APP_ROOT) and not frame.filename.endswith('query_profiler.py'):
+            module = os.path.relpath(frame.filename, os.path.dirname(_APP_ROOT))
+            frames.append(f'{module}:{frame.name}:{frame.lineno}')
+    return frames
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profiles():
+        conn.info.setdefault('profiler_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profiles = _active_profiles()
+    starts = conn.info.get('profiler_query_start')
+    if not profiles or not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stack = _app_stack()
+    for profile in profiles:
+        profile.record(statement, parameters, duration, stack)
+
+
+def _install_listeners():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+@contextmanager
+def profile_queries(name='block'):
+    """Record every query issued on this thread inside the block."""
+    _install_listeners()
+    profile = QueryProfile(name)
+    profiles = _active_profiles()
+    profiles.append(profile)
+    try:
+        yield profile
+    finally:
+        profiles.remove(profile)
+
+
+@contextmanager
+def assert_max_queries(max_queries, max_repeated=None):
+    """Raise QueryBudgetExceeded if the block issues too many queries.
+
+    ``max_repeated`` additionally caps how often a single statement may be
+    repeated, which catches N+1 patterns even when the total is small.
+    """
+    with profile_queries('assert_max_queries') as profile:
+        yield profile
+    problems = check_budget(profile, max_queries, max_repeated)
+    if problems:
+        raise QueryBudgetExceeded('; '.join(problems))
+
+
+def check_budget(profile, max_queries=None, max_repeated=None):
+    """Return a list of budget violations for a profile."""
+    problems = []
+    if max_queries is not None and profile.count > max_queries:
+        problems.append(f'{profile.count} queries (limit {max_queries})')
+    if max_repeated is not None:
+        for statement, count in profile.repeated_statements(max_repeated + 1).items():
+            problems.append(f'statement repeated {count} times (limit {max_repeated}): {" ".join(statement.split())[:200]}')
+    return problems
+
+
+def _write_folded(app, profile):
+    """Write the folded stack breakdown of a request profile to disk."""
+    output_dir = app.config.get('SQL_PROFILER_OUTPUT_DIR')
+    if not output_dir or not profile.queries:
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    filename = '{}-{}.folded'.format(
+        profile.name.replace('.', '_'),
+        datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    )
+    with open(os.path.join(output_dir, filename), 'w') as handle:
+        handle.write(profile.folded_stacks() + '\n')
+
+
+def init_query_profiler(app):
+    """Profile every request when SQL_PROFILER_ENABLED is set."""
+    if not app.config.get('SQL_PROFILER_ENABLED'):
+        return
+
+    _install_listeners()
+
+    @app.before_request
+    def _start_query_profile():
+        profile = QueryProfile(request.endpoint or 'unmatched')
+        _active_profiles().append(profile)
+        g.query_profile = profile
+
+    @app.after_request
+    def _check_query_profile(response):
+        profile = g.pop('query_profile', None)
+        if profile is None:
+            return response
+        if profile in _active_profiles():
+            _active_profiles().remove(profile)
+
+        response.headers['X-Query-Count'] = str(profile.count)
+        response.headers['X-Query-Time-Ms'] = f'{profile.total_time * 1000:.2f}'
+        _write_folded(app, profile)
+
+        problems = check_budget(
+            profile,
+            app.config.get('SQL_PROFILER_MAX_QUERIES'),
+            app.config.get('SQL_PROFILER_MAX_REPEATED')
+        )
+        if problems:
+            message = 'Query budget exceeded for {} {} ({}): {}'.format(
+                request.method, request.path, profile.name, '; '.join(problems))
+            if app.config.get('SQL_PROFILER_RAISE'):
+                raise QueryBudgetExceeded(message)
+            app.logger.warning(message)
+
+        return response
+
+    @app.teardown_request
+    def _discard_query_profile(exc):
+        profile = g.pop('query_profile', None)
+        if profile is not None and profile in _active_profiles():
+            _active_profiles().remove(profile)
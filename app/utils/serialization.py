@@ -0,0 +1,178 @@
+"""Fast JSON for list endpoints.
+
+Two pieces:
+
+* ``FastJSONProvider`` encodes the list endpoints' responses. It uses
+  ``orjson`` when that package is installed (``JSON_ORJSON_ENABLED``) and
+  the standard library otherwise. Both write dates and datetimes as ISO
+  8601, the format the models' ``to_dict()`` already use, so views can
+  hand over raw column values, and keep keys in ``to_dict()`` order.
+  Other views keep Flask's own provider and its output.
+* ``ModelSerializer`` serves a list endpoint without building ORM
+  objects: ``select(fields)`` is a query for just the chosen columns, and
+  ``dump(rows, fields)`` turns the row tuples into dicts with a function
+  built once per field list. ``list_response`` does both for a view
+  and honours ``?fields=id,email``, limited to the fields ``to_dict()``
+  exposes.
+"""
+
+import dataclasses
+import decimal
+import uuid
+from datetime import date, time
+
+from flask import current_app, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+
+from app import db
+from app.models import AftercareInstruction, Appointment, ChatSession, FAQ, Patient
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+def _default(obj):
+    """Encode what JSON has no type for, as the models' ``to_dict()`` would."""
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with a standard-library fallback."""
+
+    default = staticmethod(_default)
+    sort_keys = False  # clients never relied on sorted keys; sorting 10k dicts is not free
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get('JSON_ORJSON_ENABLED', True)
+
+    def _encode(self, obj, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits and the like: let the stdlib try
+            dump_args = {'indent': 2} if indent else {'separators': (',', ':')}
+            return super().dumps(obj, **dump_args).encode()
+
+    def dumps(self, obj, **kwargs):
+        if not self.use_orjson or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if not self.use_orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._encode(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+class ModelSerializer:
+    """Column-projected queries and cached row-to-dict functions for a model.
+
+    ``fields`` are the keys of the model's ``to_dict()``, in order; each
+    must be a column. Values are returned as the database driver gives
+    them and left to the JSON provider to encode.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        self.columns = {name: model.__table__.c[name] for name in self.fields}
+        self._compiled = {}
+
+    def parse_fields(self, raw):
+        """Fields from a ``fields=a,b`` query value; all of them when empty.
+
+        Raises ``ValueError`` naming any field the model does not expose.
+        """
+        if not raw:
+            return self.fields
+        fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in fields if name not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+        return fields or self.fields
+
+    def select(self, fields=None):
+        """``SELECT`` of just ``fields``; add filters and ordering as usual."""
+        return select(*(self.columns[name] for name in fields or self.fields))
+
+    def compile(self, fields=None):
+        """``row -> dict`` for ``fields``, built once per field list."""
+        fields = tuple(fields or self.fields)
+        function = self._compiled.get(fields)
+        if function is None:
+            def function(row, keys=fields):
+                return dict(zip(keys, row))
+            self._compiled[fields] = function
+        return function
+
+    def dump(self, rows, fields=None):
+        """List of dicts for rows from ``select(fields)``."""
+        return list(map(self.compile(fields), rows))
+
+    def list_response(self, *criteria, order_by=None, limit=None):
+        """JSON list of the rows matching ``criteria``, honouring ``?fields=``."""
+        try:
+            fields = self.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        statement = self.select(fields).where(*criteria)
+        if order_by is not None:
+            statement = statement.order_by(order_by)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return json_response(self.dump(db.session.execute(statement).all(), fields))
+
+
+patient_serializer = ModelSerializer(Patient, (
+    'id', 'first_name', 'last_name', 'email', 'phone', 'date_of_birth', 'gender', 'address',
+    'emergency_contact', 'emergency_phone', 'insurance_provider', 'insurance_number',
+    'preferred_language', 'created_at'))
+
+appointment_serializer = ModelSerializer(Appointment, (
+    'id', 'patient_id', 'doctor_id', 'appointment_date', 'appointment_type', 'status',
+    'reason_for_visit', 'symptoms', 'notes', 'created_at'))
+
+faq_serializer = ModelSerializer(FAQ, (
+    'id', 'category', 'question', 'answer', 'language', 'is_active'))
+
+aftercare_serializer = ModelSerializer(AftercareInstruction, (
+    'id', 'title', 'treatment_type', 'instructions', 'precautions', 'follow_up_timeline',
+    'emergency_signs', 'language'))
+
+chat_session_serializer = ModelSerializer(ChatSession, (
+    'id', 'session_id', 'patient_id', 'language', 'status', 'flagged_reason', 'flagged_at',
+    'created_at', 'updated_at'))
+
+
+def json_response(data):
+    """JSON response for ``data``, encoded by the app's ``FastJSONProvider``."""
+    return current_app.extensions['fast_json'].response(data)
+
+
+def init_serialization(app):
+    """Create the ``FastJSONProvider`` the list endpoints encode with."""
+    app.extensions['fast_json'] = FastJSONProvider(app)
@@ -0,0 +1,77 @@
+"""Coalesce identical concurrent calls into one.
+
+The first caller for a key runs the function; callers that arrive with the
+same key while it is still running wait for that call and receive the same
+result (or exception). Nothing is cached once the call finishes.
+"""
+
+import hashlib
+import json
+import threading
+
+
+class _Call:
+    """One in-flight call shared by its leader and any followers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Thread-safe single-flight group for one process."""
+
+    def __init__(self, on_coalesced=None):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.on_coalesced = on_coalesced
+
+    def do(self, key, fn, timeout=None):
+        """Run ``fn()`` once for all concurrent callers with the same key.
+
+        Returns ``(result, shared)`` where ``shared`` is True for callers that
+        waited on another caller's call. Waiting callers give up with
+        TimeoutError after ``timeout`` seconds.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            if self.on_coalesced:
+                self.on_coalesced()
+            if not call.done.wait(timeout):
+                raise TimeoutError('timed out waiting for an in-flight call')
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result, call.waiters > 0
+
+    def in_flight(self):
+        """Number of distinct calls currently running."""
+        with self._lock:
+            return len(self._calls)
+
+
+def request_key(*parts, **params):
+    """Stable key for a call from its positional parts and keyword parameters."""
+    payload = json.dumps([parts, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
@@ -0,0 +1,74 @@
+"""In-process caches that are rebuilt when database content changes.
+
+A ``VersionStamp`` wraps a query that returns a version stamp (row counts
+and latest ``updated_at`` of some tables) and re-runs it at most every
+``check_interval`` seconds. Stamps are module-level and shared, so the
+retrieval index, aftercare catalog, fast-path tables, doctor index and
+prompt prefix together cost one version query per interval, not one each.
+
+A ``VersionedCache`` holds values built per key and drops them all when
+its version (usually one or more stamps) changes.
+"""
+
+import threading
+import time
+
+_MISSING = object()
+
+
+class VersionStamp:
+    """A database version stamp, re-read at most every ``check_interval`` seconds."""
+
+    def __init__(self, loader, check_interval=30):
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._checked_at = 0
+
+    def get(self):
+        now = time.monotonic()
+        value = self._value
+        if value is None or now - self._checked_at >= self.check_interval:
+            value = self.loader()
+            with self._lock:
+                self._value = value
+                self._checked_at = now
+        return value
+
+    def reset(self):
+        """Re-read the stamp on next use."""
+        with self._lock:
+            self._value = None
+
+
+class VersionedCache:
+    """Values built on demand per key, dropped when ``version()`` changes."""
+
+    def __init__(self, version):
+        self.version = version
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+
+    def get(self, key, build):
+        """The value for ``key``, calling ``build()`` if the current version lacks it."""
+        version = self.version()
+        with self._lock:
+            if version != self._version:
+                self._entries = {}
+                self._version = version
+            value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            with self._lock:
+                # Data may have changed while building; keep it only for its own version
+                if self._version == version:
+                    self._entries[key] = value
+        return value
+
+    def invalidate(self):
+        """Rebuild every value on next use."""
+        with self._lock:
+            self._entries = {}
+            self._version = None
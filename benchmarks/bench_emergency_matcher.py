@@ -0,0 +1,123 @@
+"""Accuracy and latency of the emergency red-flag matcher.
+
+Usage:
+    python -m benchmarks.bench_emergency_matcher [--iterations 2000] [--json]
+
+Scores the matcher against the labeled corpus in
+``benchmarks/data/emergency_corpus.jsonl`` (one ``{"text", "language",
+"emergency"}`` object per line), then measures how long matching takes per
+message and how much it adds to ChatbotService.process_message for
+ordinary (non-emergency) messages, with no LLM configured.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks.common import create_bench_app, seed_knowledge_base, summarize_latencies, timed
+from app.services.chatbot_service import ChatbotService
+from app.services.emergency_service import emergency_matcher
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'emergency_corpus.jsonl')
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding='utf-8') as corpus_file:
+        return [json.loads(line) for line in corpus_file if line.strip()]
+
+
+def score(corpus):
+    """Confusion counts overall and per language, plus the misclassified rows."""
+    by_language = {}
+    errors = []
+    for row in corpus:
+        predicted = bool(emergency_matcher.match(row['text']))
+        counts = by_language.setdefault(row['language'], {'tp': 0, 'fp': 0, 'tn': 0, 'fn': 0})
+        key = ('t' if predicted == row['emergency'] else 'f') + ('p' if predicted else 'n')
+        counts[key] += 1
+        if predicted != row['emergency']:
+            errors.append(row)
+
+    total = {key: sum(counts[key] for counts in by_language.values()) for key in ('tp', 'fp', 'tn', 'fn')}
+    for counts in list(by_language.values()) + [total]:
+        counts['precision'] = round(counts['tp'] / ((counts['tp'] + counts['fp']) or 1), 3)
+        counts['recall'] = round(counts['tp'] / ((counts['tp'] + counts['fn']) or 1), 3)
+    return {'total': total, 'by_language': by_language, 'errors': errors}
+
+
+def matcher_latency(messages, iterations):
+    """Mean microseconds per match call over the messages."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            emergency_matcher.match(message)
+    return (time.perf_counter() - started) / (iterations * len(messages)) * 1e6
+
+
+def chat_overhead(app, messages, rounds=20):
+    """process_message latency for ordinary messages with detection on and off."""
+    results = {}
+    with app.app_context():
+        seed_knowledge_base()
+        service = ChatbotService()
+        for enabled in (False, True, False, True):
+            app.config['EMERGENCY_DETECTION_ENABLED'] = enabled
+            samples_ms = []
+            for _ in range(rounds):
+                for message in messages:
+                    with app.test_request_context():
+                        _, elapsed_ms = timed(service.process_message, message, 'bench-emergency', 'en')
+                    samples_ms.append(elapsed_ms)
+            # Second pass of each setting is the measured one (first warms caches)
+            results['enabled' if enabled else 'disabled'] = summarize_latencies(samples_ms)
+    return results
+
+
+def run(iterations):
+    corpus = load_corpus()
+    normal = [row['text'] for row in corpus if not row['emergency']]
+    urgent = [row['text'] for row in corpus if row['emergency']]
+
+    app = create_bench_app()
+    app.config.update(OPENAI_API_KEY=None, LLM_PROVIDERS='')
+    return {
+        'corpus_size': len(corpus),
+        'accuracy': score(corpus),
+        'matcher_us': {
+            'normal_messages': round(matcher_latency(normal, iterations), 2),
+            'emergency_messages': round(matcher_latency(urgent, iterations), 2),
+        },
+        'process_message_ms': chat_overhead(app, [text for text in normal if text.isascii()]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000, help='passes over the corpus for matcher timing')
+    parser.add_argument('--json', action='store_true', help='print machine-readable JSON')
+    args = parser.parse_args()
+
+    result = run(args.iterations)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+
+    accuracy = result['accuracy']
+    print(f"Corpus: {result['corpus_size']} labeled messages")
+    print(f"{'language':<10} {'tp':>4} {'fp':>4} {'tn':>4} {'fn':>4} {'precision':>10} {'recall':>8}")
+    for language, counts in sorted(accuracy['by_language'].items()) + [('all', accuracy['total'])]:
+        print(f"{language:<10} {counts['tp']:>4} {counts['fp']:>4} {counts['tn']:>4} {counts['fn']:>4} "
+              f"{counts['precision']:>10.3f} {counts['recall']:>8.3f}")
+    for row in accuracy['errors']:
+        print(f"  misclassified ({'emergency' if row['emergency'] else 'normal'}): {row['text']}")
+
+    print(f"\nMatcher: {result['matcher_us']['normal_messages']:.1f}us per normal message, "
+          f"{result['matcher_us']['emergency_messages']:.1f}us per emergency message")
+    print("process_message on normal messages (no LLM):")
+    for name, row in result['process_message_ms'].items():
+        print(f"  detection {name:<9} p50 {row['p50_ms']:.3f}ms  p95 {row['p95_ms']:.3f}ms  mean {row['mean_ms']:.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""Microbenchmarks for the chat, calendar and language hot paths.
+
+Usage:
+    python -m benchmarks.bench_hot_paths [--scales 10,1000,100000] [--max-time 1.0]
+        [--filter faq] [--json] [--save-baseline] [--compare [PATH]] [--max-regression 30]
+
+Each benchmark is timed the way pytest-benchmark does it: the number of
+calls per round is calibrated so a round takes at least a couple of
+milliseconds, then rounds are repeated for ``--max-time`` seconds (at
+least ``--min-rounds``) and min/median/mean/stddev per call are reported.
+
+Data-dependent functions run at every scale against in-memory SQLite:
+``_handle_faq`` with that many FAQs, ``_get_conversation_context`` with
+that many messages in the session, and ``get_available_slots`` with that
+many appointments on the calendar (served by an in-process stand-in for
+the Calendar API, so only the app's own work is timed). The others are
+timed once.
+
+``--save-baseline`` writes the medians to ``benchmarks/data/
+hot_paths_baseline.json``; ``--compare`` reports each benchmark against a
+baseline and exits with status 1 when a median grew by more than
+``--max-regression`` percent. Baselines are machine-specific: regenerate
+one on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import create_bench_app, seed_knowledge_base
+from app import db
+from app.models import ChatMessage, ChatSession, ClinicSettings, FAQ
+from app.services.calendar_service import CalendarService
+from app.services.chatbot_service import ChatbotService
+from app.utils.language_utils import detect_language, translate_text
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'hot_paths_baseline.json')
+DEFAULT_SCALES = (10, 1000, 100000)
+
+INTENT_MESSAGES = [
+    'I would like to book an appointment for next week',
+    'What are your clinic hours on Saturday?',
+    'I have pain in my lower back and some allergies',
+    'What are the aftercare instructions after my procedure?',
+    'Hello, how are you today?',
+    'Can you tell me something about healthy eating?',
+]
+LANGUAGE_MESSAGES = [
+    'Hello, I need help with my appointment',
+    'Hola, necesito ayuda con mi cita por favor',
+    'Bonjour, je voudrais prendre rendez-vous',
+    'What time do you close on Friday?',
+]
+
+
+class _StubEvents:
+    """Answers ``events().list(...).execute()`` with a fixed list of events."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def list(self, **kwargs):
+        return self
+
+    def execute(self, **kwargs):
+        return {'items': self.items}
+
+
+class StubCalendarAPI:
+    def __init__(self, items):
+        self._events = _StubEvents(items)
+
+    def events(self):
+        return self._events
+
+
+def calendar_events(day, count):
+    """``count`` half-hour appointments spread evenly over ``day``, in start order."""
+    start_of_day = datetime.combine(day, datetime.min.time())
+    step = timedelta(days=1) / max(count, 1)
+    events = []
+    for index in range(count):
+        start = start_of_day + step * index
+        events.append({
+            'id': f'event{index}',
+            'start': {'dateTime': start.isoformat() + 'Z'},
+            'end': {'dateTime': (start + timedelta(minutes=30)).isoformat() + 'Z'},
+        })
+    return events
+
+
+def seed_scale(scale):
+    """Reset the database to the sample knowledge base padded to ``scale`` rows.
+
+    Returns the chat session holding ``scale`` messages. Rows are inserted
+    in bulk so the 100k scale seeds in seconds.
+    """
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    seed_knowledge_base()
+
+    padding = max(scale - FAQ.query.count(), 0)
+    if padding:
+        db.session.execute(FAQ.__table__.insert(), [{
+            'category': 'generated',
+            'question': f'Question {index} about topic {index % 97} and service {index % 13}?',
+            'answer': f'Answer {index}: details for topic {index % 97} covering service {index % 13}.',
+            'language': 'en',
+            'is_active': True,
+        } for index in range(padding)])
+
+    chat_session = ChatSession(session_id=f'bench-{scale}', language='en')
+    db.session.add(chat_session)
+    db.session.flush()
+    db.session.execute(ChatMessage.__table__.insert(), [{
+        'session_id': chat_session.id,
+        'sender': 'user' if index % 2 == 0 else 'assistant',
+        'message': f'Message {index} about my appointment and the clinic hours',
+        'message_type': 'text',
+    } for index in range(scale)])
+    db.session.commit()
+    return chat_session
+
+
+def measure(fn, max_time=1.0, min_rounds=5, min_round_time=0.002):
+    """Per-call timing statistics for ``fn`` in microseconds."""
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_time or iterations >= 1_000_000:
+            break
+        iterations = min(1_000_000, max(iterations * 2, int(iterations * min_round_time / max(elapsed, 1e-9))))
+
+    rounds = []
+    deadline = time.perf_counter() + max_time
+    while len(rounds) < min_rounds or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        rounds.append((time.perf_counter() - started) / iterations * 1e6)
+
+    median = statistics.median(rounds)
+    return {
+        'min_us': round(min(rounds), 3),
+        'median_us': round(median, 3),
+        'mean_us': round(statistics.fmean(rounds), 3),
+        'stddev_us': round(statistics.stdev(rounds), 3) if len(rounds) > 1 else 0.0,
+        'ops': round(1e6 / median, 1) if median else math.inf,
+        'rounds': len(rounds),
+        'iterations': iterations,
+    }
+
+
+def scaled_benchmarks(chatbot, calendar, chat_session):
+    """Benchmarks whose cost depends on the number of rows."""
+    day = date.today() + timedelta(days=1)
+    return {
+        'chatbot._handle_faq[match]': lambda: chatbot._handle_faq('What are your clinic hours?', 'en'),
+        'chatbot._handle_faq[no_match]': lambda: chatbot._handle_faq('zzz qqq', 'en'),
+        'chatbot._get_conversation_context': lambda: chatbot._get_conversation_context(
+            chat_session.session_id, chat_session),
+        'calendar.get_available_slots': lambda: calendar.get_available_slots(day),
+    }
+
+
+def fixed_benchmarks(chatbot, calendar):
+    """Benchmarks that do not depend on the data size."""
+    operating_hours = ClinicSettings.query.first().operating_hours
+    day = date.today() + timedelta(days=1)
+    return {
+        'chatbot._detect_intent': lambda: [chatbot._detect_intent(message) for message in INTENT_MESSAGES],
+        'chatbot._get_system_prompt': chatbot._get_system_prompt,
+        'chatbot._format_operating_hours': lambda: chatbot._format_operating_hours(operating_hours),
+        'calendar._get_default_slots': lambda: calendar._get_default_slots(day),
+        'language.detect_language': lambda: [detect_language(message) for message in LANGUAGE_MESSAGES],
+        'language.translate_text[hit]': lambda: translate_text('Thank you!', 'es'),
+        'language.translate_text[miss]': lambda: translate_text('See you at your appointment', 'fr'),
+    }
+
+
+def run(scales, max_time, min_rounds, name_filter=None):
+    app = create_bench_app()
+    app.config.update(OPENAI_API_KEY=None, LLM_PROVIDERS='')
+    chatbot = ChatbotService()
+    results = {}
+
+    def record(name, scale, fn):
+        key = f'{name}[{scale}]' if scale is not None else name
+        if name_filter and name_filter not in key:
+            return
+        with app.test_request_context():
+            results[key] = measure(fn, max_time, min_rounds)
+            results[key]['scale'] = scale
+
+    with app.app_context():
+        for position, scale in enumerate(scales):
+            chat_session = seed_scale(scale)
+            calendar = CalendarService()
+            calendar.service = StubCalendarAPI(calendar_events(date.today() + timedelta(days=1), scale))
+            if position == 0:
+                for name, fn in fixed_benchmarks(chatbot, CalendarService()).items():
+                    record(name, None, fn)
+            for name, fn in scaled_benchmarks(chatbot, calendar, chat_session).items():
+                record(name, scale, fn)
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """Median changes against a baseline and the regressions among them."""
+    changes = {}
+    regressions = []
+    for key, row in results.items():
+        before = baseline.get('results', {}).get(key)
+        if not before or not before['median_us']:
+            continue
+        change = (row['median_us'] - before['median_us']) / before['median_us'] * 100
+        changes[key] = round(change, 1)
+        if change > max_regression:
+            regressions.append(f"{key}: median {before['median_us']:.2f}us -> {row['median_us']:.2f}us")
+    return {'changes_pct': changes, 'regressions': regressions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                        help='rows per scale, comma separated')
+    parser.add_argument('--max-time', type=float, default=1.0, help='seconds of rounds per benchmark')
+    parser.add_argument('--min-rounds', type=int, default=5)
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this')
+    parser.add_argument('--json', action='store_true', help='print machine-readable JSON')
+    parser.add_argument('--save-baseline', action='store_true', help=f'write the results to {BASELINE_PATH}')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH, help='baseline to compare against')
+    parser.add_argument('--max-regression', type=float, default=30, help='allowed median growth in percent')
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',') if scale]
+    results = run(scales, args.max_time, args.min_rounds, args.filter)
+    output = {'created_at': datetime.utcnow().isoformat() + 'Z', 'scales': scales, 'results': results}
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            output['comparison'] = compare(results, json.load(baseline_file), args.max_regression)
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as baseline_file:
+            json.dump({key: value for key, value in output.items() if key != 'comparison'}, baseline_file, indent=2)
+            baseline_file.write('\n')
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+    else:
+        changes = output.get('comparison', {}).get('changes_pct', {})
+        print(f"{'benchmark':<48} {'min':>11} {'median':>11} {'mean':>11} {'stddev':>10} {'ops/s':>11} "
+              f"{'rounds':>7}{'  vs base' if changes else ''}")
+        for key, row in results.items():
+            change = f'  {changes[key]:+.1f}%' if key in changes else ''
+            print(f"{key:<48} {row['min_us']:>9.2f}us {row['median_us']:>9.2f}us {row['mean_us']:>9.2f}us "
+                  f"{row['stddev_us']:>8.2f}us {row['ops']:>11.1f} {row['rounds']:>7}{change}")
+
+    regressions = output.get('comparison', {}).get('regressions')
+    if regressions:
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Chat latency against a slow-tailed LLM, with and without deadlines and hedging.
+
+Usage:
+    python -m benchmarks.bench_llm_tail_latency [--requests 150] [--tail-ratio 0.05]
+        [--tail-ms 1500] [--deadline 1.0] [--json]
+
+Starts a local fake LLM server with injected tail latency and sends the
+same general-conversation messages through ChatbotService.process_message
+under three configurations:
+
+* baseline: no request deadline (the previous behaviour)
+* deadline: LLM calls get the remaining request budget and fall back to
+  the local answer when it runs out
+* deadline+hedge: as above, plus a second attempt after the observed p95
+"""
+
+import argparse
+import json
+
+from benchmarks.common import create_bench_app, seed_knowledge_base, summarize_latencies, timed
+from benchmarks.fake_llm import FakeLLMServer, LatencyProfile
+from app.services.chatbot_service import ChatbotService
+from app.utils.circuit_breaker import llm_controller
+from app.utils.deadline import Deadline
+
+SCENARIOS = {
+    'baseline': {'deadline': False, 'LLM_HEDGE_ENABLED': False},
+    'deadline': {'deadline': True, 'LLM_HEDGE_ENABLED': False},
+    'deadline+hedge': {'deadline': True, 'LLM_HEDGE_ENABLED': True},
+}
+
+
+def run_scenario(app, server, name, requests, deadline_seconds, profile_args, warmup=20):
+    settings = SCENARIOS[name]
+    app.config.update(
+        OPENAI_API_KEY='sk-bench',
+        OPENAI_BASE_URL=server.base_url,
+        LLM_TIMEOUT_SECONDS=60,
+        LLM_HEDGE_ENABLED=settings['LLM_HEDGE_ENABLED'],
+        LLM_HEDGE_MIN_DELAY_MS=50,
+        LLM_SINGLE_FLIGHT=False,
+        # Keep the breaker closed so the numbers show deadlines and hedging alone
+        LLM_LATENCY_THRESHOLD_MS=600000,
+        LLM_ERROR_RATE_THRESHOLD=1.1,
+    )
+    llm_controller.reset()
+    service = ChatbotService()
+
+    # Same seed per scenario so every run sees the same latency sequence
+    server.profile = LatencyProfile(**profile_args)
+    modes = {}
+    samples_ms = []
+    for index in range(warmup + requests):
+        deadline = Deadline(deadline_seconds) if settings['deadline'] else None
+        with app.test_request_context():
+            response, elapsed_ms = timed(
+                service.process_message, f'Tell me something interesting {index}', f'bench-{name}', 'en', None, deadline)
+        if index < warmup:
+            continue
+        samples_ms.append(elapsed_ms)
+        mode = response['metadata'].get('mode', 'local')
+        modes[mode] = modes.get(mode, 0) + 1
+
+    result = summarize_latencies(samples_ms)
+    result['modes'] = modes
+    return result
+
+
+def run(requests, tail_ratio, tail_ms, deadline_seconds, base_ms=80):
+    app = create_bench_app()
+    profile_args = {'base_ms': base_ms, 'jitter_ms': base_ms / 4, 'tail_ratio': tail_ratio, 'tail_ms': tail_ms}
+    server = FakeLLMServer(LatencyProfile(**profile_args)).start()
+    try:
+        with app.app_context():
+            seed_knowledge_base()
+        results = {}
+        for name in SCENARIOS:
+            results[name] = run_scenario(app, server, name, requests, deadline_seconds, profile_args)
+        results['upstream_requests'] = server.request_count
+    finally:
+        server.stop()
+    return {
+        'requests': requests,
+        'tail_ratio': tail_ratio,
+        'tail_ms': tail_ms,
+        'deadline_seconds': deadline_seconds,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=150)
+    parser.add_argument('--tail-ratio', type=float, default=0.05, help='share of LLM calls that are slow')
+    parser.add_argument('--tail-ms', type=float, default=1500, help='latency of a slow LLM call')
+    parser.add_argument('--deadline', type=float, default=1.0, help='chat request deadline in seconds')
+    parser.add_argument('--json', action='store_true', help='print machine-readable JSON')
+    args = parser.parse_args()
+
+    result = run(args.requests, args.tail_ratio, args.tail_ms, args.deadline)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['requests']} requests, {result['tail_ratio']:.0%} of LLM calls take {result['tail_ms']:.0f}ms, "
+          f"deadline {result['deadline_seconds']}s")
+    print(f"{'scenario':<16} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  modes")
+    for name in SCENARIOS:
+        row = result['results'][name]
+        print(f"{name:<16} {row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms "
+              f"{row['max_ms']:>7.1f}ms  {row['modes']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Compare prompt sizes with and without retrieval-augmented prompts.
+
+Usage:
+    python -m benchmarks.bench_prompt_tokens [--faqs 200] [--json]
+
+Token counts use tiktoken when it is installed and the character-based
+estimate from the retrieval service otherwise.
+"""
+
+import argparse
+import json
+
+from benchmarks.common import create_bench_app, seed_knowledge_base, summarize_latencies, timed
+from app.services.chatbot_service import ChatbotService, GENERAL_INSTRUCTIONS
+from app.services.retrieval_service import estimate_tokens
+
+SAMPLE_MESSAGES = [
+    'What are your clinic hours on Saturday?',
+    'Do you take Aetna insurance?',
+    'Where do I park?',
+    'How do I take care of my mouth after a tooth extraction?',
+    'Can I see a doctor over video?',
+    'Do you have a pediatrics department?',
+    'Hello there',
+    'What should I bring for my first appointment?',
+]
+
+
+def _token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding('cl100k_base')
+        return 'tiktoken', lambda text: len(encoding.encode(text))
+    except ImportError:
+        return 'estimate', estimate_tokens
+
+
+def run(faq_count):
+    app = create_bench_app()
+    counter_name, count_tokens = _token_counter()
+    rows = []
+    retrieval_ms = []
+
+    with app.app_context():
+        seed_knowledge_base(faq_count=faq_count)
+        service = ChatbotService()
+        full_prompt_tokens = count_tokens(service._get_system_prompt() + GENERAL_INSTRUCTIONS)
+
+        # Build the index once so timings reflect steady state
+        service._build_llm_messages(SAMPLE_MESSAGES[0], [], 'en', GENERAL_INSTRUCTIONS)
+
+        for message in SAMPLE_MESSAGES:
+            messages, elapsed_ms = timed(service._build_llm_messages, message, [], 'en', GENERAL_INSTRUCTIONS)
+            retrieval_ms.append(elapsed_ms)
+            rows.append({
+                'message': message,
+                'full_tokens': full_prompt_tokens + count_tokens(message),
+                'rag_tokens': sum(count_tokens(item['content']) for item in messages),
+            })
+
+    total_full = sum(row['full_tokens'] for row in rows)
+    total_rag = sum(row['rag_tokens'] for row in rows)
+    return {
+        'token_counter': counter_name,
+        'faq_count': faq_count,
+        'messages': rows,
+        'total_full_tokens': total_full,
+        'total_rag_tokens': total_rag,
+        'savings_pct': round(100.0 * (total_full - total_rag) / total_full, 1) if total_full else 0.0,
+        'prompt_build_latency': summarize_latencies(retrieval_ms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--faqs', type=int, default=None, help='pad the FAQ table to this many rows')
+    parser.add_argument('--json', action='store_true', help='print machine-readable JSON')
+    args = parser.parse_args()
+
+    result = run(args.faqs)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"Token counter: {result['token_counter']}")
+    print(f"{'message':<60} {'full':>6} {'rag':>6}")
+    for row in result['messages']:
+        print(f"{row['message'][:60]:<60} {row['full_tokens']:>6} {row['rag_tokens']:>6}")
+    print(f"Total: full={result['total_full_tokens']} rag={result['total_rag_tokens']} "
+          f"savings={result['savings_pct']}%")
+    latency = result['prompt_build_latency']
+    print(f"Prompt build latency: p50={latency['p50_ms']}ms p99={latency['p99_ms']}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Patient and appointment list serialization: ORM ``to_dict`` vs projected rows.
+
+Usage:
+    python -m benchmarks.bench_serialization [--rows 10000] [--repeat 15] [--json] [--output results.json]
+
+Seeds ``--rows`` patients and as many appointments into in-memory SQLite
+and builds the ``GET /api/patients`` and ``GET /api/appointments`` bodies
+four ways, inside a request context as the views do:
+
+* ``orm_to_dict``: ``Model.query.all()``, ``to_dict()`` per object and
+  Flask's stock JSON provider (the code before the projected serializers)
+* ``projected_stdlib``: a column-projected ``SELECT`` of the ``to_dict``
+  fields, cached row-to-dict functions and the standard-library encoder
+* ``projected_orjson``: the same rows encoded with orjson
+* ``projected_fields``: orjson with only the columns the admin table
+  shows (``?fields=``)
+
+Each variant reports median query (rows or objects loaded), build (dicts)
+and encode (JSON body) times and the body size; every body is checked to
+decode to the same data as ``orm_to_dict``. Output is compact, as in
+production (``DEBUG`` off).
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+
+from benchmarks.common import create_bench_app
+from app import db
+from app.models import Appointment, Patient
+from app.utils.serialization import FastJSONProvider, appointment_serializer, orjson, patient_serializer
+
+ADMIN_FIELDS = {
+    'patients': 'id,first_name,last_name,email,phone',
+    'appointments': 'id,patient_id,appointment_date,appointment_type,status',
+}
+APPOINTMENT_TYPES = ('consultation', 'follow-up', 'vaccination', 'physical exam')
+STATUSES = ('scheduled', 'confirmed', 'completed', 'cancelled')
+
+
+def seed(count):
+    """Insert ``count`` patients and ``count`` appointments in bulk."""
+    created = datetime(2025, 1, 1, 8, 0, 0)
+    db.session.execute(insert(Patient), [{
+        'first_name': f'First{index}',
+        'last_name': f'Last{index}',
+        'email': f'patient{index}@example.com',
+        'phone': f'555-{index:07d}',
+        'date_of_birth': date(1950 + index % 60, 1 + index % 12, 1 + index % 28),
+        'gender': ('female', 'male', 'other')[index % 3],
+        'address': f'{index} Health Street, Medical City',
+        'emergency_contact': f'Contact {index}',
+        'emergency_phone': f'555-{index + 1:07d}',
+        'insurance_provider': ('Aetna', 'Cigna', 'Medicare', None)[index % 4],
+        'insurance_number': f'INS{index:08d}',
+        'medical_history': 'Seasonal allergies; appendectomy in 2010.',
+        'preferred_language': ('en', 'es')[index % 2],
+        'created_at': created + timedelta(minutes=index, microseconds=index % 1000),
+        'updated_at': created,
+    } for index in range(count)])
+    db.session.execute(insert(Appointment), [{
+        'patient_id': 1 + index,
+        'appointment_date': created + timedelta(hours=index),
+        'appointment_type': APPOINTMENT_TYPES[index % len(APPOINTMENT_TYPES)],
+        'status': STATUSES[index % len(STATUSES)],
+        'reason_for_visit': 'Routine check-up and medication review',
+        'symptoms': 'Mild headache' if index % 5 == 0 else None,
+        'notes': None,
+        'created_at': created + timedelta(minutes=index),
+        'updated_at': created,
+    } for index in range(count)])
+    db.session.commit()
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def orm_to_dict(app, model, serializer, fields):
+    objects, query_ms = _timed(lambda: model.query.all())
+    data, build_ms = _timed(lambda: [obj.to_dict() for obj in objects])
+    body, encode_ms = _timed(lambda: app.json.response(data).get_data())
+    return body, query_ms, build_ms, encode_ms
+
+
+def projected(app, model, serializer, fields):
+    rows, query_ms = _timed(lambda: db.session.execute(serializer.select(fields)).all())
+    data, build_ms = _timed(lambda: serializer.dump(rows, fields))
+    body, encode_ms = _timed(lambda: app.json.response(data).get_data())
+    return body, query_ms, build_ms, encode_ms
+
+
+def run_variant(app, provider, build, model, serializer, fields, repeat):
+    app.json = provider
+    samples = {'query_ms': [], 'build_ms': [], 'encode_ms': [], 'total_ms': []}
+    body = b''
+    for _ in range(repeat):
+        db.session.expunge_all()  # each request starts with an empty identity map
+        body, query_ms, build_ms, encode_ms = build(app, model, serializer, fields)
+        for name, value in (('query_ms', query_ms), ('build_ms', build_ms), ('encode_ms', encode_ms),
+                            ('total_ms', query_ms + build_ms + encode_ms)):
+            samples[name].append(value)
+    result = {name: round(statistics.median(values), 2) for name, values in samples.items()}
+    result['bytes'] = len(body)
+    return result, json.loads(body)
+
+
+def run(rows, repeat):
+    app = create_bench_app()
+    stock = DefaultJSONProvider(app)
+    stdlib = FastJSONProvider(app)
+    stdlib.use_orjson = False
+    fast = FastJSONProvider(app)
+    for provider in (stock, stdlib, fast):
+        provider.compact = True
+
+    variants = [('orm_to_dict', stock, orm_to_dict, False), ('projected_stdlib', stdlib, projected, False)]
+    if fast.use_orjson:
+        variants += [('projected_orjson', fast, projected, False), ('projected_fields', fast, projected, True)]
+
+    results = {}
+    with app.app_context():
+        seed(rows)
+        for name, model, serializer in (('patients', Patient, patient_serializer),
+                                        ('appointments', Appointment, appointment_serializer)):
+            results[name] = {}
+            expected = None
+            for variant, provider, build, narrow in variants:
+                fields = serializer.parse_fields(ADMIN_FIELDS[name] if narrow else None)
+                with app.test_request_context():
+                    result, data = run_variant(app, provider, build, model, serializer, fields, repeat)
+                if expected is None:
+                    expected = data
+                wanted = [{key: row[key] for key in fields} for row in expected]
+                result['matches_to_dict'] = data == wanted
+                results[name][variant] = result
+    return {
+        'rows': rows,
+        'repeat': repeat,
+        'orjson': orjson.__version__ if orjson is not None else None,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='patients and appointments to seed')
+    parser.add_argument('--repeat', type=int, default=15, help='timed runs per variant')
+    parser.add_argument('--json', action='store_true', help='print machine-readable JSON')
+    parser.add_argument('--output', help='write the JSON result to this file')
+    args = parser.parse_args()
+
+    result = run(args.rows, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(json.dumps(result, indent=2) + '\n')
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{args.rows} rows, median of {args.repeat} runs, orjson {result['orjson'] or 'not installed'}")
+    for name, variants in result['results'].items():
+        baseline = variants['orm_to_dict']['total_ms']
+        print(f"\n{name}")
+        print(f"{'variant':<18} {'query':>9} {'build':>9} {'encode':>9} {'total':>9} {'speedup':>8} {'KB':>7} same")
+        for variant, row in variants.items():
+            print(f"{variant:<18} {row['query_ms']:>7.1f}ms {row['build_ms']:>7.1f}ms {row['encode_ms']:>7.1f}ms "
+                  f"{row['total_ms']:>7.1f}ms {baseline / row['total_ms']:>7.1f}x {row['bytes'] / 1024:>7.0f} "
+                  f"{'yes' if row['matches_to_dict'] else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Worker boot time, memory and import-time breakdown.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--entry wsgi|factory] [--top 15] [--json]
+
+Boots the app in fresh interpreters the way a gunicorn worker does
+(importing ``wsgi`` by default, or just calling ``create_app``) against a
+temporary SQLite database that already has the schema, and reports:
+
+* boot time inside the process (imports plus app creation) and the
+  total process wall time, as percentiles over ``--runs``
+* peak RSS after boot and the number of loaded modules
+* whether the heavy optional SDKs (openai, googleapiclient, numpy) were
+  imported during boot
+* a ``python -X importtime`` breakdown: self time per top-level package
+  and the slowest individual imports
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('openai', 'googleapiclient', 'google_auth_oauthlib', 'httplib2', 'numpy')
+
+BOOT_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+{boot}
+boot_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{
+    'boot_ms': boot_ms,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+    'heavy': [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+ENTRIES = {
+    'wsgi': 'import wsgi',
+    'factory': 'from app import create_app\napp = create_app()',
+}
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def prepare_database(path):
+    """Create the schema once so boots measure only what a worker does."""
+    code = ('from app import create_app, db\n'
+            'app = create_app()\n'
+            'with app.app_context():\n'
+            '    db.create_all()\n')
+    subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, env=_env(path), check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def _env(database_path):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database_path}', PYTHONDONTWRITEBYTECODE='1')
+    env.setdefault('FLASK_ENV', 'production')
+    env.setdefault('FLASK_SECRET_KEY', 'bench-startup')
+    return env
+
+
+def boot_once(entry, database_path):
+    script = BOOT_SCRIPT.format(boot=ENTRIES[entry], heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', script], cwd=REPO_ROOT, env=_env(database_path),
+                               check=True, capture_output=True, text=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def import_breakdown(entry, database_path, top):
+    """Self import time per top-level package and the slowest single imports."""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', ENTRIES[entry]], cwd=REPO_ROOT,
+                               env=_env(database_path), check=True, capture_output=True, text=True)
+    by_package = {}
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, module = int(match.group(1)), int(match.group(2)), match.group(4)
+        package = module.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+        imports.append((cumulative_us, module))
+    packages = sorted(by_package.items(), key=lambda item: -item[1])
+    imports.sort(reverse=True)
+    return {
+        'total_ms': round(sum(by_package.values()) / 1000, 1),
+        'by_package_ms': {package: round(us / 1000, 1) for package, us in packages[:top]},
+        'slowest_cumulative_ms': {module: round(us / 1000, 1) for us, module in imports[:top]},
+    }
+
+
+def run(entry, runs, top):
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, 'startup.db')
+        prepare_database(database_path)
+        boot_once(entry, database_path)  # warm the filesystem and bytecode caches
+        boots = [boot_once(entry, database_path) for _ in range(runs)]
+        breakdown = import_breakdown(entry, database_path, top)
+
+    def stats(key):
+        values = [boot[key] for boot in boots]
+        return {'p50': round(percentile(values, 50), 1), 'min': round(min(values), 1),
+                'max': round(max(values), 1)}
+
+    return {
+        'entry': entry,
+        'runs': runs,
+        'boot_ms': stats('boot_ms'),
+        'process_ms': stats('process_ms'),
+        'rss_mb': stats('rss_mb'),
+        'modules': boots[-1]['modules'],
+        'heavy_modules_loaded': boots[-1]['heavy'],
+        'imports': breakdown,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entry', choices=sorted(ENTRIES), default='wsgi')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='rows in the import breakdown')
+    parser.add_argument('--json', action='store_true', help='print machine-readable JSON')
+    args = parser.parse_args()
+
+    result = run(args.entry, args.runs, args.top)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"Boot ({result['entry']}, {result['runs']} runs): p50 {result['boot_ms']['p50']:.0f}ms in process, "
+          f"{result['process_ms']['p50']:.0f}ms wall; RSS {result['rss_mb']['p50']:.1f}MB; "
+          f"{result['modules']} modules")
+    print(f"Heavy SDKs imported at boot: {', '.join(result['heavy_modules_loaded']) or 'none'}")
+    print(f"\nImport self time by package (total {result['imports']['total_ms']:.0f}ms):")
+    for package, ms in result['imports']['by_package_ms'].items():
+        print(f"  {package:<28} {ms:>8.1f}ms")
+    print("\nSlowest imports (cumulative):")
+    for module, ms in result['imports']['slowest_cumulative_ms'].items():
+        print(f"  {module:<44} {ms:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
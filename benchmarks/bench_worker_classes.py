@@ -0,0 +1,202 @@
+"""Chat throughput under gunicorn, per worker class.
+
+Usage:
+    python -m benchmarks.bench_worker_classes [--classes sync,gthread,gevent] [--workers 2]
+        [--threads 8] [--worker-connections 100] [--concurrency 32] [--duration 20] [--warmup 3]
+        [--llm-ms 300] [--output results.json]
+
+Starts the fake LLM, seeds a temporary SQLite database, then for each
+worker class runs ``gunicorn -c gunicorn.conf.py wsgi:app`` with the same
+number of workers and drives ``/api/chat`` with ``--concurrency`` virtual
+users from the load test (each keeping its own conversation). Reports
+chat requests per second, latency percentiles, errors and how many calls
+reached the fake LLM.
+
+Chat is mostly waiting on the LLM, so sync workers top out near
+``workers / LLM latency`` requests per second while gthread and gevent
+keep serving as the users wait. ``LLM_MAX_IN_FLIGHT`` is raised so the
+per-worker LLM cap does not hide the difference; classes whose package is
+missing (gevent) are skipped.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DATABASE_PATH = os.path.join(tempfile.gettempdir(), 'clinic_worker_classes.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DATABASE_PATH}'
+
+import requests  # noqa: E402
+
+from benchmarks.common import create_bench_app  # noqa: E402
+from benchmarks.fake_llm import FakeLLMServer, LatencyProfile  # noqa: E402
+from benchmarks.load_test import run_load, seed_load_test_data  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_CLASSES = ('sync', 'gthread', 'gevent')
+SECRET_KEY = 'bench-worker-classes'
+
+
+def prepare_database():
+    if os.path.exists(DATABASE_PATH):
+        os.remove(DATABASE_PATH)
+    app = create_bench_app()
+    with app.app_context():
+        seed_load_test_data()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def available(worker_class):
+    return worker_class != 'gevent' or importlib.util.find_spec('gevent') is not None
+
+
+class GunicornServer:
+    """``gunicorn -c gunicorn.conf.py wsgi:app`` in a subprocess."""
+
+    def __init__(self, worker_class, workers, threads, worker_connections, llm_url):
+        self.port = free_port()
+        self.env = dict(
+            os.environ,
+            PORT=str(self.port),
+            GUNICORN_WORKER_CLASS=worker_class,
+            WEB_CONCURRENCY=str(workers),
+            GUNICORN_THREADS=str(threads),
+            GUNICORN_WORKER_CONNECTIONS=str(worker_connections),
+            FLASK_SECRET_KEY=SECRET_KEY,
+            OPENAI_API_KEY='sk-bench-workers',
+            OPENAI_BASE_URL=llm_url,
+            LLM_PROVIDERS='openai',
+            LLM_MAX_IN_FLIGHT='1000',
+        )
+        self.process = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self, timeout=30):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{self.port}',
+             'wsgi:app'],
+            cwd=REPO_ROOT, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited: {self.process.stderr.read()[-2000:]}')
+            try:
+                if requests.get(f'{self.url}/health', timeout=1).ok:
+                    return self
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError('gunicorn did not become ready')
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=40)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+def bench_class(worker_class, args, llm):
+    server = GunicornServer(worker_class, args.workers, args.threads, args.worker_connections,
+                            llm.base_url).start()
+    llm_before = llm.request_count
+    try:
+        _, endpoints, measured = run_load(server.url, {'chat': 1}, args.duration, args.concurrency,
+                                          args.warmup, seed=args.seed)
+    finally:
+        server.stop()
+    chat = endpoints.get('chat', {})
+    return {
+        'rps': chat.get('rps', 0.0),
+        'p50_ms': chat.get('p50_ms'),
+        'p95_ms': chat.get('p95_ms'),
+        'p99_ms': chat.get('p99_ms'),
+        'requests': chat.get('count', 0),
+        'errors': chat.get('errors', 0),
+        'chat_modes': chat.get('chat_modes', {}),
+        'llm_requests': llm.request_count - llm_before,
+        'measured_s': round(measured, 2),
+    }
+
+
+def run(args):
+    classes = [name.strip() for name in args.classes.split(',') if name.strip()]
+    unknown = set(classes) - set(WORKER_CLASSES)
+    if unknown:
+        raise SystemExit(f'unknown worker class(es): {", ".join(sorted(unknown))}')
+
+    prepare_database()
+    llm = FakeLLMServer(LatencyProfile(args.llm_ms, args.llm_ms / 4, seed=args.seed)).start()
+    results = {}
+    skipped = []
+    try:
+        for worker_class in classes:
+            if not available(worker_class):
+                skipped.append(worker_class)
+                continue
+            results[worker_class] = bench_class(worker_class, args, llm)
+    finally:
+        llm.stop()
+
+    return {
+        'started_at': datetime.utcnow().isoformat() + 'Z',
+        'config': {'workers': args.workers, 'threads': args.threads,
+                   'worker_connections': args.worker_connections, 'concurrency': args.concurrency,
+                   'duration_s': args.duration, 'warmup_s': args.warmup, 'llm_ms': args.llm_ms},
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--classes', default=','.join(WORKER_CLASSES), help='worker classes, comma separated')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gthread worker')
+    parser.add_argument('--worker-connections', type=int, default=100, help='requests per gevent worker')
+    parser.add_argument('--concurrency', type=int, default=32, help='virtual users')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds per class')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds before measuring')
+    parser.add_argument('--llm-ms', type=float, default=300, help='fake LLM base latency')
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--json', action='store_true', help='print machine-readable JSON')
+    parser.add_argument('--output', help='write the JSON result to this file')
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(json.dumps(result, indent=2) + '\n')
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{args.workers} workers, {args.concurrency} users, fake LLM {args.llm_ms:.0f}ms")
+    print(f"{'class':<10} {'chat/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7} {'llm calls':>10}")
+    for worker_class, row in result['results'].items():
+        print(f"{worker_class:<10} {row['rps']:>8.1f} {row['p50_ms'] or 0:>7.0f}ms {row['p95_ms'] or 0:>7.0f}ms "
+              f"{row['p99_ms'] or 0:>7.0f}ms {row['errors']:>7} {row['llm_requests']:>10}")
+    for worker_class in result['skipped']:
+        print(f"{worker_class:<10} skipped (not installed)")
+
+
+if __name__ == '__main__':
+    main()
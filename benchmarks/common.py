@@ -0,0 +1,143 @@
+"""Shared helpers for benchmark scripts.
+
+Benchmarks run against an in-memory SQLite database by default so they
+never touch a real clinic database. Import this module before anything
+from ``app`` so the database URL is in place when the config loads.
+"""
+
+import json
+import math
+import os
+import statistics
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import create_app, db  # noqa: E402
+from app.models import ClinicSettings, FAQ, AftercareInstruction  # noqa: E402
+
+SAMPLE_FAQS = [
+    ('general', 'What are your clinic hours?',
+     'Our clinic is open Monday through Friday from 9:00 AM to 5:00 PM, and Saturday from 9:00 AM to 1:00 PM. We are closed on Sundays.'),
+    ('appointments', 'How do I schedule an appointment?',
+     'You can schedule an appointment by using our AI assistant, calling us at (555) 123-4567, or using our patient portal online.'),
+    ('insurance', 'What insurance do you accept?',
+     'We accept most major insurance plans including Blue Cross Blue Shield, Aetna, Cigna, UnitedHealthcare, and Medicare. Please contact us to verify your specific plan.'),
+    ('services', 'What services do you offer?',
+     'We offer comprehensive primary care services including general consultations, physical exams, vaccinations, minor procedures, and preventive care.'),
+    ('billing', 'How can I pay my bill?',
+     'Bills can be paid online through the patient portal, by phone, or at the front desk by card or check.'),
+    ('general', 'Is parking available?',
+     'Free parking is available in the lot behind the clinic, including accessible spaces near the entrance.'),
+    ('appointments', 'What should I bring to my first visit?',
+     'Please bring a photo ID, your insurance card, a list of current medications and any recent test results.'),
+    ('general', 'Do you offer telehealth visits?',
+     'Yes, video consultations are available for follow-ups and many routine concerns.'),
+]
+
+SAMPLE_AFTERCARE = [
+    ('General Consultation Follow-up', 'consultation',
+     'Follow all prescribed medications as directed. Monitor your symptoms and contact us if they worsen.',
+     'Avoid strenuous activities if advised.', 'Severe pain, difficulty breathing, high fever.'),
+    ('Vaccination Aftercare', 'vaccination',
+     'Keep the injection site clean and dry. Apply ice if there is swelling or pain.',
+     'Avoid rubbing the injection site.', 'Severe allergic reaction, difficulty breathing, widespread rash.'),
+    ('Tooth Extraction Aftercare', 'tooth extraction',
+     'Bite gently on gauze for 30 minutes. Eat soft foods and avoid hot drinks for 24 hours.',
+     'Do not smoke or use a straw for 72 hours.', 'Heavy bleeding that does not stop, fever, severe swelling.'),
+]
+
+
+def create_bench_app():
+    """Create the app with an empty schema for benchmarking."""
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_knowledge_base(faq_count=None, language='en'):
+    """Seed clinic settings, FAQs and aftercare rows.
+
+    ``faq_count`` pads the sample FAQs with synthetic ones to reach a size.
+    Must be called inside an app context.
+    """
+    db.session.add(ClinicSettings(
+        clinic_name='Riverside Family Clinic',
+        phone='(555) 123-4567',
+        email='info@clinic.com',
+        address_line1='123 Health Street',
+        city='Medical City',
+        state='MC',
+        zip_code='12345',
+        website='https://clinic.example.com',
+        operating_hours=json.dumps({
+            'monday': {'open': '09:00', 'close': '17:00', 'closed': False},
+            'tuesday': {'open': '09:00', 'close': '17:00', 'closed': False},
+            'wednesday': {'open': '09:00', 'close': '17:00', 'closed': False},
+            'thursday': {'open': '09:00', 'close': '17:00', 'closed': False},
+            'friday': {'open': '09:00', 'close': '17:00', 'closed': False},
+            'saturday': {'open': '09:00', 'close': '13:00', 'closed': False},
+            'sunday': {'open': '09:00', 'close': '13:00', 'closed': True}
+        }),
+        departments=json.dumps([
+            {'name': 'General Medicine', 'description': 'Primary care and general health services'},
+            {'name': 'Pediatrics', 'description': 'Healthcare for children and adolescents'},
+            {'name': 'Dental', 'description': 'Oral health and dental care services'},
+            {'name': 'Physical Therapy', 'description': 'Rehabilitation and injury recovery'}
+        ])
+    ))
+
+    faqs = [FAQ(category=c, question=q, answer=a, language=language) for c, q, a in SAMPLE_FAQS]
+    if faq_count is not None:
+        for index in range(max(faq_count - len(faqs), 0)):
+            faqs.append(FAQ(
+                category='generated',
+                question=f'Question {index} about topic {index % 97} and service {index % 13}?',
+                answer=f'Answer {index}: details for topic {index % 97} covering service {index % 13}.',
+                language=language
+            ))
+        faqs = faqs[:faq_count]
+    db.session.add_all(faqs)
+
+    for title, treatment_type, instructions, precautions, emergency_signs in SAMPLE_AFTERCARE:
+        db.session.add(AftercareInstruction(
+            title=title,
+            treatment_type=treatment_type,
+            instructions=instructions,
+            precautions=precautions,
+            emergency_signs=emergency_signs,
+            language=language
+        ))
+
+    db.session.commit()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_latencies(samples_ms):
+    """Summary statistics for latency samples in milliseconds."""
+    return {
+        'count': len(samples_ms),
+        'mean_ms': round(statistics.fmean(samples_ms), 4) if samples_ms else 0.0,
+        'p50_ms': round(percentile(samples_ms, 50), 4),
+        'p95_ms': round(percentile(samples_ms, 95), 4),
+        'p99_ms': round(percentile(samples_ms, 99), 4),
+        'max_ms': round(max(samples_ms), 4) if samples_ms else 0.0,
+    }
+
+
+def timed(fn, *args, **kwargs):
+    """Call ``fn`` and return ``(result, elapsed_ms)``."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
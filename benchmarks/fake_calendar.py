@@ -0,0 +1,221 @@
+"""Local Google Calendar API server with injected latency.
+
+Implements the ``events`` calls CalendarService makes (list, get, insert,
+update, delete) over an in-memory store. Each day also gets a few
+deterministic busy hours so availability lookups have conflicts to work
+through, as they do against a real clinic calendar.
+
+Run standalone with ``python -m benchmarks.fake_calendar --port 8002`` and
+point ``GOOGLE_CALENDAR_API_ENDPOINT`` at
+``http://127.0.0.1:8002/calendar/v3/``.
+"""
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from benchmarks.fake_llm import LatencyProfile
+
+EVENTS_PATH = re.compile(r'^/calendar/v3/calendars/([^/]+)/events(?:/([^/]+))?$')
+
+
+def busy_hours(day, per_day=3):
+    """Hours between 9 and 16 already booked on ``day`` (stable across runs)."""
+    seed = zlib.crc32(day.isoformat().encode('ascii'))
+    return sorted({9 + (seed >> (4 * index)) % 8 for index in range(per_day)})
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        url = urlparse(self.path)
+        match = EVENTS_PATH.match(url.path)
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+
+        delay, fail = server.profile.sample()
+        time.sleep(delay)
+
+        if fail:
+            status = server.profile.error_status
+            self._error(status, 'rateLimitExceeded' if status == 429 else 'backendError')
+            return
+        if not match:
+            self._error(404, 'notFound')
+            return
+
+        event_id = unquote(match.group(2)) if match.group(2) else None
+        if event_id is None and method == 'GET':
+            self._send(200, self._list(parse_qs(url.query)))
+        elif event_id is None and method == 'POST':
+            with server.lock:
+                event = dict(body, id=f'fake{next(server.ids)}', status='confirmed', kind='calendar#event')
+                server.events[event['id']] = event
+            self._send(200, event)
+        elif event_id not in server.events:
+            self._error(404, 'notFound')
+        elif method == 'GET':
+            self._send(200, server.events[event_id])
+        elif method in ('PUT', 'PATCH'):
+            with server.lock:
+                event = server.events[event_id] if method == 'PATCH' else {'id': event_id}
+                event.update(body)
+                server.events[event_id] = event
+            self._send(200, event)
+        elif method == 'DELETE':
+            with server.lock:
+                server.events.pop(event_id, None)
+            self._send(204, None)
+        else:
+            self._error(405, 'methodNotAllowed')
+
+    def _list(self, query):
+        time_min = _parse_time(query['timeMin'][0]) if 'timeMin' in query else None
+        time_max = _parse_time(query['timeMax'][0]) if 'timeMax' in query else None
+        items = []
+        if time_min and time_max:
+            day = time_min.date()
+            while day <= time_max.date():
+                for hour in busy_hours(day):
+                    start = datetime.combine(day, datetime.min.time()).replace(hour=hour)
+                    items.append({
+                        'id': f'busy{day:%Y%m%d}{hour:02d}',
+                        'summary': 'Busy',
+                        'start': {'dateTime': start.isoformat() + 'Z'},
+                        'end': {'dateTime': (start + timedelta(hours=1)).isoformat() + 'Z'},
+                    })
+                day += timedelta(days=1)
+
+        with self.server.lock:
+            stored = list(self.server.events.values())
+        for event in stored:
+            start = event.get('start', {}).get('dateTime')
+            end = event.get('end', {}).get('dateTime')
+            if not start or not end:
+                continue
+            if time_min and _parse_time(end) <= time_min or time_max and _parse_time(start) >= time_max:
+                continue
+            items.append(event)
+
+        items.sort(key=lambda event: _parse_time(event['start']['dateTime']))
+        return {'kind': 'calendar#events', 'items': items}
+
+    def _error(self, status, reason):
+        self._send(status, {'error': {'code': status, 'message': 'fake calendar error',
+                                      'errors': [{'reason': reason}]}})
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        try:
+            self.send_response(status)
+            if payload is not None:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class FakeCalendarServer:
+    """Fake Google Calendar server running on a background thread."""
+
+    def __init__(self, profile=None, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.profile = profile or LatencyProfile(base_ms=40, jitter_ms=10)
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_count = 0
+        self.httpd.events = {}
+        self.httpd.ids = itertools.count(1)
+        self._thread = None
+
+    @property
+    def profile(self):
+        return self.httpd.profile
+
+    @profile.setter
+    def profile(self, value):
+        self.httpd.profile = value
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    @property
+    def event_count(self):
+        return len(self.httpd.events)
+
+    @property
+    def base_url(self):
+        """Value for GOOGLE_CALENDAR_API_ENDPOINT."""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/calendar/v3/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake Google Calendar API server.')
+    parser.add_argument('--port', type=int, default=8002)
+    parser.add_argument('--base-ms', type=float, default=40)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--tail-ratio', type=float, default=0.0)
+    parser.add_argument('--tail-ms', type=float, default=2000)
+    parser.add_argument('--error-ratio', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status of injected failures')
+    args = parser.parse_args()
+
+    profile = LatencyProfile(args.base_ms, args.jitter_ms, args.tail_ratio, args.tail_ms, args.error_ratio,
+                             error_status=args.error_status)
+    server = FakeCalendarServer(profile, port=args.port)
+    print(f'Fake Calendar listening on {server.base_url} (busy hours today: {busy_hours(date.today())})')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Local OpenAI-compatible chat completion server with injected latency.
+
+Used by the benchmarks to measure the chat path without network access or
+API costs. Every response echoes the last user message and reports token
+usage so the metrics code paths run as they do against the real API.
+Requests with ``"stream": true`` get server-sent event chunks, and a share
+of requests can be made to fail with a chosen status (500, 429, ...).
+
+Run standalone with ``python -m benchmarks.fake_llm --port 8001`` and point
+``OPENAI_BASE_URL`` at ``http://127.0.0.1:8001/v1``.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LatencyProfile:
+    """Latency distribution: base +/- jitter, with a slow tail."""
+
+    def __init__(self, base_ms=80, jitter_ms=20, tail_ratio=0.0, tail_ms=3000, error_ratio=0.0, seed=7,
+                 error_status=500, chunk_ms=0):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self.tail_ratio = tail_ratio
+        self.tail_ms = tail_ms
+        self.error_ratio = error_ratio
+        self.error_status = error_status
+        self.chunk_ms = chunk_ms  # delay between streamed chunks
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """Return ``(delay_seconds, fail)`` for one request."""
+        with self._lock:
+            fail = self._random.random() < self.error_ratio
+            if self._random.random() < self.tail_ratio:
+                delay_ms = self.tail_ms
+            else:
+                delay_ms = self.base_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, delay_ms / 1000.0), fail
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+
+        delay, fail = server.profile.sample()
+        time.sleep(delay)
+
+        if fail:
+            status = server.profile.error_status
+            error_type = 'rate_limit_exceeded' if status == 429 else 'server_error'
+            self._send(status, {'error': {'message': 'injected failure', 'type': error_type}})
+            return
+
+        messages = body.get('messages') or [{'content': ''}]
+        prompt_chars = sum(len(str(message.get('content', ''))) for message in messages)
+        content = f"Echo: {messages[-1].get('content', '')}"
+        usage = {
+            'prompt_tokens': prompt_chars // 4,
+            'completion_tokens': 12,
+            'total_tokens': prompt_chars // 4 + 12,
+            'prompt_tokens_details': {'cached_tokens': 0},
+        }
+        if body.get('stream'):
+            include_usage = (body.get('stream_options') or {}).get('include_usage')
+            self._stream(body.get('model', 'fake'), content, usage if include_usage else None)
+            return
+
+        self._send(200, {
+            'id': 'chatcmpl-fake',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': usage,
+        })
+
+    def _stream(self, model, content, usage):
+        """Send the reply word by word as server-sent events."""
+        words = content.split(' ')
+        chunks = [{'role': 'assistant', 'content': ''}]
+        chunks += [{'content': word if index == 0 else ' ' + word} for index, word in enumerate(words)]
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for index, delta in enumerate(chunks + [{}]):
+                finish_reason = 'stop' if index == len(chunks) else None
+                self._event({
+                    'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                    'model': model, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+                })
+                if self.server.profile.chunk_ms:
+                    time.sleep(self.server.profile.chunk_ms / 1000.0)
+            if usage:
+                self._event({'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                             'model': model, 'choices': [], 'usage': usage})
+            self.wfile.write(b'data: [DONE]\n\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+    def _event(self, payload):
+        self.wfile.write(b'data: ' + json.dumps(payload).encode('utf-8') + b'\n\n')
+        self.wfile.flush()
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout or losing hedge); nothing to do
+            pass
+
+
+class FakeLLMServer:
+    """Fake LLM server running on a background thread."""
+
+    def __init__(self, profile=None, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.profile = profile or LatencyProfile()
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_count = 0
+        self._thread = None
+
+    @property
+    def profile(self):
+        return self.httpd.profile
+
+    @profile.setter
+    def profile(self, value):
+        self.httpd.profile = value
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake OpenAI-compatible server.')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--base-ms', type=float, default=80)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--tail-ratio', type=float, default=0.0)
+    parser.add_argument('--tail-ms', type=float, default=3000)
+    parser.add_argument('--error-ratio', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status of injected failures')
+    parser.add_argument('--chunk-ms', type=float, default=0, help='delay between streamed chunks')
+    args = parser.parse_args()
+
+    profile = LatencyProfile(args.base_ms, args.jitter_ms, args.tail_ratio, args.tail_ms, args.error_ratio,
+                             error_status=args.error_status, chunk_ms=args.chunk_ms)
+    server = FakeLLMServer(profile, port=args.port)
+    print(f'Fake LLM listening on {server.base_url}')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,460 @@
+"""Load test: the app against local fake OpenAI and Google Calendar servers.
+
+Usage:
+    python -m benchmarks.load_test [--duration 30] [--concurrency 8] [--warmup 3]
+        [--mix chat=50,slots=20,book=8,appointments=6,admin_stats=6,admin_doctors=5,admin_faqs=5]
+        [--llm-ms 300] [--llm-error-ratio 0.0] [--llm-error-status 500]
+        [--calendar-ms 60] [--calendar-error-ratio 0.0]
+        [--output results.json] [--compare baseline.json] [--max-regression 20]
+
+Starts the fake LLM and Calendar servers and the app itself (a threaded
+WSGI server on a temporary SQLite database), then runs ``--concurrency``
+virtual users in a closed loop for ``--duration`` seconds. Each user is
+logged in as the admin with the calendar connected, keeps its own chat
+conversation going, and picks the next request from the weighted mix.
+Requests made during the first ``--warmup`` seconds are not counted.
+
+The result is JSON with throughput, latency percentiles, status codes and
+error rates per endpoint. ``--compare`` checks it against an earlier
+result and exits with status 1 when an endpoint's p95 grew by more than
+``--max-regression`` percent or its error rate rose by over a point.
+
+With ``--url`` the traffic goes to an app that is already running (for
+example under gunicorn). Start the fakes with ``python -m
+benchmarks.fake_llm`` and ``python -m benchmarks.fake_calendar`` and point
+the app's OPENAI_BASE_URL and GOOGLE_CALENDAR_API_ENDPOINT at them; pass
+``--secret-key`` (the app's FLASK_SECRET_KEY) so the users can carry
+calendar credentials, otherwise slots come from the default schedule.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+DEFAULT_DATABASE = os.path.join(tempfile.gettempdir(), 'clinic_load_test.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DEFAULT_DATABASE}')
+
+import requests  # noqa: E402
+from flask import Flask  # noqa: E402
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+from benchmarks.common import create_bench_app, seed_knowledge_base, summarize_latencies  # noqa: E402
+from benchmarks.fake_calendar import FakeCalendarServer  # noqa: E402
+from benchmarks.fake_llm import FakeLLMServer, LatencyProfile  # noqa: E402
+from app import db  # noqa: E402
+from app.models import Doctor, User  # noqa: E402
+
+DEFAULT_MIX = {
+    'chat': 50,
+    'slots': 20,
+    'book': 8,
+    'appointments': 6,
+    'admin_stats': 6,
+    'admin_doctors': 5,
+    'admin_faqs': 5,
+}
+
+# Patient messages by kind; a conversation draws from these in turn
+CHAT_MESSAGES = {
+    'faq': [
+        'What are your clinic hours?', 'What insurance do you accept?', 'Is parking available?',
+        'What should I bring to my first visit?', 'Do you offer telehealth visits?', 'How can I pay my bill?',
+    ],
+    'general': [
+        'Can you explain what a tetanus booster is for?', 'Is it normal to feel tired after a cold?',
+        'How much water should I drink each day?', 'What is the difference between a virus and bacteria?',
+        'Should I see a doctor for a sprained ankle?', 'How often should adults get a checkup?',
+    ],
+    'aftercare': [
+        'What should I do after my vaccination?', 'aftercare for a tooth extraction please',
+        'I had my flu shot yesterday, any tips?',
+    ],
+    'booking': [
+        "I'd like to book an appointment", 'a general consultation please', 'next Tuesday', 'at 10am',
+    ],
+    'greeting': ['Hello', 'Hi there', 'Thanks, that helps!'],
+}
+CHAT_WEIGHTS = {'faq': 35, 'general': 30, 'aftercare': 10, 'booking': 10, 'greeting': 15}
+CONVERSATION_TURNS = 6
+
+ADMIN_USER = ('loadtest-admin', 'loadtest-password')
+FAKE_CREDENTIALS = {
+    'token': 'fake-access-token',
+    'refresh_token': 'fake-refresh-token',
+    'client_id': 'fake-client-id',
+    'client_secret': 'fake-client-secret',
+    'token_uri': 'https://oauth2.googleapis.com/token',
+    'expiry': '2099-01-01T00:00:00Z',
+}
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def parse_mix(text):
+    """``"chat=50,slots=20"`` -> ``{'chat': 50, 'slots': 20}``."""
+    mix = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f'unknown endpoint {name!r}; choose from {", ".join(DEFAULT_MIX)}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def sign_session(secret_key, data):
+    """Session cookie value the app would issue for ``data``."""
+    signer = Flask(__name__)
+    signer.secret_key = secret_key
+    return signer.session_interface.get_signing_serializer(signer).dumps(data)
+
+
+def read_session(secret_key, cookie):
+    signer = Flask(__name__)
+    signer.secret_key = secret_key
+    return signer.session_interface.get_signing_serializer(signer).loads(cookie)
+
+
+def seed_load_test_data():
+    """Knowledge base, the virtual users' admin account and two doctors."""
+    seed_knowledge_base()
+    admin = User(username=ADMIN_USER[0], email='loadtest@example.com', role='admin')
+    admin.set_password(ADMIN_USER[1])
+    db.session.add(admin)
+    db.session.add_all([
+        Doctor(first_name='Ana', last_name='Lopez', title='Dr.', specialization='General Practice',
+               department='General Medicine'),
+        Doctor(first_name='Sam', last_name='Patel', title='Dr.', specialization='Dermatology',
+               department='General Medicine'),
+    ])
+    db.session.commit()
+
+
+class AppUnderTest:
+    """The app on a background WSGI server, seeded for load testing."""
+
+    def __init__(self, llm, calendar):
+        if os.environ['DATABASE_URL'] == f'sqlite:///{DEFAULT_DATABASE}' and os.path.exists(DEFAULT_DATABASE):
+            os.remove(DEFAULT_DATABASE)
+        self.app = create_bench_app()
+        self.app.config.update(
+            TESTING=False,
+            OPENAI_API_KEY='sk-load-test',
+            OPENAI_BASE_URL=llm.base_url,
+            LLM_PROVIDERS='openai',
+            GOOGLE_CALENDAR_API_ENDPOINT=calendar.base_url,
+        )
+        with self.app.app_context():
+            seed_load_test_data()
+        self.server = make_server('127.0.0.1', 0, self.app, threaded=True, request_handler=_QuietRequestHandler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def secret_key(self):
+        return self.app.secret_key
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class VirtualUser:
+    """One client session: logged in, with its own patient and conversation."""
+
+    def __init__(self, index, base_url, mix, secret_key=None, seed=11):
+        self.index = index
+        self.base_url = base_url
+        self.random = random.Random(seed + index)
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.http = requests.Session()
+        self.patient_id = None
+        self.conversation = None
+        self.turn = 0
+        self.booking_step = 0
+        self.secret_key = secret_key
+
+    def setup(self, run_id):
+        response = self.http.post(f'{self.base_url}/auth/login',
+                                  json={'username': ADMIN_USER[0], 'password': ADMIN_USER[1]})
+        response.raise_for_status()
+        if self.secret_key:
+            # Connect the calendar the way the OAuth callback would
+            cookie = next(cookie for cookie in self.http.cookies if cookie.name == 'session')
+            session_data = read_session(self.secret_key, cookie.value)
+            session_data['google_credentials'] = FAKE_CREDENTIALS
+            self.http.cookies.set('session', sign_session(self.secret_key, session_data),
+                                  domain=cookie.domain, path=cookie.path)
+        response = self.http.post(f'{self.base_url}/api/patients', json={
+            'first_name': 'Load', 'last_name': f'User{self.index}',
+            'email': f'load-{run_id}-{self.index}@example.com', 'phone': f'555-01{self.index:02d}',
+        })
+        response.raise_for_status()
+        self.patient_id = response.json()['id']
+
+    def next_request(self):
+        name = self.random.choices(self.names, self.weights)[0]
+        return name, getattr(self, f'_{name}')()
+
+    def _chat_message(self):
+        if self.conversation is None or self.turn >= CONVERSATION_TURNS:
+            self.conversation = str(uuid.uuid4())
+            self.turn = 0
+            self.booking_step = 0
+        self.turn += 1
+        if self.booking_step:
+            # Finish a booking once started, like a patient answering the questions
+            messages = CHAT_MESSAGES['booking']
+            message = messages[self.booking_step]
+            self.booking_step = (self.booking_step + 1) % len(messages)
+            return message
+        kind = self.random.choices(list(CHAT_WEIGHTS), list(CHAT_WEIGHTS.values()))[0]
+        if kind == 'booking':
+            self.booking_step = 1
+            return CHAT_MESSAGES['booking'][0]
+        return self.random.choice(CHAT_MESSAGES[kind])
+
+    def _weekday(self):
+        day = date.today() + timedelta(days=self.random.randint(1, 21))
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        return day
+
+    def _chat(self):
+        return ('POST', '/api/chat', {'json': {'message': self._chat_message(), 'session_id': self.conversation}})
+
+    def _slots(self):
+        return ('GET', '/api/available-slots', {'params': {'date': self._weekday().isoformat()}})
+
+    def _book(self):
+        start = datetime.combine(self._weekday(), datetime.min.time()).replace(hour=self.random.randint(9, 16))
+        return ('POST', '/api/appointments', {'json': {
+            'patient_id': self.patient_id, 'doctor_id': self.random.choice([1, 2]),
+            'appointment_date': start.isoformat(), 'appointment_type': 'consultation',
+            'reason_for_visit': 'Load test visit',
+        }})
+
+    def _appointments(self):
+        return ('GET', '/api/appointments', {})
+
+    def _admin_stats(self):
+        return ('GET', '/admin/stats', {})
+
+    def _admin_doctors(self):
+        return ('GET', '/admin/doctors', {})
+
+    def _admin_faqs(self):
+        return ('GET', '/admin/faqs', {})
+
+    def send(self, method, path, kwargs, timeout=60):
+        """Return ``(status, elapsed_ms, chat mode)``; status 0 for a transport error."""
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=timeout,
+                                         allow_redirects=False, **kwargs)
+        except requests.RequestException:
+            return 0, (time.perf_counter() - started) * 1000, None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        mode = None
+        if path == '/api/chat' and response.status_code == 200:
+            mode = response.json().get('mode')
+        return response.status_code, elapsed_ms, mode
+
+
+class Recorder:
+    """Thread-safe per-endpoint samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def add(self, name, status, elapsed_ms, mode=None):
+        with self._lock:
+            row = self.endpoints.setdefault(name, {'samples_ms': [], 'statuses': {}, 'errors': 0, 'modes': {}})
+            row['samples_ms'].append(elapsed_ms)
+            row['statuses'][str(status)] = row['statuses'].get(str(status), 0) + 1
+            if not 200 <= status < 300:
+                row['errors'] += 1
+            if mode:
+                row['modes'][mode] = row['modes'].get(mode, 0) + 1
+
+    def report(self, seconds):
+        endpoints = {}
+        for name, row in sorted(self.endpoints.items()):
+            count = len(row['samples_ms'])
+            result = summarize_latencies(row['samples_ms'])
+            result.update(
+                rps=round(count / seconds, 2),
+                errors=row['errors'],
+                error_rate=round(row['errors'] / count, 4) if count else 0.0,
+                status_codes=row['statuses'],
+            )
+            if row['modes']:
+                result['chat_modes'] = row['modes']
+            endpoints[name] = result
+
+        all_samples = [sample for row in self.endpoints.values() for sample in row['samples_ms']]
+        errors = sum(row['errors'] for row in self.endpoints.values())
+        total = summarize_latencies(all_samples)
+        total.update(rps=round(len(all_samples) / seconds, 2), errors=errors,
+                     error_rate=round(errors / len(all_samples), 4) if all_samples else 0.0)
+        return total, endpoints
+
+
+def run_load(base_url, mix, duration, concurrency, warmup, secret_key=None, seed=11):
+    """Run the virtual users and return ``(total, endpoints, measured seconds)``."""
+    run_id = uuid.uuid4().hex[:8]
+    users = [VirtualUser(index, base_url, mix, secret_key, seed) for index in range(concurrency)]
+    for user in users:
+        user.setup(run_id)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def loop(user):
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            name, (method, path, kwargs) = user.next_request()
+            status, elapsed_ms, mode = user.send(method, path, kwargs)
+            if now >= measure_from:
+                recorder.add(name, status, elapsed_ms, mode)
+
+    threads = [threading.Thread(target=loop, args=(user,), daemon=True) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    measured = max(time.perf_counter() - measure_from, 1e-9)
+    total, endpoints = recorder.report(measured)
+    return total, endpoints, measured
+
+
+def compare(result, baseline, max_regression):
+    """Per-endpoint changes against a baseline result and the regressions among them."""
+    changes = {}
+    regressions = []
+    for name, row in result['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        p95_change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        rps_change = (row['rps'] - before['rps']) / before['rps'] * 100 if before['rps'] else 0.0
+        changes[name] = {
+            'p95_ms': [before['p95_ms'], row['p95_ms']],
+            'p95_change_pct': round(p95_change, 1),
+            'rps_change_pct': round(rps_change, 1),
+            'error_rate': [before['error_rate'], row['error_rate']],
+        }
+        if p95_change > max_regression:
+            regressions.append(f'{name}: p95 {before["p95_ms"]:.1f}ms -> {row["p95_ms"]:.1f}ms')
+        if row['error_rate'] > before['error_rate'] + 0.01:
+            regressions.append(f'{name}: error rate {before["error_rate"]:.2%} -> {row["error_rate"]:.2%}')
+    return {'endpoints': changes, 'regressions': regressions}
+
+
+def run(args):
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    llm_profile = LatencyProfile(args.llm_ms, args.llm_ms / 4, args.llm_tail_ratio, args.llm_tail_ms,
+                                 args.llm_error_ratio, error_status=args.llm_error_status)
+    calendar_profile = LatencyProfile(args.calendar_ms, args.calendar_ms / 4,
+                                      error_ratio=args.calendar_error_ratio, error_status=503)
+    config = {
+        'duration_s': args.duration, 'warmup_s': args.warmup, 'concurrency': args.concurrency, 'mix': mix,
+        'seed': args.seed, 'target': args.url or 'in-process',
+        'llm': {'base_ms': args.llm_ms, 'tail_ratio': args.llm_tail_ratio, 'tail_ms': args.llm_tail_ms,
+                'error_ratio': args.llm_error_ratio, 'error_status': args.llm_error_status},
+        'calendar': {'base_ms': args.calendar_ms, 'error_ratio': args.calendar_error_ratio},
+    }
+
+    if args.url:
+        total, endpoints, measured = run_load(args.url.rstrip('/'), mix, args.duration, args.concurrency,
+                                              args.warmup, args.secret_key, args.seed)
+        upstream = None
+    else:
+        llm = FakeLLMServer(llm_profile).start()
+        calendar = FakeCalendarServer(calendar_profile).start()
+        app = AppUnderTest(llm, calendar).start()
+        try:
+            total, endpoints, measured = run_load(app.url, mix, args.duration, args.concurrency,
+                                                  args.warmup, app.secret_key, args.seed)
+            upstream = {'llm_requests': llm.request_count, 'calendar_requests': calendar.request_count,
+                        'calendar_events_created': calendar.event_count}
+        finally:
+            app.stop()
+            calendar.stop()
+            llm.stop()
+
+    result = {
+        'started_at': datetime.utcnow().isoformat() + 'Z',
+        'config': config,
+        'measured_s': round(measured, 2),
+        'total': total,
+        'endpoints': endpoints,
+    }
+    if upstream:
+        result['upstream'] = upstream
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds before measuring')
+    parser.add_argument('--concurrency', type=int, default=8, help='virtual users')
+    parser.add_argument('--mix', help='endpoint weights, e.g. chat=50,slots=20 (default: realistic mix)')
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--llm-ms', type=float, default=300, help='fake LLM base latency')
+    parser.add_argument('--llm-tail-ratio', type=float, default=0.0)
+    parser.add_argument('--llm-tail-ms', type=float, default=3000)
+    parser.add_argument('--llm-error-ratio', type=float, default=0.0)
+    parser.add_argument('--llm-error-status', type=int, default=500)
+    parser.add_argument('--calendar-ms', type=float, default=60, help='fake Calendar base latency')
+    parser.add_argument('--calendar-error-ratio', type=float, default=0.0)
+    parser.add_argument('--url', help='load an already running app instead of starting one')
+    parser.add_argument('--secret-key', help="the running app's FLASK_SECRET_KEY (with --url)")
+    parser.add_argument('--output', help='write the JSON result to this file')
+    parser.add_argument('--compare', help='earlier JSON result to check for regressions')
+    parser.add_argument('--max-regression', type=float, default=20, help='allowed p95 growth in percent')
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            result['comparison'] = compare(result, json.load(baseline_file), args.max_regression)
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
+
+    if result.get('comparison', {}).get('regressions'):
+        for regression in result['comparison']['regressions']:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+"""Replay stored patient conversations against the current code.
+
+Usage:
+    python -m benchmarks.replay export --database URL --output trace.jsonl [--since 2024-01-01] [--limit 5000]
+    python -m benchmarks.replay run trace.jsonl [--target service|api] [--url URL] [--speed 0]
+        [--concurrency 4] [--llm-ms 300] [--baseline earlier.json] [--output result.json]
+    python -m benchmarks.replay compare earlier.json later.json
+
+``export`` reads the user turns from ``chat_messages`` (a copy of the
+production database, for example) and writes one JSON line per turn:
+a numbered conversation, its offset from the first exported message, the
+anonymized text and what the original run answered (response type, mode,
+and an approximate latency from the stored message timestamps). Emails,
+phone numbers, long numbers and names the booking parser recognises are
+replaced; free text can still hold personal details, so treat traces as
+sensitive.
+
+``run`` starts a fake LLM server and replays the trace on a fresh
+database seeded with the sample knowledge base (or ``--database``):
+through ``ChatbotService.process_message`` (``--target service``), through
+``/api/chat`` on the in-process app (``--target api``, which includes the
+fast path), or against a running app with ``--url``. ``--speed 1``
+keeps the recorded pace, ``10`` plays it ten times faster and ``0`` (the
+default) sends each turn as soon as the previous one is answered;
+conversations run in parallel up to ``--concurrency``.
+
+The result reports latency percentiles and how often the response type
+(and, against a ``--baseline`` run, the detected intent) agrees with the
+earlier run, with counts of each change such as ``faq -> general``.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+DEFAULT_DATABASE = os.path.join(tempfile.gettempdir(), 'clinic_replay.db')
+LONG_NUMBER_PATTERN = re.compile(r'\b\d{6,}\b')
+MISMATCH_EXAMPLES = 20
+
+
+def anonymize(text, expecting_name=False, patient_number=0):
+    """Replace contact details and recognisable names with placeholders."""
+    from app.services.booking_service import (BARE_NAME_PATTERN, EMAIL_PATTERN, ISO_DATE_PATTERN, NAME_PATTERN,
+                                              PHONE_PATTERN, WEAK_NAME_PATTERN)
+
+    text = EMAIL_PATTERN.sub(f'patient{patient_number}@example.com', text)
+    # Keep ISO dates out of the phone pattern, as parse_phone does
+    dates = ISO_DATE_PATTERN.findall(text)
+    text = ISO_DATE_PATTERN.sub('\0', text)
+    text = PHONE_PATTERN.sub('555-0100', text)
+    for year, month, day in dates:
+        text = text.replace('\0', f'{year}-{month}-{day}', 1)
+    text = LONG_NUMBER_PATTERN.sub(lambda match: '0' * len(match.group(0)), text)
+
+    patterns = [NAME_PATTERN] + ([WEAK_NAME_PATTERN, BARE_NAME_PATTERN] if expecting_name else [])
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            text = text[:match.start(1)] + 'Alex Doe' + text[match.end(1):]
+            break
+    return text
+
+
+def export_trace(output, since=None, limit=None):
+    """Write the user turns and the original answers to ``output``; returns the turn count."""
+    from app.models import ChatMessage, ChatSession
+
+    query = ChatMessage.query.join(ChatSession, ChatSession.id == ChatMessage.session_id)
+    if since:
+        query = query.filter(ChatMessage.timestamp >= since)
+    messages = query.order_by(ChatMessage.session_id, ChatMessage.id).all()
+    languages = dict(ChatSession.query.with_entities(ChatSession.id, ChatSession.language).all())
+
+    turns = []
+    conversations = {}
+    previous = None
+    for message in messages:
+        if message.sender == 'user':
+            number = conversations.setdefault(message.session_id, len(conversations) + 1)
+            previous_metadata = _metadata(previous) if previous and previous.session_id == message.session_id else {}
+            turns.append({
+                'conversation': f'c{number:05d}',
+                'timestamp': message.timestamp,
+                'language': languages.get(message.session_id) or 'en',
+                'text': anonymize(message.message, previous_metadata.get('step') == 'name', number),
+                'original': None,
+            })
+        elif message.sender == 'assistant' and turns and previous is not None and previous.sender == 'user' \
+                and previous.session_id == message.session_id:
+            metadata = _metadata(message)
+            latency_ms = (message.timestamp - previous.timestamp).total_seconds() * 1000
+            turns[-1]['original'] = {
+                'type': message.message_type,
+                'mode': metadata.get('mode'),
+                'intent': metadata.get('intent'),
+                'latency_ms': round(latency_ms, 1),
+            }
+        previous = message
+
+    turns.sort(key=lambda turn: turn['timestamp'])
+    if limit:
+        turns = turns[:limit]
+    started = turns[0]['timestamp'] if turns else None
+    counters = {}
+    with open(output, 'w', encoding='utf-8') as trace_file:
+        for turn in turns:
+            turn['turn'] = counters[turn['conversation']] = counters.get(turn['conversation'], -1) + 1
+            turn['offset_ms'] = round((turn.pop('timestamp') - started).total_seconds() * 1000)
+            trace_file.write(json.dumps(turn, ensure_ascii=False) + '\n')
+    return len(turns)
+
+
+def _metadata(message):
+    try:
+        metadata = json.loads(message.message_metadata or '{}')
+    except ValueError:
+        return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def load_trace(path):
+    with open(path, encoding='utf-8') as trace_file:
+        return [json.loads(line) for line in trace_file if line.strip()]
+
+
+class Replayer:
+    """Sends trace turns to one target and records what came back."""
+
+    def __init__(self, target, app=None, url=None):
+        self.target = target
+        self.app = app
+        self.url = url
+        self.run_id = uuid.uuid4().hex[:8]
+        self._local = threading.local()
+        if target == 'service':
+            from app.services.chatbot_service import ChatbotService
+            self.chatbot = ChatbotService()
+        elif target == 'api':
+            from flask import request_finished
+            request_finished.connect(self._record_intent, app)
+
+    def _record_intent(self, sender, response, **extra):
+        from app.utils.metrics import get_chat_intent
+        self._local.intent = get_chat_intent()
+
+    def conversation(self, name):
+        """Per-conversation client state."""
+        state = {'session_id': f'replay-{self.run_id}-{name}'}
+        if self.target == 'api':
+            state['client'] = self.app.test_client()
+        elif self.target == 'url':
+            import requests
+            state['client'] = requests.Session()
+        return state
+
+    def send(self, state, turn):
+        """Return ``{'type', 'mode', 'intent', 'latency_ms', 'status'}`` for one turn."""
+        started = time.perf_counter()
+        if self.target == 'service':
+            response, intent, status = self._send_service(state, turn)
+        elif self.target == 'api':
+            self._local.intent = None
+            reply = state['client'].post('/api/chat', json={
+                'message': turn['text'], 'session_id': state['session_id'], 'language': turn['language']})
+            response, intent, status = reply.get_json() or {}, self._local.intent, reply.status_code
+        else:
+            reply = state['client'].post(f'{self.url}/api/chat', timeout=60, json={
+                'message': turn['text'], 'session_id': state['session_id'], 'language': turn['language']})
+            response, intent, status = reply.json() if reply.ok else {}, None, reply.status_code
+        latency_ms = (time.perf_counter() - started) * 1000
+        metadata = response.get('metadata') or {}
+        return {
+            'type': response.get('type', 'error'),
+            'mode': response.get('mode') or metadata.get('mode'),
+            'intent': intent if intent != 'none' else None,
+            'latency_ms': round(latency_ms, 2),
+            'status': status,
+        }
+
+    def _send_service(self, state, turn):
+        """What ``/api/chat`` does around process_message, without the fast path."""
+        from flask import current_app
+        from app import db
+        from app.models import ChatMessage, ChatSession
+        from app.utils.deadline import Deadline
+        from app.utils.metrics import get_chat_intent
+
+        with self.app.test_request_context():
+            chat_session = ChatSession.query.filter_by(session_id=state['session_id']).first()
+            if chat_session is None:
+                chat_session = ChatSession(session_id=state['session_id'], language=turn['language'])
+                db.session.add(chat_session)
+                db.session.commit()
+            db.session.add(ChatMessage(session_id=chat_session.id, sender='user', message=turn['text'],
+                                       message_type='text'))
+            deadline = Deadline(current_app.config.get('CHAT_DEADLINE_SECONDS', 20))
+            response = self.chatbot.process_message(turn['text'], state['session_id'], turn['language'],
+                                                    chat_session, deadline)
+            db.session.add(ChatMessage(session_id=chat_session.id, sender='assistant', message=response['message'],
+                                       message_type=response.get('type', 'text'),
+                                       message_metadata=json.dumps(response.get('metadata', {}))))
+            db.session.commit()
+            intent = get_chat_intent()
+            db.session.remove()
+        return response, intent, 200
+
+
+def replay(trace, replayer, speed=0.0, concurrency=4):
+    """Replay every conversation and return the per-turn results in trace order."""
+    conversations = {}
+    for index, turn in enumerate(trace):
+        conversations.setdefault(turn['conversation'], []).append((index, turn))
+    results = [None] * len(trace)
+    started = time.perf_counter()
+
+    def play(name, turns):
+        state = replayer.conversation(name)
+        for index, turn in turns:
+            if speed > 0:
+                wait = started + turn['offset_ms'] / 1000.0 / speed - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            results[index] = dict(replayer.send(state, turn), conversation=name, turn=turn['turn'])
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        for future in [pool.submit(play, name, turns) for name, turns in conversations.items()]:
+            future.result()
+    return results, time.perf_counter() - started
+
+
+def agreement(before, after, field):
+    """Share of turns where ``field`` matches, plus counts of each change."""
+    pairs = [(old.get(field), new.get(field)) for old, new in zip(before, after)
+             if old and new and old.get(field) is not None]
+    if not pairs:
+        return None
+    changes = {}
+    for old, new in pairs:
+        if old != new:
+            key = f'{old} -> {new}'
+            changes[key] = changes.get(key, 0) + 1
+    matched = sum(1 for old, new in pairs if old == new)
+    return {
+        'compared': len(pairs),
+        'agreement': round(matched / len(pairs), 4),
+        'changes': dict(sorted(changes.items(), key=lambda item: -item[1])),
+    }
+
+
+def summarize(results, earlier, elapsed_s, label):
+    """Latency and routing agreement of ``results`` against ``earlier`` per-turn results."""
+    from benchmarks.common import summarize_latencies
+
+    by_type = {}
+    for row in results:
+        by_type.setdefault(row['type'], []).append(row['latency_ms'])
+    summary = {
+        'turns': len(results),
+        'elapsed_s': round(elapsed_s, 2),
+        'throughput_per_s': round(len(results) / elapsed_s, 2) if elapsed_s else 0.0,
+        'errors': sum(1 for row in results if row['status'] >= 400 or row['type'] == 'error'),
+        'latency': summarize_latencies([row['latency_ms'] for row in results]),
+        'latency_by_type': {name: summarize_latencies(samples) for name, samples in sorted(by_type.items())},
+        'modes': {},
+        'compared_with': label,
+    }
+    for row in results:
+        summary['modes'][row['mode']] = summary['modes'].get(row['mode'], 0) + 1
+
+    earlier_latencies = [row['latency_ms'] for row in earlier if row and row.get('latency_ms') is not None]
+    if earlier_latencies:
+        summary['earlier_latency'] = summarize_latencies(earlier_latencies)
+    for field in ('type', 'intent', 'mode'):
+        result = agreement(earlier, results, field)
+        if result:
+            summary[f'{field}_agreement'] = result
+    summary['type_mismatches'] = [
+        {'conversation': new['conversation'], 'turn': new['turn'], 'before': old['type'], 'after': new['type']}
+        for old, new in zip(earlier, results) if old and old.get('type') != new['type']
+    ][:MISMATCH_EXAMPLES]
+    return summary
+
+
+def run_replay(args):
+    trace = load_trace(args.trace)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        keyed = {(row['conversation'], row['turn']): row for row in baseline['turns']}
+        earlier = [keyed.get((turn['conversation'], turn['turn'])) for turn in trace]
+        label = args.baseline
+    else:
+        earlier = [turn.get('original') for turn in trace]
+        label = 'original'
+
+    if args.url:
+        replayer = Replayer('url', url=args.url.rstrip('/'))
+        results, elapsed = replay(trace, replayer, args.speed, args.concurrency)
+        llm_requests = None
+    else:
+        from benchmarks.common import create_bench_app, seed_knowledge_base
+        from benchmarks.fake_llm import FakeLLMServer, LatencyProfile
+
+        if args.database == f'sqlite:///{DEFAULT_DATABASE}' and os.path.exists(DEFAULT_DATABASE):
+            os.remove(DEFAULT_DATABASE)
+        llm = FakeLLMServer(LatencyProfile(args.llm_ms, args.llm_ms / 4)).start()
+        try:
+            app = create_bench_app()
+            app.config.update(OPENAI_API_KEY='sk-replay', OPENAI_BASE_URL=llm.base_url, LLM_PROVIDERS='openai')
+            with app.app_context():
+                from app.models import ClinicSettings
+                if ClinicSettings.query.first() is None:
+                    seed_knowledge_base()
+            replayer = Replayer(args.target, app=app)
+            with app.app_context():
+                results, elapsed = replay(trace, replayer, args.speed, args.concurrency)
+            llm_requests = llm.request_count
+        finally:
+            llm.stop()
+
+    output = {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'config': {'trace': args.trace, 'target': args.url or args.target, 'speed': args.speed,
+                   'concurrency': args.concurrency, 'llm_ms': None if args.url else args.llm_ms},
+        'summary': summarize(results, earlier, elapsed, label),
+        'turns': results,
+    }
+    if llm_requests is not None:
+        output['summary']['llm_requests'] = llm_requests
+    return output
+
+
+def print_summary(summary):
+    latency = summary['latency']
+    print(f"{summary['turns']} turns in {summary['elapsed_s']}s ({summary['throughput_per_s']}/s), "
+          f"{summary['errors']} errors; compared with {summary['compared_with']}")
+    print(f"latency p50 {latency['p50_ms']:.1f}ms  p95 {latency['p95_ms']:.1f}ms  p99 {latency['p99_ms']:.1f}ms")
+    if 'earlier_latency' in summary:
+        earlier = summary['earlier_latency']
+        print(f"earlier p50 {earlier['p50_ms']:.1f}ms  p95 {earlier['p95_ms']:.1f}ms  p99 {earlier['p99_ms']:.1f}ms")
+    for field in ('type', 'intent', 'mode'):
+        result = summary.get(f'{field}_agreement')
+        if result:
+            print(f"{field} agreement {result['agreement']:.1%} of {result['compared']}")
+            for change, count in list(result['changes'].items())[:10]:
+                print(f"  {count:>5}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='write anonymized user turns from chat_messages')
+    export_parser.add_argument('--database', default=os.environ.get('DATABASE_URL'), help='source database URL')
+    export_parser.add_argument('--output', required=True)
+    export_parser.add_argument('--since', type=datetime.fromisoformat, help='only messages from this date on')
+    export_parser.add_argument('--limit', type=int, help='at most this many turns (earliest first)')
+
+    run_parser = commands.add_parser('run', help='replay a trace and compare with the earlier run')
+    run_parser.add_argument('trace')
+    run_parser.add_argument('--target', choices=('service', 'api'), default='api')
+    run_parser.add_argument('--url', help='replay against a running app instead')
+    run_parser.add_argument('--database', default=f'sqlite:///{DEFAULT_DATABASE}',
+                            help='database for the replayed sessions')
+    run_parser.add_argument('--speed', type=float, default=0.0, help='1 = recorded pace, 0 = no pauses')
+    run_parser.add_argument('--concurrency', type=int, default=4, help='conversations replayed at once')
+    run_parser.add_argument('--llm-ms', type=float, default=300, help='fake LLM base latency')
+    run_parser.add_argument('--baseline', help='earlier replay result to compare with instead of the original')
+    run_parser.add_argument('--output', help='write the JSON result to this file')
+    run_parser.add_argument('--json', action='store_true', help='print the JSON result')
+
+    compare_parser = commands.add_parser('compare', help='compare two replay results of the same trace')
+    compare_parser.add_argument('earlier')
+    compare_parser.add_argument('later')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        if not args.database:
+            parser.error('export needs --database or DATABASE_URL')
+        os.environ['DATABASE_URL'] = args.database
+        from benchmarks.common import create_app
+        with create_app().app_context():
+            count = export_trace(args.output, args.since, args.limit)
+        print(f'Wrote {count} turns to {args.output}', file=sys.stderr)
+        return
+
+    if args.command == 'compare':
+        with open(args.earlier) as earlier_file, open(args.later) as later_file:
+            earlier, later = json.load(earlier_file), json.load(later_file)
+        keyed = {(row['conversation'], row['turn']): row for row in earlier['turns']}
+        summary = summarize(later['turns'], [keyed.get((row['conversation'], row['turn'])) for row in later['turns']],
+                            later['summary']['elapsed_s'], args.earlier)
+        print_summary(summary)
+        return
+
+    if not args.url:
+        os.environ['DATABASE_URL'] = args.database
+    output = run_replay(args)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(output, output_file, indent=2)
+            output_file.write('\n')
+    if args.json:
+        print(json.dumps(output, indent=2))
+    else:
+        print_summary(output['summary'])
+
+
+if __name__ == '__main__':
+    main()
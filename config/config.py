@@ -1,28 +1,123 @@
 import os
 from dotenv import load_dotenv
+from config.database import build_engine_options, normalize_database_url
 
 load_dotenv()
 
 class Config:
     """Base configuration class."""
     SECRET_KEY = os.environ.get('FLASK_SECRET_KEY') or 'dev-secret-key-change-in-production'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///clinic_assistant.db'
+    SQLALCHEMY_DATABASE_URI = normalize_database_url(os.environ.get('DATABASE_URL')) or 'sqlite:///clinic_assistant.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pooling and statement caching (see config/database.py)
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(SQLALCHEMY_DATABASE_URI)
+    
     # OpenAI Configuration
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')  # optional, for OpenAI-compatible servers
+    
+    # Retrieval of FAQ/aftercare/clinic snippets for LLM prompts
+    RAG_ENABLED = os.environ.get('RAG_ENABLED', 'true').lower() == 'true'
+    RAG_TOP_K = int(os.environ.get('RAG_TOP_K', 4))
+    RAG_TOKEN_BUDGET = int(os.environ.get('RAG_TOKEN_BUDGET', 400))
+    
+    # Share one upstream call between identical concurrent LLM requests
+    LLM_SINGLE_FLIGHT = os.environ.get('LLM_SINGLE_FLIGHT', 'true').lower() == 'true'
+    
+    # Fall back to the local handlers when the LLM is slow, failing or saturated
+    LLM_DEGRADE_ENABLED = os.environ.get('LLM_DEGRADE_ENABLED', 'true').lower() == 'true'
+    LLM_LATENCY_THRESHOLD_MS = int(os.environ.get('LLM_LATENCY_THRESHOLD_MS', 4000))  # p95
+    LLM_ERROR_RATE_THRESHOLD = float(os.environ.get('LLM_ERROR_RATE_THRESHOLD', 0.5))
+    LLM_MAX_IN_FLIGHT = int(os.environ.get('LLM_MAX_IN_FLIGHT', 8))  # per worker
+    LLM_BREAKER_COOLDOWN_SECONDS = int(os.environ.get('LLM_BREAKER_COOLDOWN_SECONDS', 30))
+    LLM_BREAKER_MIN_SAMPLES = int(os.environ.get('LLM_BREAKER_MIN_SAMPLES', 10))
+    
+    # Deadlines and hedging: each chat request must answer within CHAT_DEADLINE_SECONDS;
+    # LLM calls get what is left (minus a reserve), capped at LLM_TIMEOUT_SECONDS
+    CHAT_DEADLINE_SECONDS = float(os.environ.get('CHAT_DEADLINE_SECONDS', 20))
+    LLM_TIMEOUT_SECONDS = float(os.environ.get('LLM_TIMEOUT_SECONDS', 15))
+    LLM_DEADLINE_RESERVE_MS = int(os.environ.get('LLM_DEADLINE_RESERVE_MS', 300))
+    LLM_MIN_CALL_MS = int(os.environ.get('LLM_MIN_CALL_MS', 250))
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 0))
+    LLM_HEDGE_ENABLED = os.environ.get('LLM_HEDGE_ENABLED', 'false').lower() == 'true'
+    LLM_HEDGE_MIN_DELAY_MS = int(os.environ.get('LLM_HEDGE_MIN_DELAY_MS', 200))
+    
+    # Precomputed answers for quick actions and the most frequent chat messages
+    FAST_PATH_ENABLED = os.environ.get('FAST_PATH_ENABLED', 'true').lower() == 'true'
+    FAST_PATH_TOP_N = int(os.environ.get('FAST_PATH_TOP_N', 20))
+    FAST_PATH_WINDOW_DAYS = int(os.environ.get('FAST_PATH_WINDOW_DAYS', 30))
+    
+    # LLM providers, tried in router order: openai, http (any OpenAI-compatible
+    # server at LLM_HTTP_BASE_URL) and local (deterministic rules, always last)
+    LLM_PROVIDERS = os.environ.get('LLM_PROVIDERS', 'openai')
+    LLM_MODEL_FAST = os.environ.get('LLM_MODEL_FAST', 'gpt-3.5-turbo')
+    LLM_MODEL_STRONG = os.environ.get('LLM_MODEL_STRONG', 'gpt-3.5-turbo')
+    LLM_HTTP_BASE_URL = os.environ.get('LLM_HTTP_BASE_URL')
+    LLM_HTTP_API_KEY = os.environ.get('LLM_HTTP_API_KEY')
+    LLM_HTTP_MODEL_FAST = os.environ.get('LLM_HTTP_MODEL_FAST', 'local-model')
+    LLM_HTTP_MODEL_STRONG = os.environ.get('LLM_HTTP_MODEL_STRONG', 'local-model')
+    # Model tier (fast/strong) per intent
+    LLM_INTENT_TIERS = os.environ.get('LLM_INTENT_TIERS', 'general=fast,appointment_scheduling=strong,summary=fast,booking_extraction=fast')
+    # Price per 1k tokens and how many seconds of latency one unit of price is worth
+    LLM_COST_OPENAI_PER_1K = float(os.environ.get('LLM_COST_OPENAI_PER_1K', 0.002))
+    LLM_COST_HTTP_PER_1K = float(os.environ.get('LLM_COST_HTTP_PER_1K', 0.0))
+    LLM_ROUTER_COST_WEIGHT = float(os.environ.get('LLM_ROUTER_COST_WEIGHT', 100))
+    
+    # Rolling chat summary: once a session has more than CHAT_SUMMARY_AFTER_MESSAGES
+    # unsummarized messages, all but the last CHAT_RECENT_MESSAGES are summarized
+    CHAT_SUMMARY_ENABLED = os.environ.get('CHAT_SUMMARY_ENABLED', 'true').lower() == 'true'
+    CHAT_SUMMARY_ASYNC = os.environ.get('CHAT_SUMMARY_ASYNC', 'true').lower() == 'true'
+    CHAT_SUMMARY_AFTER_MESSAGES = int(os.environ.get('CHAT_SUMMARY_AFTER_MESSAGES', 10))
+    CHAT_RECENT_MESSAGES = int(os.environ.get('CHAT_RECENT_MESSAGES', 4))
+    
+    # Answer red-flag symptoms ("chest pain", "can't breathe") with an urgent-care
+    # message before any other handling and flag the chat session for staff
+    EMERGENCY_DETECTION_ENABLED = os.environ.get('EMERGENCY_DETECTION_ENABLED', 'true').lower() == 'true'
+    EMERGENCY_NUMBER = os.environ.get('EMERGENCY_NUMBER', '911')
+    
+    # Book appointments in the chat by filling slots (type, doctor, date, time, contact)
+    CHAT_BOOKING_ENABLED = os.environ.get('CHAT_BOOKING_ENABLED', 'true').lower() == 'true'
     
     # Google Calendar API Configuration
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
     GOOGLE_REDIRECT_URI = os.environ.get('GOOGLE_REDIRECT_URI')
+    GOOGLE_CALENDAR_API_ENDPOINT = os.environ.get('GOOGLE_CALENDAR_API_ENDPOINT')  # optional, e.g. a local fake
     
     # Security Configuration
     ALLOWED_ORIGINS = os.environ.get('ALLOWED_ORIGINS', '').split(',')
     
+    # Seconds a signed session role claim is trusted before the user is
+    # re-checked in the database (0 checks on every request)
+    AUTH_REVALIDATE_SECONDS = int(os.environ.get('AUTH_REVALIDATE_SECONDS', 60))
+    
     # Application Configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file upload
     
+    # Admin dashboard counters cache TTL (seconds)
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 30))
+    
+    # ETags, 304s and compression for read-mostly JSON endpoints
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 60))  # seconds, public endpoints only
+    HTTP_CACHE_MAX_ENTRIES = int(os.environ.get('HTTP_CACHE_MAX_ENTRIES', 256))  # bodies kept per worker
+    HTTP_COMPRESS_MIN_BYTES = int(os.environ.get('HTTP_COMPRESS_MIN_BYTES', 500))
+    
+    # Encode list endpoint responses with orjson when it is installed (stdlib otherwise)
+    JSON_ORJSON_ENABLED = os.environ.get('JSON_ORJSON_ENABLED', 'true').lower() == 'true'
+    
+    # Performance Instrumentation
+    SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 1000))
+    METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')  # optional bearer token for /metrics
+    
+    # SQL profiler / N+1 detector (opt-in, intended for development)
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', 'false').lower() == 'true'
+    SQL_PROFILER_MAX_QUERIES = int(os.environ.get('SQL_PROFILER_MAX_QUERIES', 20))
+    SQL_PROFILER_MAX_REPEATED = int(os.environ.get('SQL_PROFILER_MAX_REPEATED', 3))
+    SQL_PROFILER_RAISE = os.environ.get('SQL_PROFILER_RAISE', 'false').lower() == 'true'
+    SQL_PROFILER_OUTPUT_DIR = os.environ.get('SQL_PROFILER_OUTPUT_DIR')  # folded stacks for flamegraphs
+    
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
@@ -0,0 +1,173 @@
+"""Database engine configuration.
+
+Builds the ``SQLALCHEMY_ENGINE_OPTIONS`` passed to Flask-SQLAlchemy so that
+pooling and statement caching are tuned for the configured database dialect.
+Every option can be overridden through environment variables.
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+def _env_int(name, default):
+    """Read an integer environment variable, falling back to a default."""
+    value = os.environ.get(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+def _env_bool(name, default):
+    """Read a boolean environment variable, falling back to a default."""
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def normalize_database_url(url):
+    """Normalize provider-style URLs (e.g. ``postgres://``) for SQLAlchemy."""
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def get_dialect(url):
+    """Return the dialect name (``postgresql``, ``sqlite``, ...) for a URL."""
+    if not url:
+        return 'sqlite'
+    return url.split(':', 1)[0].split('+', 1)[0]
+
+
+def is_memory_sqlite(url):
+    """Check whether the URL points at an in-memory SQLite database."""
+    return get_dialect(url) == 'sqlite' and (
+        url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in url
+    )
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.wait_count += 1
+                self.wait_time_total += waited
+                if waited > self.wait_time_max:
+                    self.wait_time_max = waited
+
+
+def build_engine_options(database_url):
+    """Build dialect-aware SQLAlchemy engine options.
+
+    Supported environment variables:
+
+    - ``DB_POOL_SIZE`` (default 5)
+    - ``DB_MAX_OVERFLOW`` (default 10)
+    - ``DB_POOL_TIMEOUT`` seconds to wait for a connection (default 30)
+    - ``DB_POOL_RECYCLE`` seconds before a connection is replaced (default 1800)
+    - ``DB_POOL_PRE_PING`` test connections on checkout (default true)
+    - ``DB_STATEMENT_CACHE_SIZE`` compiled statement cache entries (default 500)
+    - ``DB_PREPARE_THRESHOLD`` psycopg 3 server-side prepare threshold (default 5)
+    - ``DB_CONNECT_TIMEOUT`` seconds for new Postgres connections (default 10)
+    - ``DB_STATEMENT_TIMEOUT_MS`` Postgres statement timeout, 0 disables (default 0)
+    """
+    url = normalize_database_url(database_url)
+    dialect = get_dialect(url)
+
+    options = {
+        # SQLAlchemy's compiled statement cache; reused across requests so
+        # the ORM does not recompile the same queries.
+        'query_cache_size': _env_int('DB_STATEMENT_CACHE_SIZE', 500),
+    }
+
+    if dialect == 'sqlite':
+        if is_memory_sqlite(url):
+            # In-memory databases live on a single connection; leave the
+            # default SingletonThreadPool/StaticPool in place.
+            return options
+        options.update({
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': _env_int('DB_POOL_SIZE', 5),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        })
+        return options
+
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    })
+
+    if dialect == 'postgresql':
+        connect_args = {}
+        driver = url.split(':', 1)[0]
+        if driver == 'postgresql+psycopg':
+            # psycopg 3 prepares statements server-side after they have been
+            # executed this many times on a connection.
+            connect_args['prepare_threshold'] = _env_int('DB_PREPARE_THRESHOLD', 5)
+        if driver in ('postgresql', 'postgresql+psycopg2', 'postgresql+psycopg'):
+            connect_args['connect_timeout'] = _env_int('DB_CONNECT_TIMEOUT', 10)
+            statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+            if statement_timeout:
+                connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+        if connect_args:
+            options['connect_args'] = connect_args
+
+    return options
+
+
+def get_pool_stats(engine):
+    """Return a snapshot of connection pool statistics for an engine."""
+    pool = engine.pool
+    stats = {
+        'dialect': engine.dialect.name,
+        'pool_class': type(pool).__name__,
+    }
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+        })
+
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            wait_count = pool.wait_count
+            stats.update({
+                'wait_count': wait_count,
+                'wait_time_total_ms': round(pool.wait_time_total * 1000, 3),
+                'wait_time_avg_ms': round(pool.wait_time_total * 1000 / wait_count, 3) if wait_count else 0.0,
+                'wait_time_max_ms': round(pool.wait_time_max * 1000, 3),
+                'timeouts': pool.timeouts,
+            })
+
+    return stats
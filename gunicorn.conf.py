@@ -0,0 +1,99 @@
+"""Gunicorn settings for production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Chat requests spend almost all their time waiting on the LLM, so the
+default worker class is ``gthread``: a few processes, each serving several
+requests at once on threads. ``gevent`` serves many more waiting requests
+per process if it is installed (``pip install gevent``); ``sync`` handles
+one request per process.
+
+Environment variables:
+
+- ``GUNICORN_WORKER_CLASS`` gthread, gevent or sync (default gthread)
+- ``WEB_CONCURRENCY`` worker processes (default CPUs + 1 for gthread and
+  gevent, 2 x CPUs + 1 for sync, at most 8)
+- ``GUNICORN_THREADS`` threads per gthread worker (default 8)
+- ``GUNICORN_WORKER_CONNECTIONS`` concurrent requests per gevent worker (default 100)
+- ``GUNICORN_TIMEOUT`` seconds before a silent worker is restarted (default 60)
+- ``GUNICORN_GRACEFUL_TIMEOUT`` seconds for in-flight requests on restart (default 30)
+- ``GUNICORN_KEEPALIVE`` seconds to hold idle client connections (default 75)
+- ``GUNICORN_PRELOAD`` load the app once before forking (default true)
+"""
+
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread').strip().lower()
+if worker_class == 'gevent':
+    try:
+        # Patch before the app is preloaded so its sockets and locks cooperate
+        from gevent import monkey
+        monkey.patch_all()
+    except ImportError:
+        print("gevent is not installed; using gthread workers")
+        worker_class = 'gthread'
+elif worker_class not in ('gthread', 'sync'):
+    print(f"Unknown GUNICORN_WORKER_CLASS {worker_class!r}; using gthread workers")
+    worker_class = 'gthread'
+
+cpus = _cpu_count()
+# Container CPU counts are often the host's, so keep the default small
+default_workers = cpus * 2 + 1 if worker_class == 'sync' else cpus + 1
+workers = _env_int('WEB_CONCURRENCY', min(default_workers, 8))
+threads = _env_int('GUNICORN_THREADS', 8) if worker_class == 'gthread' else 1
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 100)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Chat requests wait up to CHAT_DEADLINE_SECONDS on the LLM. gthread and
+# gevent workers keep heartbeating while they wait, so the timeout only
+# bounds sync workers' requests and hung processes.
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# Longer than the usual proxy idle timeout (60s), so the proxy closes idle
+# connections first and never reuses one gunicorn has just dropped
+keepalive = _env_int('GUNICORN_KEEPALIVE', 75)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Heartbeat files on a disk-backed /tmp can stall workers in containers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections.
+
+    With ``preload_app`` the engine is created in the master; connections
+    it opened must not be shared by the forked workers, so the worker
+    drops the inherited pool without closing the parent's connections.
+    """
+    if not server.cfg.preload_app:
+        return
+    from app import db
+
+    with worker.app.wsgi().app_context():
+        db.engine.dispose(close=False)
+
+
+def when_ready(server):
+    cfg = server.cfg
+    server.log.info(f"Serving with {cfg.workers} {cfg.worker_class_str} workers"
+                    + (f" x {cfg.threads} threads" if cfg.worker_class_str == 'gthread' else ''))
@@ -0,0 +1,66 @@
+"""Shared fixtures: a fresh app on an in-memory SQLite database per test."""
+
+import os
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('FLASK_ENV', 'development')
+
+import pytest  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import FAQ, User  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    from app.routes.api import fast_path_service
+    from app.services.booking_service import scheduling_version
+    from app.services.retrieval_service import knowledge_version
+    from app.utils.http_cache import response_cache
+
+    app = create_app()
+    app.config.update(TESTING=True, CHAT_SUMMARY_ENABLED=False, OPENAI_API_KEY=None)
+    # Module-level caches outlive a test; start each one from its own data
+    knowledge_version.reset()
+    scheduling_version.reset()
+    fast_path_service.invalidate()
+    response_cache.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _logged_in_client(app, role):
+    user = User(username=role, email=f'{role}@example.com', role=role)
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    response = client.post('/auth/login', json={'username': role, 'password': 'secret'})
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def staff_client(app):
+    return _logged_in_client(app, 'staff')
+
+
+@pytest.fixture
+def admin_client(app):
+    return _logged_in_client(app, 'admin')
+
+
+@pytest.fixture
+def faq(app):
+    faq = FAQ(category='general', question='What are your clinic hours?', answer='9 to 5, Monday to Friday.')
+    db.session.add(faq)
+    db.session.commit()
+    return faq
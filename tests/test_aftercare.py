@@ -0,0 +1,19 @@
+import pytest
+
+from app import db
+from app.models import AftercareInstruction
+
+
+@pytest.fixture
+def instructions(app):
+    for index, treatment_type in enumerate(('vaccination', 'flu vaccination', 'travel vaccination')):
+        db.session.add(AftercareInstruction(title=f'Vaccination aftercare {index}', treatment_type=treatment_type,
+                                            instructions='Keep the site clean.', language='en'))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('limit, expected', [('1', 1), ('0', 1), ('-5', 1), ('1000000', 3), ('many', 3)])
+def test_search_limit_is_clamped(client, instructions, limit, expected):
+    response = client.get(f'/api/aftercare?q=vaccination&limit={limit}')
+    assert response.status_code == 200
+    assert len(response.json) == expected
@@ -0,0 +1,60 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from app import db
+from app.models import Appointment, ChatSession, Doctor, Patient
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday')
+
+
+@pytest.fixture
+def doctor(app):
+    doctor = Doctor(first_name='Bob', last_name='Stone', specialization='Dermatology',
+                    availability=json.dumps({day: [{'start': '09:00', 'end': '12:00'}] for day in WEEKDAYS}))
+    db.session.add(doctor)
+    db.session.commit()
+    return doctor
+
+
+def book_in_chat(client, email):
+    day = date.today() + timedelta(days=3)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    for message in ("I'd like to book an appointment", 'a check-up please', 'with a dermatologist',
+                    f'{day.isoformat()} at 10:30', 'my name is Jane Roe', '555-123-4567', email):
+        client.post('/api/chat', json={'message': message})
+    response = client.post('/api/chat', json={'message': 'yes'})
+    assert response.json['type'] == 'appointment_booked'
+    return db.session.get(Appointment, response.json['metadata']['appointment']['id'])
+
+
+def test_new_email_gets_its_own_patient(app, doctor):
+    appointment = book_in_chat(app.test_client(), 'jane@example.com')
+
+    patient = db.session.get(Patient, appointment.patient_id)
+    assert patient.email == 'jane@example.com'
+    assert ChatSession.query.one().patient_id == patient.id
+
+
+def test_email_on_file_is_not_linked_to_that_patient(app, doctor):
+    existing = Patient(first_name='Ana', last_name='Lopez', email='ana@example.com', phone='555-0100',
+                       medical_history='Asthma')
+    db.session.add(existing)
+    db.session.commit()
+
+    appointment = book_in_chat(app.test_client(), 'ana@example.com')
+
+    assert appointment.patient_id != existing.id
+    patient = db.session.get(Patient, appointment.patient_id)
+    assert (patient.first_name, patient.email, patient.phone) == ('Jane', None, '555-123-4567')
+    assert 'ana@example.com' in appointment.notes
+    assert ChatSession.query.one().patient_id == patient.id
+    assert Appointment.query.filter_by(patient_id=existing.id).count() == 0
+
+
+def test_patients_api_still_requires_an_email(staff_client):
+    response = staff_client.post('/api/patients', json={'first_name': 'Jo', 'last_name': 'Poe', 'phone': '555'})
+    assert response.status_code == 400
+    assert response.json['error'] == 'Email is required'
@@ -0,0 +1,61 @@
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, AdaptiveController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_breaker(clock):
+    controller = AdaptiveController(latency_threshold=1.0, error_rate_threshold=0.5, cooldown=30,
+                                    min_samples=4, clock=clock)
+    for _ in range(4):
+        controller.record(0.1, ok=False)
+    assert controller.state == OPEN
+    assert controller.last_reason == 'error_rate'
+    return controller
+
+
+def test_open_breaker_rejects_calls_until_the_cooldown():
+    clock = FakeClock()
+    controller = open_breaker(clock)
+    clock.now += 29
+    assert controller.allow() == (False, 'circuit_open')
+    assert controller.state == OPEN
+
+
+def test_cooldown_lets_a_single_probe_through():
+    clock = FakeClock()
+    controller = open_breaker(clock)
+    clock.now += 30
+    assert controller.allow() == (True, None)
+    assert controller.state == HALF_OPEN
+    assert controller.allow() == (False, 'circuit_open')
+
+
+def test_healthy_probe_closes_the_breaker():
+    clock = FakeClock()
+    controller = open_breaker(clock)
+    clock.now += 30
+    controller.allow()
+    controller.record(0.2, ok=True)
+    assert controller.state == CLOSED
+    assert controller.last_reason is None
+    assert controller.allow() == (True, None)
+
+
+def test_failed_or_slow_probe_reopens_the_breaker():
+    for latency, ok in ((0.2, False), (5.0, True)):
+        clock = FakeClock()
+        controller = open_breaker(clock)
+        clock.now += 30
+        controller.allow()
+        controller.record(latency, ok=ok)
+        assert controller.state == OPEN
+        assert controller.last_reason == 'probe_failed'
+        # The cooldown starts again from the failed probe
+        clock.now += 29
+        assert controller.allow() == (False, 'circuit_open')
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from config.database import InstrumentedQueuePool, build_engine_options, get_pool_stats
+
+POOL_ENV = ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT', 'DB_POOL_RECYCLE', 'DB_POOL_PRE_PING',
+            'DB_STATEMENT_CACHE_SIZE', 'DB_PREPARE_THRESHOLD', 'DB_CONNECT_TIMEOUT', 'DB_STATEMENT_TIMEOUT_MS')
+
+
+@pytest.fixture(autouse=True)
+def default_pool_env(monkeypatch):
+    for name in POOL_ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_memory_sqlite_keeps_the_default_pool():
+    assert build_engine_options('sqlite://') == {'query_cache_size': 500}
+    assert build_engine_options('sqlite:///:memory:') == {'query_cache_size': 500}
+
+
+def test_file_sqlite_gets_a_queue_pool_without_recycling():
+    options = build_engine_options('sqlite:///clinic.db')
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_timeout']) == (5, 10, 30)
+    assert 'pool_recycle' not in options
+    assert 'connect_args' not in options
+
+
+def test_postgres_urls_get_recycling_pre_ping_and_a_connect_timeout():
+    options = build_engine_options('postgres://clinic:secret@db/clinic')
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert options['pool_recycle'] == 1800
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args'] == {'connect_timeout': 10}
+
+
+def test_psycopg3_gets_a_prepare_threshold():
+    options = build_engine_options('postgresql+psycopg://clinic@db/clinic')
+    assert options['connect_args'] == {'prepare_threshold': 5, 'connect_timeout': 10}
+
+
+def test_environment_overrides(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '20')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', 'not a number')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'off')
+    monkeypatch.setenv('DB_STATEMENT_CACHE_SIZE', '1000')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '5000')
+    options = build_engine_options('postgresql://clinic@db/clinic')
+    assert options['pool_size'] == 20
+    assert options['max_overflow'] == 10
+    assert options['pool_pre_ping'] is False
+    assert options['query_cache_size'] == 1000
+    assert options['connect_args']['options'] == '-c statement_timeout=5000'
+
+
+def test_pool_stats_count_checkouts_and_timeouts(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '1')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+    url = f'sqlite:///{tmp_path / "pool.db"}'
+    options = build_engine_options(url)
+    options['pool_timeout'] = 0.05
+    engine = create_engine(url, **options)
+    try:
+        connection = engine.connect()
+        stats = get_pool_stats(engine)
+        assert stats['dialect'] == 'sqlite'
+        assert stats['pool_class'] == 'InstrumentedQueuePool'
+        assert (stats['size'], stats['checked_out'], stats['overflow']) == (1, 1, 0)
+        assert stats['wait_count'] == 1
+        assert stats['timeouts'] == 0
+
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        connection.close()
+
+        stats = get_pool_stats(engine)
+        assert (stats['checked_in'], stats['checked_out']) == (1, 0)
+        assert stats['wait_count'] == 2
+        assert stats['timeouts'] == 1
+        assert stats['wait_time_max_ms'] >= 50
+        assert stats['wait_time_avg_ms'] == pytest.approx(stats['wait_time_total_ms'] / 2, abs=0.001)
+    finally:
+        engine.dispose()
+
+
+def test_pool_stats_endpoint_is_admin_only(app, client, admin_client):
+    assert client.get('/admin/metrics/db-pool').status_code in (302, 401, 403)
+    response = admin_client.get('/admin/metrics/db-pool')
+    assert response.status_code == 200
+    assert response.json['dialect'] == 'sqlite'
+    # Flask-SQLAlchemy keeps in-memory SQLite on one static connection
+    assert response.json['pool_class'] == 'StaticPool'
+    assert 'wait_count' not in response.json
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import ChatSession
+from app.services.emergency_service import emergency_matcher
+
+
+@pytest.mark.parametrize('message', [
+    'chest pain, can\'t breathe',
+    'what is wrong with me I have chest pain',
+    'I do not know why I cannot breathe',
+    'no chest pain but I can\'t breathe',
+    'I\'m not sure what is happening, chest pain',
+    'Tengo dolor en el pecho',
+    'Je ne peux pas respirer',
+])
+def test_emergencies_match(message):
+    assert emergency_matcher.match(message)
+
+
+@pytest.mark.parametrize('message', [
+    'I have no chest pain',
+    'I don\'t have trouble breathing',
+    'I don\'t have any chest pain',
+    'She denies chest pain',
+    'I\'ve never fainted before',
+    'No chest pain or shortness of breath, just a cough',
+    'No tengo dolor en el pecho',
+    'Je n\'ai pas de douleur thoracique',
+])
+def test_negated_red_flags_do_not_match(message):
+    assert emergency_matcher.match(message) == []
+
+
+@pytest.mark.parametrize('message', [
+    'What are the signs of a stroke?',
+    'How can I prevent a heart attack?',
+    'Family history of heart attack, should I get a check-up?',
+    'What are the symptoms of anaphylaxis?',
+    '¿Cuáles son los síntomas de un infarto?',
+    'Quels sont les signes d\'un AVC ?',
+])
+def test_informational_questions_do_not_match(message):
+    assert emergency_matcher.match(message) == []
+
+
+def test_negation_of_another_verb_does_not_hide_the_phrase():
+    assert emergency_matcher.match('I don\'t know why but I have chest pain') == [('cardiac', 'chest pain')]
+
+
+@pytest.mark.parametrize('limit, expected', [('2', 2), ('0', 1), ('-1', 1), ('100000', 3)])
+def test_flagged_sessions_limit_is_clamped(staff_client, limit, expected):
+    for index in range(3):
+        db.session.add(ChatSession(session_id=f'flagged-{index}', flagged_reason='cardiac',
+                                   flagged_at=datetime(2026, 5, 1, 9 + index)))
+    db.session.commit()
+
+    response = staff_client.get(f'/api/chat-sessions/flagged?limit={limit}')
+    assert response.status_code == 200
+    assert [row['session_id'] for row in response.json] == ['flagged-2', 'flagged-1', 'flagged-0'][:expected]
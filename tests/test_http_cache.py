@@ -0,0 +1,61 @@
+import gzip
+
+from app import db
+from app.models import FAQ
+
+
+def test_faqs_send_an_etag_and_answer_304_when_unchanged(client, faq):
+    response = client.get('/api/faqs')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.cache_control.public
+
+    not_modified = client.get('/api/faqs', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+    assert not_modified.headers['ETag'] == etag
+
+    weak = client.get('/api/faqs', headers={'If-None-Match': f'W/{etag}'})
+    assert weak.status_code == 304
+
+
+def test_a_write_changes_the_etag(client, faq):
+    etag = client.get('/api/faqs').headers['ETag']
+    db.session.add(FAQ(category='general', question='Is parking available?', answer='Yes, behind the clinic.'))
+    db.session.commit()
+
+    response = client.get('/api/faqs', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.json) == 2
+
+
+def test_query_string_is_part_of_the_etag(client, faq):
+    english = client.get('/api/faqs').headers['ETag']
+    spanish = client.get('/api/faqs?language=es').headers['ETag']
+    assert english != spanish
+    assert client.get('/api/faqs?language=es', headers={'If-None-Match': english}).status_code == 200
+
+
+def test_compressed_variant_has_its_own_etag(app, client, faq):
+    app.config['HTTP_COMPRESS_MIN_BYTES'] = 10
+    plain = client.get('/api/faqs', headers={'Accept-Encoding': 'identity'})
+    compressed = client.get('/api/faqs', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    revalidated = client.get('/api/faqs', headers={'Accept-Encoding': 'gzip',
+                                                   'If-None-Match': compressed.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_uncached_args_skip_the_cache(client):
+    response = client.get('/api/aftercare?q=vaccination')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+def test_disabled_cache_sends_no_etag(app, client, faq):
+    app.config['HTTP_CACHE_ENABLED'] = False
+    assert 'ETag' not in client.get('/api/faqs').headers
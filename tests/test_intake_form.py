@@ -0,0 +1,132 @@
+import pytest
+
+from app import db
+from app.models import ChatSession, IntakeForm, Patient
+
+
+@pytest.fixture
+def patient(app):
+    patient = Patient(first_name='Ana', last_name='Lopez', email='ana@example.com', phone='555-0100')
+    db.session.add(patient)
+    db.session.commit()
+    return patient
+
+
+def start_chat_intake(client, complaint):
+    response = client.post('/api/chat', json={'message': 'I want to fill out my intake form'})
+    assert response.json['metadata']['step'] == 'chief_complaint'
+    response = client.post('/api/chat', json={'message': complaint})
+    assert response.json['metadata']['step'] == 'symptoms'
+    return IntakeForm.query.filter_by(chief_complaint=complaint).one()
+
+
+def test_chat_session_resumes_its_own_draft(app, patient):
+    client = app.test_client()
+    draft = start_chat_intake(client, 'Recurring migraines')
+
+    response = client.post('/api/intake-form', json={'patient_email': patient.email, 'symptoms': 'Nausea',
+                                                     'draft': True})
+    assert response.status_code == 200
+    assert response.json['id'] == draft.id
+    assert response.json['chief_complaint'] == 'Recurring migraines'
+    assert response.json['symptoms'] == 'Nausea'
+    assert response.json['patient_id'] == patient.id
+
+
+def test_email_alone_does_not_expose_or_change_a_draft(app, patient):
+    owner = app.test_client()
+    draft = start_chat_intake(owner, 'Recurring migraines')
+    draft.patient_id = patient.id
+    db.session.commit()
+
+    stranger = app.test_client()
+    response = stranger.post('/api/intake-form', json={'patient_email': patient.email,
+                                                       'chief_complaint': 'Overwritten', 'draft': True})
+    assert response.status_code == 201
+    assert response.json['id'] != draft.id
+    assert response.json['chief_complaint'] == 'Overwritten'
+    assert response.json['symptoms'] is None
+
+    db.session.expire_all()
+    assert db.session.get(IntakeForm, draft.id).chief_complaint == 'Recurring migraines'
+
+
+def test_another_chat_cannot_resume_a_draft_of_a_different_patient(app, patient):
+    owner = app.test_client()
+    draft = start_chat_intake(owner, 'Recurring migraines')
+    other = Patient(first_name='Bo', last_name='Kim', email='bo@example.com', phone='555-0101')
+    db.session.add(other)
+    db.session.commit()
+    draft.patient_id = other.id
+    db.session.commit()
+
+    response = owner.post('/api/intake-form', json={'patient_email': patient.email, 'draft': True})
+    assert response.status_code == 201
+    assert response.json['id'] != draft.id
+    assert response.json['chief_complaint'] is None
+
+
+def test_staff_resume_the_patients_latest_draft(patient, staff_client):
+    draft = IntakeForm(patient_id=patient.id, status='paused', chief_complaint='Knee pain')
+    db.session.add(draft)
+    db.session.commit()
+
+    response = staff_client.post('/api/intake-form', json={'patient_email': patient.email, 'pain_level': 4})
+    assert response.status_code == 200
+    assert response.json['id'] == draft.id
+    assert response.json['status'] == 'completed'
+    assert response.json['pain_level'] == 4
+
+
+def test_completing_a_new_form_requires_a_chief_complaint(client, patient):
+    response = client.post('/api/intake-form', json={'patient_email': patient.email, 'symptoms': 'Cough'})
+    assert response.status_code == 400
+    assert IntakeForm.query.count() == 0
+
+
+def test_unknown_patient_is_404(client):
+    response = client.post('/api/intake-form', json={'patient_email': 'nobody@example.com', 'draft': True})
+    assert response.status_code == 404
+
+
+def test_chat_with_a_patient_does_not_resume_that_patients_other_drafts(app, patient):
+    other_chat = ChatSession(session_id='other-chat')
+    db.session.add(other_chat)
+    db.session.flush()
+    draft = IntakeForm(patient_id=patient.id, chat_session_id=other_chat.id, status='draft',
+                       chief_complaint='Private complaint', symptoms='Private symptoms')
+    db.session.add(draft)
+    db.session.commit()
+
+    client = app.test_client()
+    client.post('/api/chat', json={'message': 'hello'})
+    chat_session = ChatSession.query.filter(ChatSession.session_id != 'other-chat').one()
+    chat_session.patient_id = patient.id  # as a chat booking with the patient's email would
+    db.session.commit()
+
+    response = client.post('/api/chat', json={'message': 'I want to fill out my intake form'})
+    assert response.json['metadata']['step'] == 'chief_complaint'
+    assert response.json['metadata']['intake_form_id'] != draft.id
+    client.post('/api/chat', json={'message': 'Overwritten'})
+
+    db.session.expire_all()
+    assert db.session.get(IntakeForm, draft.id).chief_complaint == 'Private complaint'
+
+
+@pytest.mark.parametrize('status', ['draft', 'paused'])
+def test_chat_completes_a_draft_with_every_answer_filled(app, patient, status):
+    client = app.test_client()
+    draft = start_chat_intake(client, 'Recurring migraines')
+    response = client.post('/api/intake-form', json={
+        'patient_email': patient.email, 'symptoms': 'Nausea', 'symptom_duration': '2 weeks', 'pain_level': 6,
+        'previous_treatments': 'Ibuprofen', 'draft': True})
+    assert response.json['id'] == draft.id
+    draft.status = status
+    db.session.commit()
+
+    response = client.post('/api/chat', json={'message': 'I want to fill out my intake form'})
+    assert response.status_code == 200
+    assert response.json['metadata']['step'] == 'completed'
+    assert 'Pain level: 6/10' in response.json['message']
+    db.session.expire_all()
+    assert db.session.get(IntakeForm, draft.id).status == 'completed'
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+from app import db
+from app.models import Appointment, ChatMessage, ChatSession, Doctor, FAQ, Patient
+from app.utils.query_profiler import assert_max_queries
+
+ROWS = 5
+
+
+@pytest.fixture
+def seeded(app):
+    for index in range(ROWS):
+        patient = Patient(first_name='Ana', last_name=f'Lopez{index}', email=f'ana{index}@example.com',
+                          phone='555-0100')
+        doctor = Doctor(first_name='Sam', last_name=f'Reyes{index}', specialization='General Medicine')
+        db.session.add(Appointment(patient=patient, doctor=doctor, appointment_type='consultation',
+                                   appointment_date=datetime(2026, 5, 1, 9 + index)))
+        db.session.add(FAQ(category='general', question=f'Question {index}?', answer='Answer.'))
+        chat_session = ChatSession(session_id=f'session-{index}', flagged_reason='emergency',
+                                   flagged_at=datetime(2026, 5, 1, 9 + index))
+        db.session.add(ChatMessage(session=chat_session, sender='user', message='hello'))
+    db.session.commit()
+
+
+def repeated_selects(profile):
+    return {statement: count for statement, count in profile.repeated_statements().items()
+            if statement.lstrip().upper().startswith('SELECT')}
+
+
+def test_chat_message_query_budget(app, seeded):
+    client = app.test_client()
+    client.post('/api/chat', json={'message': 'hello'})  # builds the per-version caches
+
+    with assert_max_queries(8) as profile:
+        response = client.post('/api/chat', json={'message': 'hello again'})
+    assert response.status_code == 200
+    assert repeated_selects(profile) == {}
+
+
+def test_first_chat_message_query_budget(app, seeded):
+    app.test_client().post('/api/chat', json={'message': 'hello'})
+
+    with assert_max_queries(8) as profile:
+        response = app.test_client().post('/api/chat', json={'message': 'hello'})
+    assert response.status_code == 200
+    assert repeated_selects(profile) == {}
+
+
+@pytest.mark.parametrize('url, max_queries', [
+    ('/api/patients', 1),
+    ('/api/appointments', 1),
+    ('/api/faqs', 2),  # knowledge version for the ETag, then the list
+    ('/api/chat-sessions/flagged', 1),
+    ('/admin/doctors', 2),
+    ('/admin/faqs', 1),
+    ('/admin/stats', 2),
+])
+def test_admin_list_query_budget(seeded, admin_client, url, max_queries):
+    with assert_max_queries(max_queries, max_repeated=1):
+        response = admin_client.get(url)
+    assert response.status_code == 200
+
+
+def test_backrefs_never_lazy_load(seeded):
+    db.session.expunge_all()
+    message = ChatMessage.query.first()
+    with pytest.raises(InvalidRequestError):
+        message.session
+    # Once the parent is in the session no SQL is needed
+    chat_session = db.session.get(ChatSession, message.session_id)
+    assert message.session is chat_session
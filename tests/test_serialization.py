@@ -0,0 +1,40 @@
+import json
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import db
+from app.models import Patient
+from app.utils.serialization import patient_serializer
+
+
+def add_patient():
+    patient = Patient(first_name='Ana', last_name='Lopez', email='ana@example.com', phone='555-0100',
+                      date_of_birth=date(1990, 4, 2))
+    db.session.add(patient)
+    db.session.commit()
+    return patient
+
+
+def test_list_endpoint_matches_to_dict_in_order(staff_client):
+    patient = add_patient()
+    response = staff_client.get('/api/patients')
+    assert response.status_code == 200
+    rows = json.loads(response.data)
+    assert rows == [patient.to_dict()]
+    assert list(rows[0]) == list(patient_serializer.fields)
+
+
+def test_fields_narrow_the_list(staff_client):
+    add_patient()
+    assert staff_client.get('/api/patients?fields=id,email').json == [{'id': 1, 'email': 'ana@example.com'}]
+    response = staff_client.get('/api/patients?fields=id,medical_history')
+    assert response.status_code == 400
+    assert response.json['error'] == 'Unknown field(s): medical_history'
+
+
+def test_other_views_keep_flasks_json_provider(app, staff_client):
+    assert type(app.json) is DefaultJSONProvider
+    patient = add_patient()
+    response = staff_client.get(f'/api/patients/{patient.id}')
+    assert list(json.loads(response.data)) == sorted(patient.to_dict())
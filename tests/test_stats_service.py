@@ -0,0 +1,45 @@
+import itertools
+from datetime import datetime
+
+from app import db
+from app.models import Appointment, DailyStat, Patient
+
+_emails = (f'patient{index}@example.com' for index in itertools.count())
+
+
+def daily_count(day, metric='appointments'):
+    row = DailyStat.query.filter_by(day=day, metric=metric).first()
+    return row.count if row else None
+
+
+def add_appointment(created_at):
+    patient = Patient(first_name='Ana', last_name='Lopez', email=next(_emails), phone='555-0100')
+    appointment = Appointment(patient=patient, appointment_date=datetime(2026, 5, 1, 9),
+                              appointment_type='consultation', created_at=created_at)
+    db.session.add(appointment)
+    db.session.commit()
+    return appointment
+
+
+def test_daily_rollup_follows_inserts_and_deletes(app):
+    created_at = datetime(2026, 4, 20, 10)
+    first = add_appointment(created_at)
+    add_appointment(created_at.replace(hour=11))
+    assert daily_count(created_at.date()) == 2
+
+    db.session.delete(first)
+    db.session.commit()
+    assert daily_count(created_at.date()) == 1
+
+
+def test_first_delta_is_stored_as_is(app):
+    created_at = datetime(2026, 4, 20, 10)
+    appointment = add_appointment(created_at)
+    DailyStat.query.delete()
+    db.session.commit()
+
+    db.session.delete(appointment)
+    db.session.commit()
+    assert daily_count(created_at.date()) == -1
+    add_appointment(created_at)
+    assert daily_count(created_at.date()) == 0